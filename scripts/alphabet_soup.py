@@ -8,11 +8,19 @@ import random
 import requests
 from urllib.parse import quote
 
+from harvest_sink import SpillingDedupSink
+
 
 class GoogleSuggestHarvester:
     """Google 自动补全挖词器"""
     
-    def __init__(self):
+    def __init__(self, locale=None, fetcher=None):
+        """
+        locale: locales.Locale，指定市场的 hl / gl（None 时沿用 Google 默认）
+        fetcher: fetch.Fetcher，给定时走共享响应缓存 + 该市场的限速器（多市场运行）
+        """
+        self.locale = locale
+        self.fetcher = fetcher
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -21,9 +29,15 @@ class GoogleSuggestHarvester:
     def _get_suggestions(self, keyword):
         """获取单个关键词的建议"""
         url = f"https://suggestqueries.google.com/complete/search?client=firefox&q={quote(keyword)}"
+        params = self.locale.params() if self.locale else None
+        
+        if self.fetcher is not None:
+            limiter = f"suggest:{self.locale.code}" if self.locale else "suggest"
+            data = self.fetcher.get_json(url, params, limiter=limiter)
+            return data[1] if data and len(data) > 1 else []
         
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return data[1] if len(data) > 1 else []
@@ -34,28 +48,39 @@ class GoogleSuggestHarvester:
     
     def _get_related(self, keyword):
         """获取相关查询"""
-        url = f"https://www.google.com/search?q={quote(keyword)}&hl=en"
+        hl = self.locale.hl if self.locale else 'en'
+        url = f"https://www.google.com/search?q={quote(keyword)}&hl={hl}"
         
         # 简化版：只返回主关键词
         return []
     
-    def harvest(self, seed_words, max_per_word=20):
-        """批量挖词"""
-        all_suggestions = set()
+    def harvest(self, seed_words, max_per_word=20, sink=None, deadline=None):
+        """
+        批量挖词，返回去重后的 SpillingDedupSink（可反复按字母序遍历）
+
+        deadline: deadline.StageDeadline，到点后不再发新请求，返回已挖到的部分
+        """
+        all_suggestions = sink if sink is not None else SpillingDedupSink()
         
         for word in seed_words:
+            if deadline is not None and deadline.expired():
+                break
+            
             # 基础建议
             suggestions = self._get_suggestions(word)
             all_suggestions.update(suggestions[:max_per_word])
             
             # 字母汤变体
             for char in 'abcdefghijklmnopqrstuvwxyz':
+                if deadline is not None and deadline.expired():
+                    break
                 variant = f"{char} {word}"
                 suggestions = self._get_suggestions(variant)
                 all_suggestions.update(suggestions[:max_per_word // 2])
             
-            # 随机延迟，避免限频
-            time.sleep(random.uniform(0.5, 1.5))
+            # 随机延迟，避免限频（走 Fetcher 时由各市场的限速器负责）
+            if self.fetcher is None:
+                time.sleep(random.uniform(0.5, 1.5))
         
         return all_suggestions
 
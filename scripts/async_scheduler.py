@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Profit Hunter ULTIMATE - 异步分源调度器
+========================================
+
+不再整条流水线每 6 小时一起跑，而是每个数据源一个独立的周期任务：
+- suggest: 每 24 小时（自动补全变化慢）
+- trends:  每 6 小时
+- reddit:  每 12 小时
+- serp:    每 168 小时（每周）
+- score:   每 1 小时，只读本地结果重新评分，不发网络请求
+
+每个任务有自己的并发上限、防重叠（上一轮没跑完就跳过本轮）和随机抖动，
+结果统一写入 SourceStore，有效期内的关键词不会重复抓取（重启后同样生效）。
+每轮最多刷新 --max 个词时按最久没刷新的优先（从没抓过的最先，同样陈旧按本地预评分），
+几轮下来轮转覆盖所有挖到的词，而不是每轮都刷新同一批。
+
+Usage:
+    python async_scheduler.py                      # 守护进程模式
+    python async_scheduler.py --once               # 每个源各跑一轮后退出
+    python async_scheduler.py --only trends serp   # 只调度指定的源
+    python async_scheduler.py --serp-hours 72      # 调整单个源的节奏
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from source_store import SourceStore
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+FRESHNESS_MARGIN = 0.05   # 默认有效期再比最短间隔少 5%：结果在抓取结束时才落库，不能刚好卡在下一轮边界
+
+# 默认节奏（小时）/ 并发上限
+DEFAULT_JOBS = {
+    "suggest": {"hours": 24, "concurrency": 2},
+    "trends": {"hours": 6, "concurrency": 1},   # pytrends 会话不是线程安全的
+    "reddit": {"hours": 12, "concurrency": 2},
+    "serp": {"hours": 168, "concurrency": 1},
+    "score": {"hours": 1, "concurrency": 1},
+}
+
+
+class SourceJob:
+    """单个数据源的周期任务"""
+
+    def __init__(self, name: str, fetch: Callable[[str], Dict],
+                 keywords: Callable[[], List[str]], interval: float,
+                 concurrency: int = 1, jitter: float = 0.1,
+                 max_age: float = None, limit: int = None,
+                 priority: Callable[[str], float] = None):
+        self.name = name
+        self.fetch = fetch              # keyword -> payload（同步函数，在线程池中执行）
+        self.keywords = keywords        # 每轮重新计算要刷新的关键词
+        self.interval = interval        # 秒
+        self.concurrency = max(1, concurrency)
+        self.jitter = jitter            # 间隔的随机浮动比例
+        # 默认有效期 = 最短的下一轮间隔（再留余量），否则抖动提前的那一轮会把大部分词当成新鲜跳过，
+        # 实际刷新周期变成约 2 倍 interval
+        self.max_age = interval * (1 - jitter) * (1 - FRESHNESS_MARGIN) if max_age is None else max_age
+        self.limit = limit              # 每轮最多刷新的词数（None 不限）
+        self.priority = priority        # 同样陈旧时的优先级（越大越先），None 时不区分
+        self.attempted: Dict[str, float] = {}  # 没拿到结果（失败 / 无数据）的词的最后尝试时间，免得每轮都排在最前
+        self.running = False
+        self.last_stats = {}
+
+    def next_delay(self) -> float:
+        """下一轮的等待时间（带抖动，避免各源同时打点）"""
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class AsyncJobScheduler:
+    """asyncio 调度器：每个数据源独立循环"""
+
+    def __init__(self, store: SourceStore):
+        self.store = store
+        self.jobs: Dict[str, SourceJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._runs: Set[asyncio.Task] = set()   # 进行中的单轮任务（留引用，防止被垃圾回收）
+
+    def add_job(self, job: SourceJob):
+        self.jobs[job.name] = job
+
+    async def run_job(self, job: SourceJob) -> Optional[Dict]:
+        """执行一轮；上一轮未结束时直接跳过"""
+        if job.running:
+            logger.warning(f"⏭️  [{job.name}] 上一轮仍在运行，跳过本轮")
+            return None
+
+        job.running = True
+        started = time.time()
+        stats = {"fetched": 0, "skipped": 0, "errors": 0}
+        try:
+            pending = await asyncio.to_thread(self._select, job, stats)
+
+            logger.info(f"🚀 [{job.name}] 开始: 待刷新 {len(pending)} 个, 有效期内跳过 {stats['skipped']} 个")
+            semaphore = asyncio.Semaphore(job.concurrency)
+
+            async def fetch_one(keyword):
+                async with semaphore:
+                    try:
+                        payload = await asyncio.to_thread(job.fetch, keyword)
+                    except Exception as e:
+                        stats["errors"] += 1
+                        job.attempted[keyword] = time.time()
+                        logger.debug(f"[{job.name}] '{keyword}' 失败: {e}")
+                        return
+                    if payload is not None:
+                        self.store.put(job.name, keyword, payload)
+                        stats["fetched"] += 1
+                    else:
+                        job.attempted[keyword] = time.time()
+
+            await asyncio.gather(*(fetch_one(k) for k in pending))
+        finally:
+            job.running = False
+
+        stats["seconds"] = round(time.time() - started, 1)
+        job.last_stats = stats
+        logger.info(f"✅ [{job.name}] 完成: {stats}")
+        return stats
+
+    def _select(self, job: SourceJob, stats: Dict) -> List[str]:
+        """本轮要刷新的词：跳过有效期内的，超过 limit 时取最久没刷新的（没抓过的最先）"""
+        now = time.time()
+        fetched = self.store.fetched_at(job.name)
+        last = {}
+        for keyword in job.keywords():
+            seen = max(fetched.get(keyword, 0.0), job.attempted.get(keyword, 0.0))
+            if job.max_age and now - seen <= job.max_age:
+                stats["skipped"] += 1
+            else:
+                last[keyword] = seen
+        if job.limit is None or len(last) <= job.limit:
+            return list(last)
+        priority = job.priority or (lambda keyword: 0.0)
+        return heapq.nsmallest(job.limit, last, key=lambda keyword: (last[keyword], -priority(keyword), keyword))
+
+    async def _loop(self, job: SourceJob):
+        # 启动时错开，避免所有源同一时刻发请求
+        await asyncio.sleep(random.uniform(0, min(job.interval * job.jitter, 60)))
+        while True:
+            # 作为独立 task 启动，长任务不会推迟下一次计时；重叠由 run_job 拦截
+            task = asyncio.create_task(self.run_job(job))
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+            await asyncio.sleep(job.next_delay())
+
+    async def run_once(self):
+        """每个源各跑一轮（按注册顺序，suggest 先于依赖它的源）"""
+        for job in self.jobs.values():
+            await self.run_job(job)
+
+    async def run_forever(self):
+        for name, job in self.jobs.items():
+            self._tasks[name] = asyncio.create_task(self._loop(job))
+            logger.info(f"📅 [{name}] 每 {job.interval / HOUR:g} 小时, 并发 {job.concurrency}")
+        await asyncio.gather(*self._tasks.values())
+
+
+# ============ 默认数据源 ============
+
+def build_default_jobs(store: SourceStore, hours: Dict[str, float] = None,
+                       max_keywords: int = 200, jitter: float = 0.1) -> List[SourceJob]:
+    """构建默认的分源任务（依赖按需导入，未安装的源不影响其它源）"""
+    hours = hours or {}
+
+    def interval(name):
+        return hours.get(name, DEFAULT_JOBS[name]["hours"]) * HOUR
+
+    def seed_words():
+        from data_utils import load_keywords
+        return load_keywords()
+
+    def harvested_keywords():
+        """suggest 已挖到的全部关键词（每轮刷新哪些由 SourceJob.limit 按陈旧度挑）"""
+        keywords = set()
+        for payload in store.load("suggest").values():
+            keywords.update(payload.get("suggestions", []))
+        return list(keywords)
+
+    shared = {}
+    prescores: Dict[str, float] = {}
+
+    def prescore(keyword):
+        """本地预评分（不发请求，结果缓存）"""
+        if keyword not in prescores:
+            if "scorer" not in shared:
+                from scorer import KeywordScorer
+                shared["scorer"] = KeywordScorer()
+            from enrich_queue import prescore as local_prescore
+            prescores[keyword] = local_prescore(shared["scorer"], keyword)
+        return prescores[keyword]
+
+    def harvester():
+        if "harvester" not in shared:
+            from alphabet_soup import GoogleSuggestHarvester
+            shared["harvester"] = GoogleSuggestHarvester()
+        return shared["harvester"]
+
+    def trends():
+        if "trends" not in shared:
+            from trends_analyzer import TrendsAnalyzer
+            shared["trends"] = TrendsAnalyzer()
+        return shared["trends"]
+
+    def deep():
+        if "deep" not in shared:
+            from deep_search import DeepSearchAnalyzerV4
+            shared["deep"] = DeepSearchAnalyzerV4()
+        return shared["deep"]
+
+    def fetch_suggest(word):
+        return {"suggestions": list(harvester().harvest([word]))}
+
+    def fetch_trends(keyword):
+        return trends().analyze([keyword]).get(keyword)
+
+    def fetch_reddit(keyword):
+        return deep().search_reddit_real(keyword)
+
+    def fetch_serp(keyword):
+        return deep().analyze_google_serp(keyword)
+
+    def score_all(_):
+        """只读本地各源结果重新评分（顺带清理过期的响应缓存）"""
+        from data_utils import save_csv
+        from fetch import get_fetcher
+        from gpts_analyzer import GPTsAnalyzer
+        from scorer import KeywordScorer
+
+        keywords = harvested_keywords()
+        serp = {k: {"top_domains": v.get("competitors", [])}
+                for k, v in store.load("serp").items()}
+        gpts = GPTsAnalyzer().analyze(keywords)
+        scorer = KeywordScorer(store.load("trends"), gpts, serp, store.load("reddit"))
+        results = scorer.get_final_results(scorer.score(keywords))
+        save_csv(results, "ultimate_final_results.csv")
+        build_now = sum(1 for r in results if 'BUILD NOW' in r.get('decision', ''))
+        logger.info(f"🎯 [score] {len(results)} 个关键词, BUILD NOW {build_now} 个")
+        get_fetcher().purge()
+        return None
+
+    return [
+        SourceJob("suggest", fetch_suggest, seed_words, interval("suggest"),
+                  DEFAULT_JOBS["suggest"]["concurrency"], jitter),
+        SourceJob("trends", fetch_trends, harvested_keywords, interval("trends"),
+                  DEFAULT_JOBS["trends"]["concurrency"], jitter, limit=max_keywords, priority=prescore),
+        SourceJob("reddit", fetch_reddit, harvested_keywords, interval("reddit"),
+                  DEFAULT_JOBS["reddit"]["concurrency"], jitter, limit=max_keywords, priority=prescore),
+        SourceJob("serp", fetch_serp, harvested_keywords, interval("serp"),
+                  DEFAULT_JOBS["serp"]["concurrency"], jitter, limit=max_keywords, priority=prescore),
+        # score 不落库，每轮都执行
+        SourceJob("score", score_all, lambda: ["*"], interval("score"),
+                  DEFAULT_JOBS["score"]["concurrency"], jitter, max_age=0),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profit Hunter ULTIMATE - 异步分源调度器")
+    parser.add_argument("--once", action="store_true", help="每个源各跑一轮后退出")
+    parser.add_argument("--only", nargs="+", choices=list(DEFAULT_JOBS), help="只调度指定的源")
+    parser.add_argument("--max", type=int, default=200, help="trends/serp/reddit 每轮最多关键词数 (默认200)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="间隔随机浮动比例 (默认0.1)")
+    parser.add_argument("--db", type=str, default=None, help="结果库路径 (默认 data/source_store.db)")
+    for name, spec in DEFAULT_JOBS.items():
+        parser.add_argument(f"--{name}-hours", type=float, default=spec["hours"],
+                            help=f"{name} 刷新间隔（小时），默认 {spec['hours']}")
+    args = parser.parse_args()
+
+    log_dir = Path(__file__).parent / 'logs'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'async_scheduler.log', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+    store = SourceStore(args.db)
+    hours = {name: getattr(args, f"{name}_hours") for name in DEFAULT_JOBS}
+    scheduler = AsyncJobScheduler(store)
+    for job in build_default_jobs(store, hours, args.max, args.jitter):
+        if not args.only or job.name in args.only:
+            scheduler.add_job(job)
+
+    try:
+        asyncio.run(scheduler.run_once() if args.once else scheduler.run_forever())
+    except KeyboardInterrupt:
+        print('\n\n⏹️  调度器已停止')
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,6 @@ import time
 import json
 import argparse
 import pandas as pd
-import random
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
@@ -36,6 +35,12 @@ except ImportError:
     print("❌ 缺少依赖: pip install requests pandas pytrends")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).parent))
+from trends_service import get_trends_service
+from scoring_engine import get_engine
+from synthetic import keyword_rng
+from config import NEED_INDICATORS
+
 # ============ 配置 ============
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
@@ -67,56 +72,15 @@ PRODUCT_INDICATORS = [
     "to pdf", "to excel", "to jpg", "to png", "to mp3", "to mp4",
 ]
 
-# 需求词（可以做，这些是问题/痛点）
-NEED_INDICATORS = {
-    # 痛点信号（强）
-    "pain_strong": [
-        "struggling with", "how to fix", "how to solve", "error", "not working",
-        "cannot", "can't", "doesn't work", "failed", "issue", "problem",
-        "help", "urgent", "asap", "quickly", "fast", "instant",
-        "stuck", "confused", "lost", "frustrated", "annoying",
-        # 中文
-        "怎么办", "求助", "急", "救命", "崩溃", "蛋疼", "烦死了"
-    ],
-    # 痛点信号（中）
-    "pain_medium": [
-        "difficult", "hard", "complicated", "confusing", "complex",
-        "tired of", "sick of", "fed up", "waste time", "manual",
-        "boring", "repetitive", "tedious", "slow",
-        # 中文
-        "麻烦", "难", "复杂", "太慢", "太累"
-    ],
-    # 需求信号
-    "need": [
-        "need", "want", "looking for", "searching for", "wish",
-        "trying to", "need to", "have to", "must", "should",
-        "anyone know", "does anyone", "suggestion", "recommendation",
-        # 中文
-        "需要", "想要", "求推荐", "应该怎么"
-    ],
-    # 对比/选择信号
-    "compare": [
-        "vs", "versus", "better than", "alternative", "instead of",
-        "compare", "difference between", "pros and cons", "which one",
-        "which is better", "should i use", "or", "either",
-        # 中文
-        "哪个好", "区别", "对比", "还是", "推荐"
-    ],
-    # DIY/教程信号
-    "howto": [
-        "how to", "how do i", "how can i", "how does", "how make",
-        "tutorial", "guide", "step by step", "instructions",
-        "tips", "tricks", "secrets", "hacks", "strategies",
-        # 中文
-        "如何", "怎么", "教程", "指南", "技巧"
-    ],
-    # 优化/改进信号
-    "improve": [
-        "improve", "optimize", "enhance", "better", "upgrade",
-        "increase", "boost", "maximize", "efficient", "automate",
-        # 中文
-        "优化", "改进", "提升", "自动化"
-    ]
+# 需求词（可以做，这些是问题/痛点）：词表在 config.NEED_INDICATORS，
+# 分值在 config.SCORING_MODELS['need']，由 scoring_engine 统一编译
+NEED_TYPE_LABELS = {
+    "pain_strong": "强痛点",
+    "pain_medium": "中痛点",
+    "need": "需求",
+    "compare": "对比选择",
+    "howto": "教程",
+    "improve": "优化",
 }
 
 # ============ 核心功能 ============
@@ -172,54 +136,15 @@ def analyze_need_type(keyword):
     """分析需求类型"""
     keyword_lower = keyword.lower()
     
-    need_type = []
-    need_strength = 0
-    
-    # 强痛点
-    for signal in NEED_INDICATORS["pain_strong"]:
-        if signal in keyword_lower:
-            need_type.append("强痛点")
-            need_strength += 40
-            break
-    
-    # 中痛点
-    for signal in NEED_INDICATORS["pain_medium"]:
-        if signal in keyword_lower:
-            need_type.append("中痛点")
-            need_strength += 25
-            break
-    
-    # 需求信号
-    for signal in NEED_INDICATORS["need"]:
-        if signal in keyword_lower:
-            need_type.append("需求")
-            need_strength += 20
-            break
-    
-    # 对比信号
-    for signal in NEED_INDICATORS["compare"]:
-        if signal in keyword_lower:
-            need_type.append("对比选择")
-            need_strength += 15
-            break
-    
-    # 教程信号
-    for signal in NEED_INDICATORS["howto"]:
-        if signal in keyword_lower:
-            need_type.append("教程")
-            need_strength += 10
-            break
+    engine = get_engine()
+    match = engine.match(keyword_lower)
     
-    # 优化信号
-    for signal in NEED_INDICATORS["improve"]:
-        if signal in keyword_lower:
-            need_type.append("优化")
-            need_strength += 15
-            break
+    # 强痛点 / 中痛点 / 需求 / 对比 / 教程 / 优化，每类命中一次加分
+    need_type = [NEED_TYPE_LABELS[rule] for rule in engine.fired(match, "need")]
     
     return {
         "types": need_type if need_type else ["通用"],
-        "strength": min(need_strength, 100),
+        "strength": engine.score(match, "need"),
         "is_real_need": len(need_type) > 0
     }
 
@@ -329,30 +254,24 @@ def alphabet_soup_mining(keyword, prefix_letters="abcdefghijklmnopqrstuvwxyz"):
 
 def google_trends_rising(seed_words):
     """Google Trends 飙升词挖掘"""
-    pytrends = TrendReq(hl='en-US', tz=360)
+    trends = get_trends_service()  # 共享会话，节流与去重由服务负责
     rising_data = []
     
     for word in seed_words[:8]:  # 限制数量
         try:
-            pytrends.build_payload([word], timeframe='now 7-d')
-            related = pytrends.related_queries()
-            
-            if word in related and related[word]:
-                rising = related[word].get('rising')
-                if rising is not None and not rising.empty:
-                    for _, row in rising.head(5).iterrows():
-                        value = row['value'] if isinstance(row['value'], (int, float)) else 0
-                        if value > 0:
-                            keyword = row['query']
-                            # 过滤：必须是真实需求
-                            if not is_product_keyword(keyword):
-                                rising_data.append({
-                                    "keyword": keyword,
-                                    "growth": value,
-                                    "source": word
-                                })
-            
-            time.sleep(2)
+            rising = trends.rising_queries(word, 'now 7-d')
+            if rising is not None:
+                for _, row in rising.head(5).iterrows():
+                    value = row['value'] if isinstance(row['value'], (int, float)) else 0
+                    if value > 0:
+                        keyword = row['query']
+                        # 过滤：必须是真实需求
+                        if not is_product_keyword(keyword):
+                            rising_data.append({
+                                "keyword": keyword,
+                                "growth": value,
+                                "source": word
+                            })
         except:
             continue
     
@@ -363,9 +282,10 @@ def gpts_contrast(keywords):
     results = []
     
     for kw in keywords:
-        # 模拟逻辑
-        gpts_count = random.randint(10, 100)
-        growth = random.uniform(-10, 50)
+        # 模拟逻辑（按关键词确定性生成）
+        rng = keyword_rng(kw, "gpts")
+        gpts_count = rng.randint(10, 100)
+        growth = rng.uniform(-10, 50)
         
         # 计算与GPTs的比率
         gpts_avg = 50  # 假设GPTs平均热度
@@ -401,7 +321,7 @@ def serp_competition_check(keywords):
     
     for kw in keywords:
         # 模拟SERP分析
-        top_domains = random.choices(
+        top_domains = keyword_rng(kw, "serp").choices(
             weak_competitors + giants + ['other.com'],
             k=3
         )
@@ -431,13 +351,7 @@ def serp_competition_check(keywords):
 
 def calculate_need_score(keyword, need_analysis, ai_feasibility, gpts_data, serp_data):
     """计算需求评分"""
-    # 需求强度（40%）
-    need_score = need_analysis["strength"] * 0.4
-    
-    # AI可行性（25%）
-    ai_score = ai_feasibility["score"] * 0.25
-    
-    # 热度对比（20%）
+    # 热度对比
     ratio = gpts_data.get("ratio", 0)
     if ratio >= THRESHOLDS["MIN_GPTS_RATIO"] and ratio <= THRESHOLDS["MAX_GPTS_RATIO"]:
         hot_score = 80
@@ -445,12 +359,14 @@ def calculate_need_score(keyword, need_analysis, ai_feasibility, gpts_data, serp
         hot_score = 60  # 太热门，竞争大
     else:
         hot_score = 40  # 太冷门
-    hot_score *= 0.2
-    
-    # 竞争度（15%）
-    comp_score = serp_data.get("score", 50) * 0.15
     
-    total = need_score + ai_score + hot_score + comp_score
+    # 需求强度 40% / AI可行性 25% / 热度 20% / 竞争度 15%（config.SCORE_WEIGHTS['need']）
+    total = get_engine().combine("need", {
+        "need": need_analysis["strength"],
+        "ai": ai_feasibility["score"],
+        "hot": hot_score,
+        "competition": serp_data.get("score", 50),
+    })
     
     return round(total, 1)
 
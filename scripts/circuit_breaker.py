@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+按数据源熔断 - 挂掉的平台不再每次都吃满超时
+==========================================
+
+run_super_hunter 里 TikTok / 小红书几乎每次都失败（返回 HTML 页面、登录墙），
+但每个种子词仍要等满 10 秒超时，失败又被裸 except 吞掉；被限流时 Reddit、Amazon、
+深度搜索的抓取也一样。一个坏掉的平台会给每次运行多加好几分钟。
+
+每个数据源一个熔断器：
+- CLOSED：正常请求；连续失败达到阈值 → OPEN
+- 识别到封锁特征（429 / 403、验证码、登录墙、该返回 JSON 却返回 HTML）直接 OPEN，重试也没用
+- OPEN：冷却期内直接跳过，不发请求
+- HALF_OPEN：冷却期过后只放行一个探测请求；成功 → CLOSED，失败 → 重新 OPEN，冷却期翻倍（有上限）
+
+熔断状态存到 data/circuit_breakers.json，跨运行生效（定时任务每次运行不必重新试错），
+run_super_hunter / run_pipeline 结束时把各数据源状态写进运行统计。
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from config import CIRCUIT_COOLDOWN, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_MAX_COOLDOWN, DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BLOCK_STATUS = {401, 403, 429}
+CAPTCHA_MARKERS = ("captcha", "unusual traffic", "verify you are human", "/sorry/index")
+LOGIN_MARKERS = ("/login", "/signin", "/sign-in", "accounts.google.com")
+
+
+class SourceError(Exception):
+    """数据源返回了不可用的结果（计入连续失败）"""
+
+
+class SourceBlocked(SourceError):
+    """识别到封锁特征（立即熔断）"""
+
+
+def check_response(response, expect_json: bool = True):
+    """
+    检查响应是否可用，不可用时抛 SourceBlocked / SourceError
+
+    expect_json=True 时返回 HTML（登录页 / 验证码页）视为封锁
+    """
+    status = getattr(response, "status_code", 200)
+    if status in BLOCK_STATUS:
+        raise SourceBlocked(f"HTTP {status}")
+    url = str(getattr(response, "url", "") or "").lower()
+    if any(marker in url for marker in LOGIN_MARKERS + CAPTCHA_MARKERS):
+        raise SourceBlocked(f"重定向到 {url[:80]}")
+    if status != 200:
+        raise SourceError(f"HTTP {status}")
+
+    content_type = (getattr(response, "headers", None) or {}).get("Content-Type", "").lower()
+    head = (response.text or "")[:2048]
+    if expect_json and ("html" in content_type or head.lstrip().startswith("<")):
+        raise SourceBlocked("返回 HTML 而不是 JSON")
+    lowered = head.lower()
+    if any(marker in lowered for marker in CAPTCHA_MARKERS):
+        raise SourceBlocked("验证码页面")
+
+
+def is_block(error: BaseException) -> bool:
+    """异常是否属于封锁特征（含 requests 的 HTTPError 429/403 和 JSON 解析失败）"""
+    if isinstance(error, SourceBlocked) or isinstance(error, json.JSONDecodeError):
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) in BLOCK_STATUS
+
+
+class CircuitBreaker:
+    """单个数据源的熔断器（线程安全）"""
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN, max_cooldown: float = CIRCUIT_MAX_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0                # 连续失败次数
+        self.cooldown = cooldown         # 当前冷却期（半开探测失败后翻倍）
+        self.opened_at = 0.0
+        self.last_error = ""
+        self._probing = False
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "blocked": 0, "skipped": 0, "opens": 0}
+
+    def allow(self) -> bool:
+        """是否放行本次请求；冷却期过后只放行一个半开探测"""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+                logger.info(f"🔌 [{self.name}] 冷却结束，半开探测")
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                self.stats["calls"] += 1
+                return True
+            self.stats["skipped"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            if self.state != CLOSED:
+                logger.info(f"🔌 [{self.name}] 探测成功，恢复")
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._probing = False
+
+    def record_failure(self, error: BaseException = None):
+        blocked = error is not None and is_block(error)
+        with self._lock:
+            self.stats["failures"] += 1
+            self.stats["blocked"] += blocked
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"[:200] if error is not None else ""
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and (blocked or self.failures >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self._probing = False
+        self.stats["opens"] += 1
+        logger.warning(f"⛔ [{self.name}] 熔断 {self.cooldown / 60:.0f} 分钟: {self.last_error}")
+
+    def call(self, fn: Callable[[], object], default=None):
+        """熔断保护下执行 fn：被跳过或失败时返回 default，fn 应在结果不可用时抛异常"""
+        if not self.allow():
+            return default
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_failure(e)
+            logger.debug(f"[{self.name}] 失败: {e}")
+            return default
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            remaining = max(0.0, self.opened_at + self.cooldown - time.time()) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "cooldown": self.cooldown,
+                "opened_at": self.opened_at,
+                "reopens_in": round(remaining),
+                "last_error": self.last_error,
+                **self.stats,
+            }
+
+    def restore(self, saved: Dict):
+        """从上次运行保存的状态恢复（只恢复熔断相关字段，统计从零开始）"""
+        with self._lock:
+            self.state = saved.get("state", CLOSED)
+            if self.state == HALF_OPEN:       # 上次进程在探测中途退出，按 OPEN 处理，冷却期到了再探测
+                self.state = OPEN
+            self.failures = saved.get("consecutive_failures", 0)
+            self.cooldown = saved.get("cooldown", self.base_cooldown)
+            self.opened_at = saved.get("opened_at", 0.0)
+            self.last_error = saved.get("last_error", "")
+
+
+class BreakerRegistry:
+    """所有数据源的熔断器；状态持久化到 JSON，跨运行生效"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else Path(DATA_DIR) / "circuit_breakers.json"
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._saved: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                self._saved = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 熔断状态读取失败，重新开始: {e}")
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name)
+                if name in self._saved:
+                    breaker.restore(self._saved[name])
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+    def save(self):
+        snapshot = self.snapshot()
+        with self._lock:
+            self._saved.update(snapshot)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._saved, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def lines(self):
+        """各数据源状态的可读摘要（每个数据源一行）"""
+        for name, state in sorted(self.snapshot().items()):
+            icon = {CLOSED: "🟢", HALF_OPEN: "🟡", OPEN: "🔴"}[state["state"]]
+            line = (f"   {icon} {name}: {state['state']} | 成功 {state['successes']} / 失败 {state['failures']}"
+                    f" / 跳过 {state['skipped']}")
+            if state["state"] == OPEN:
+                line += f" | {state['reopens_in'] // 60} 分钟后探测 ({state['last_error']})"
+            yield line
+
+    def report(self) -> Dict[str, Dict]:
+        """把本次运行各数据源状态写进运行日志，保存并返回快照"""
+        logger.info("🔌 数据源状态:")
+        for line in self.lines():
+            logger.info(line)
+        self.save()
+        return self.snapshot()
+
+
+_registry: Optional[BreakerRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> BreakerRegistry:
+    """进程内共享的熔断器注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = BreakerRegistry()
+        return _registry
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return get_registry().get(name)
@@ -12,11 +12,59 @@ Profit Hunter Ultimate V4 - 需求真伪识别 + 商业价值判断
 """
 
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Set, Tuple
 import re
 
 # ============ 配置区 ============
 
+# 数据目录（种子词、结果 CSV、各类本地存储）
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# 挖词去重的内存预算（条），超出后排好序溢写到临时文件，最后归并去重
+HARVEST_MEMORY_ITEMS = 200_000
+
+# 合成数据 / 模拟数据的全局种子（同一种子 + 同一关键词 = 同一结果）
+SYNTHETIC_SEED = 42
+
+# 多市场运行（--locales 未指定时使用）：语言-地区，如 en-US / en-GB / de-DE / zh-CN
+LOCALES = ["en-US"]
+# 多市场补全结果在共享结果库里的有效期（秒）
+LOCALE_RESULT_MAX_AGE = 6 * 3600
+# 响应缓存（data/response_cache.db）清理：每次运行结束 / 调度器每轮删掉超过这个时间（秒）没刷新的响应
+# 要比抓取层的缓存有效期（24 小时）长：过期但还在库里的响应可以带校验器发条件请求，304 时续用
+RESPONSE_CACHE_MAX_AGE = 7 * 24 * 3600
+
+# 数据源熔断：连续失败 N 次熔断（封锁特征立即熔断），冷却期（秒）内跳过，半开探测失败冷却期翻倍
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 30 * 60
+CIRCUIT_MAX_COOLDOWN = 12 * 3600
+
+# --deadline 时各阶段占整次运行时长的比例（按顺序累计：harvest 在 25% 处截止，gpts 在 30% 处……）
+# score / report 的份额是预留的，总会执行
+STAGE_BUDGET_FRACTIONS = {
+    "harvest": 0.25,
+    "gpts": 0.05,
+    "enrich": 0.55,
+    "score": 0.05,
+    "report": 0.10,
+}
+
+# Trends 飙升查询图爬取（trends_crawler）：全局去重 + 按飙升值优先展开
+TRENDS_CRAWL_MAX_DEPTH = 3          # 根 = 0 层，根的飙升查询 = 1 层
+TRENDS_CRAWL_FAN_OUT = 5            # 每个节点最多跟进飙升值最高的 N 个子查询
+TRENDS_CRAWL_MAX_REQUESTS = 5       # 每次爬取最多发起的展开请求（根节点、图里还新鲜的节点不算）
+TRENDS_CRAWL_WORKERS = 3            # 并发展开数（请求本身仍由 TrendsService 统一节流）
+TRENDS_CRAWL_DEPTH_DECAY = 0.5      # 优先级 = 飙升值 × 衰减^深度
+TRENDS_BREAKOUT_VALUE = 5000        # "Breakout"（飙升值非数字）按这个值算
+TRENDS_GRAPH_MAX_AGE = 24 * 3600    # 图里节点的展开结果有效期（秒），过期才重新请求
+
+# 运行进度事件流（events / watch_events.py）：--events 不带路径时写这个文件，也可以是 udp://127.0.0.1:9999
+EVENTS_FILE = DATA_DIR / "events.jsonl"
+EVENTS_KEEP_RUNS = 5                # 每次运行开始时轮转事件文件：上次的改名为 .1，最多保留 N 个旧文件
+EVENTS_RATE_WINDOW = 120            # 吞吐 / ETA 按最近 N 秒计算
+EVENTS_STALL_SECONDS = 300          # 阶段或数据源超过 N 秒没有新事件标记为停滞
+
 # ==================== 痛点信号词 (痛点 = 钱) ====================
 PAIN_TRIGGERS = {
     # 强烈痛点 (得分高)
@@ -37,6 +85,9 @@ PAIN_TRIGGERS = {
     ]
 }
 
+# Reddit 帖子中「寻找解决方案」的信号
+SOLUTION_SEEKING_SIGNALS = ["looking for", "need a tool", "is there a", "wish there was"]
+
 # ==================== 商业意图信号 ====================
 # Transactional 意图 (想解决问题/付费)
 TRANSACTIONAL_SIGNALS = {
@@ -74,6 +125,17 @@ GIANTS = [
     "notion.so", "airtable.com", "shopify.com", "amazon.com", "apple.com"
 ]
 
+# 工具站 (SERP 中出现说明有商业意图)
+TOOL_SITES = [
+    "smallpdf.com", "ilovepdf.com", "omnicalculator.com", "calculator.net",
+    "rapidtables.com", "convertio.co", "online-convert.com", "remove.bg"
+]
+
+# 扩展域名分类表 (domain,category 两列 CSV，可放几万条)，存在时自动加载
+DOMAIN_CATEGORIES_FILE = DATA_DIR / "domain_categories.csv"
+# Public Suffix List (可选，https://publicsuffix.org/list/public_suffix_list.dat)
+PUBLIC_SUFFIX_FILE = DATA_DIR / "public_suffix_list.dat"
+
 # ==================== GPTS 锚定基准 ====================
 # GPTS 搜索量作为基准线
 GPTS_BENCHMARK = {
@@ -83,6 +145,16 @@ GPTS_BENCHMARK = {
     "excellent_ratio": 0.50  # 50% = 极品
 }
 
+# GPT Store 快照索引（gpts_analyzer.GPTStoreIndex）：导入后 GPTs 数量按快照实际匹配数计算
+GPTS_INDEX_FILE = DATA_DIR / "gpts_index.db"
+# 匹配数按每 N 个 GPTs 归一化，快照变大时比值不漂移
+GPTS_REFERENCE_SIZE = 100_000
+# 匹配时忽略的词（修饰词 / 虚词，GPT 名称和描述里基本不写）
+GPTS_STOPWORDS = [
+    "a", "an", "the", "and", "or", "for", "to", "of", "in", "on", "with", "by", "my", "your",
+    "how", "what", "is", "are", "best", "free", "online", "app", "top", "good", "vs",
+]
+
 # ==================== 评分权重 ====================
 WEIGHTS = {
     "demand_validation": 0.25,   # 需求真伪验证
@@ -111,6 +183,270 @@ PSEO_PATTERNS = [
     ("automatic", ["tool", "generator", "workflow"])
 ]
 
+# pSEO 候选生成（pseo_generator）：模板 × 实体表惰性展开
+# 模板里的 {槽位} 取同名实体表；同一模板里同一实体表出现两次时跳过两边相同的组合（pdf to pdf）
+# 实体表可以按类别分组（dict）：同一模板里出现两次时两边必须属于同一组（不生成 aac to bmp），
+# 组之间可以有交集（pdf 既是文档也能转图片 / 表格）；只出现一次时取所有组的并集
+PSEO_ENTITIES = {
+    "file_format": {
+        "document": ["pdf", "word", "docx", "rtf", "odt", "txt", "markdown", "html", "epub", "mobi", "pptx"],
+        "data": ["pdf", "excel", "xlsx", "csv", "json", "xml", "yaml"],
+        "image": ["pdf", "jpg", "png", "webp", "heic", "gif", "svg", "tiff", "bmp", "ico"],
+        "video": ["mp4", "mov", "avi", "mkv", "webm", "gif"],
+        "audio": ["mp3", "wav", "flac", "aac", "ogg", "m4a", "mp4", "mov", "webm"],
+    },
+    "length_unit": ["mm", "cm", "meters", "km", "inches", "feet", "yards", "miles"],
+    "weight_unit": ["grams", "kg", "pounds", "ounces", "stones", "tons"],
+    "temperature_unit": ["celsius", "fahrenheit", "kelvin"],
+    "volume_unit": ["ml", "liters", "cups", "tablespoons", "teaspoons", "gallons", "quarts", "fluid ounces"],
+    "platform": [
+        "youtube", "tiktok", "instagram", "twitter", "facebook", "reddit", "pinterest",
+        "linkedin", "vimeo", "twitch", "spotify", "soundcloud", "threads", "snapchat",
+    ],
+    "media": ["video", "audio", "photos", "reels", "shorts", "stories", "thumbnails", "subtitles", "music", "gif"],
+    "content": ["text", "images", "tables", "audio", "subtitles", "metadata", "links", "pages", "fonts"],
+    "tool": ["generator", "editor", "maker", "compressor", "resizer", "analyzer", "scheduler", "checker", "converter"],
+    "modifier": ["", "free", "online", "free online", "batch", "fast", "best"],
+    "suffix": ["", "online", "free", "without losing quality", "on mac", "on iphone", "in bulk", "no signup"],
+}
+PSEO_TEMPLATES = [
+    "{modifier} {file_format} to {file_format} converter",
+    "convert {file_format} to {file_format} {suffix}",
+    "{modifier} {length_unit} to {length_unit} converter",
+    "{modifier} {weight_unit} to {weight_unit} converter",
+    "{modifier} {temperature_unit} to {temperature_unit} converter",
+    "{modifier} {volume_unit} to {volume_unit} calculator",
+    "{platform} {media} downloader {suffix}",
+    "download {media} from {platform} {suffix}",
+    "remove watermark from {platform} {media}",
+    "extract {content} from {file_format} {suffix}",
+    "{modifier} {platform} {media} {tool}",
+]
+# 进入网络补全前的本地预评分下限（enrich_queue.prescore）
+PSEO_MIN_PRESCORE = 60
+# top(n) 先按分数留 n × N 个候选，再在同分候选里轮流挑模板 / 实体用得最少的
+PSEO_DIVERSITY_POOL = 5
+# 关键词索引（keyword_index）里的同模板兄弟词数 → pSEO 加分：(兄弟词数下限, 加分, 潜力)，取第一个满足的档
+PSEO_FAMILY_TIERS = [
+    (100, 25, "high"),
+    (20, 15, "high"),
+    (5, 8, "medium"),
+]
+
+# ==================== 其它入口的信号词表 ====================
+# profit_hunter_v3 超级评分：痛点信号（增强版）
+SUPER_PAIN_SIGNALS = {
+    "urgent": [  # 紧急痛点
+        "struggling with", "how to fix", "error", "not working",
+        "cannot", "doesn't work", "failed", "help", "issue",
+        "求助", "怎么办", "急", "救命", "崩溃"
+    ],
+    "frustration": [  # 挫败感
+        "tired of", "sick of", "fed up", "annoying", "frustrating",
+        "painful", "difficult", "confusing", "complicated",
+        "麻烦", "蛋疼", "烦死了"
+    ],
+    "desire": [  # 强烈需求
+        "want", "need", "looking for", "searching for", "wish",
+        "应该有一个", "要是能", "太需要"
+    ],
+    "comparison": [  # 对比需求
+        "vs", "versus", "alternative", "better than", "compare",
+        "difference", "pros and cons", "哪个好"
+    ]
+}
+
+# profit_hunter_v3 超级评分：商业价值信号
+SUPER_COMMERCIAL_SIGNALS = {
+    "high_cpc": [  # 高 CPC 关键词
+        "insurance", "lawyer", "attorney", "loan", "mortgage",
+        "crypto", "trading", "investment", "software", "course"
+    ],
+    "ecommerce": [  # 电商需求
+        "buy", "price", "discount", "sale", "cheap", "best",
+        "评测", "推荐", "购买", "价格"
+    ],
+    "saas": [  # SaaS 需求
+        "tool", "software", "platform", "solution", "service",
+        "工具", "软件", "平台", "服务"
+    ]
+}
+
+# blue_ocean_hunter 需求词（可以做，这些是问题/痛点）
+NEED_INDICATORS = {
+    # 痛点信号（强）
+    "pain_strong": [
+        "struggling with", "how to fix", "how to solve", "error", "not working",
+        "cannot", "can't", "doesn't work", "failed", "issue", "problem",
+        "help", "urgent", "asap", "quickly", "fast", "instant",
+        "stuck", "confused", "lost", "frustrated", "annoying",
+        # 中文
+        "怎么办", "求助", "急", "救命", "崩溃", "蛋疼", "烦死了"
+    ],
+    # 痛点信号（中）
+    "pain_medium": [
+        "difficult", "hard", "complicated", "confusing", "complex",
+        "tired of", "sick of", "fed up", "waste time", "manual",
+        "boring", "repetitive", "tedious", "slow",
+        # 中文
+        "麻烦", "难", "复杂", "太慢", "太累"
+    ],
+    # 需求信号
+    "need": [
+        "need", "want", "looking for", "searching for", "wish",
+        "trying to", "need to", "have to", "must", "should",
+        "anyone know", "does anyone", "suggestion", "recommendation",
+        # 中文
+        "需要", "想要", "求推荐", "应该怎么"
+    ],
+    # 对比/选择信号
+    "compare": [
+        "vs", "versus", "better than", "alternative", "instead of",
+        "compare", "difference between", "pros and cons", "which one",
+        "which is better", "should i use", "or", "either",
+        # 中文
+        "哪个好", "区别", "对比", "还是", "推荐"
+    ],
+    # DIY/教程信号
+    "howto": [
+        "how to", "how do i", "how can i", "how does", "how make",
+        "tutorial", "guide", "step by step", "instructions",
+        "tips", "tricks", "secrets", "hacks", "strategies",
+        # 中文
+        "如何", "怎么", "教程", "指南", "技巧"
+    ],
+    # 优化/改进信号
+    "improve": [
+        "improve", "optimize", "enhance", "better", "upgrade",
+        "increase", "boost", "maximize", "efficient", "automate",
+        # 中文
+        "优化", "改进", "提升", "自动化"
+    ]
+}
+
+# 用户意图：触发词 + 用户目标（profit_hunter 的意图深挖与 HTML 报告的意图区块共用）
+USER_INTENTS = {
+    "calculate": {"goal": "计算某个数值", "keywords": ["calculator", "calc", "calculation", "compute"]},
+    "convert": {"goal": "转换单位或格式", "keywords": ["convert", "converter", "conversion", "transform"]},
+    "generate": {"goal": "自动生成内容", "keywords": ["generator", "create", "make", "generate", "build"]},
+    "check": {"goal": "验证或检查某事", "keywords": ["check", "checker", "verify", "validate", "test"]},
+    "find": {"goal": "查找信息", "keywords": ["finder", "find", "search", "lookup", "locate"]},
+    "compare": {"goal": "比较选项", "keywords": ["compare", "comparison", "vs", "versus", "alternative"]},
+    "plan": {"goal": "制定计划", "keywords": ["planner", "plan", "schedule", "organize"]},
+    "track": {"goal": "追踪数据", "keywords": ["tracker", "track", "monitor", "log"]},
+    "learn": {"goal": "学习了解", "keywords": ["learn", "tutorial", "guide", "how to", "explain"]},
+    "download": {"goal": "下载资源", "keywords": ["download", "downloads", "free"]},
+}
+
+# profit_hunter (ProfitHunterUltimate) 意图信号 / 痛点分级
+HUNTER_INTENT_SIGNALS = {
+    "calculator": ["calculator", "calc", "calculation"],
+    "generator": ["generator", "create", "make", "build", "generate"],
+    "converter": ["converter", "convert", "conversion"],
+    "checker": ["checker", "check", "verify", "validate", "test"],
+    "finder": ["finder", "find", "search", "lookup", "locate"],
+    "comparer": ["vs", "versus", "compare", "comparison", "alternative"],
+    "planner": ["planner", "plan", "schedule", "organizer"],
+    "tracker": ["tracker", "track", "monitor", "log"],
+}
+
+HUNTER_PAIN_TRIGGERS = {
+    "strong": [
+        "struggling with", "how to fix", "error", "cannot",
+        "doesn't work", "won't work", "failed", "broken"
+    ],
+    "medium": [
+        "best way to", "how to", "tips for", "guide to"
+    ],
+    "weak": [
+        "what is", "meaning of", "difference between"
+    ]
+}
+
+# ==================== 评分规则 (scoring_engine 编译) ====================
+# 所有入口的信号规则和权重都在这里调整，scoring_engine 启动时编译一次：
+#   base: 基础分；min / max: 截断区间
+#   mode: "sum" = 各规则得分累加；"tier" = 取第一条命中规则的分数，都不命中为 base
+#   rules: (规则名, 信号词表, 分值, 计分方式)
+#     计分方式 "each" = 每命中一个词加一次；"any" = 命中任意一个只加一次
+SCORING_MODELS = {
+    # ---- KeywordScorer ----
+    "demand": {"base": 50, "min": 0, "max": 100, "rules": [
+        ("tool", TRANSACTIONAL_SIGNALS["tool"], 0, "each"),
+        ("solve", TRANSACTIONAL_SIGNALS["solve"], 0, "each"),
+        ("critical", PAIN_TRIGGERS["critical"], 3, "each"),
+        ("medium", PAIN_TRIGGERS["medium"], 2, "each"),
+        ("info", INFO_SIGNALS, -5, "each"),
+    ]},
+    "monetization": {"base": 50, "max": 100, "rules": [
+        ("b2b", TRANSACTIONAL_SIGNALS["b2b"], 20, "each"),
+        ("tool", TRANSACTIONAL_SIGNALS["tool"], 15, "each"),
+        ("solve", TRANSACTIONAL_SIGNALS["solve"], 10, "each"),
+        ("free", ["free"], 5, "any"),
+        ("online", ["online"], 5, "any"),
+    ]},
+    "pain": {"base": 50, "max": 100, "rules": [
+        ("critical", PAIN_TRIGGERS["critical"], 20, "each"),
+        ("medium", PAIN_TRIGGERS["medium"], 10, "each"),
+        ("fix", PAIN_TRIGGERS["fix"], 5, "each"),
+    ]},
+    "pseo": {"base": 50, "max": 100, "rules": [
+        ("pattern", [base for base, _ in PSEO_PATTERNS], 15, "each"),
+        ("x_to_y", [" to ", " from "], 20, "any"),
+    ]},
+    # ---- profit_hunter_v3 ----
+    "super_pain": {"base": 50, "max": 100, "rules": [
+        ("urgent", SUPER_PAIN_SIGNALS["urgent"], 30, "any"),
+        ("frustration", SUPER_PAIN_SIGNALS["frustration"], 25, "any"),
+        ("desire", SUPER_PAIN_SIGNALS["desire"], 20, "any"),
+        ("comparison", SUPER_PAIN_SIGNALS["comparison"], 15, "any"),
+    ]},
+    "super_commercial": {"base": 50, "max": 100, "rules": [
+        ("high_cpc", SUPER_COMMERCIAL_SIGNALS["high_cpc"], 25, "any"),
+        ("ecommerce", SUPER_COMMERCIAL_SIGNALS["ecommerce"], 20, "any"),
+        ("saas", SUPER_COMMERCIAL_SIGNALS["saas"], 15, "any"),
+    ]},
+    "super_build": {"mode": "tier", "base": 70, "rules": [
+        ("tool", ["calculator", "generator", "converter", "tool"], 100, "any"),
+        ("online", ["online", "free"], 85, "any"),
+    ]},
+    # ---- blue_ocean_hunter ----
+    "need": {"base": 0, "max": 100, "rules": [
+        ("pain_strong", NEED_INDICATORS["pain_strong"], 40, "any"),
+        ("pain_medium", NEED_INDICATORS["pain_medium"], 25, "any"),
+        ("need", NEED_INDICATORS["need"], 20, "any"),
+        ("compare", NEED_INDICATORS["compare"], 15, "any"),
+        ("howto", NEED_INDICATORS["howto"], 10, "any"),
+        ("improve", NEED_INDICATORS["improve"], 15, "any"),
+    ]},
+    # ---- ProfitHunterUltimate ----
+    "hunter_intent": {"base": 70, "rules": [
+        (name, signals, {"calculator": 30, "generator": 30, "converter": 30,
+                         "checker": 25, "finder": 25, "comparer": 20}.get(name, 0), "any")
+        for name, signals in HUNTER_INTENT_SIGNALS.items()
+    ] + [
+        ("pain_" + level, triggers, 40 if level == "strong" else 20, "any")
+        for level, triggers in HUNTER_PAIN_TRIGGERS.items()
+    ]},
+    "hunter_build": {"mode": "tier", "base": 70, "rules": [
+        ("tool", ["calculator", "generator", "converter"], 100, "any"),
+        ("online", ["online", "free"], 85, "any"),
+    ]},
+}
+
+# 各入口的维度加权（顺序即求和顺序）
+SCORE_WEIGHTS = {
+    "keyword": [("demand_validation", WEIGHTS["demand_validation"]),
+                ("monetization", WEIGHTS["monetization"]),
+                ("pain_score", WEIGHTS["pain_score"]),
+                ("competition", WEIGHTS["competition"]),
+                ("trend", WEIGHTS["trend"])],
+    "super": [("trend", 0.15), ("gpts", 0.20), ("pain", 0.25), ("commercial", 0.15),
+              ("competition", 0.15), ("build", 0.05), ("length", 0.05)],
+    "need": [("need", 0.4), ("ai", 0.25), ("hot", 0.2), ("competition", 0.15)],
+    "hunter": [("trend", 0.25), ("intent", 0.35), ("competition", 0.25), ("build", 0.15)],
+}
+
 # ==================== 变现建议 ====================
 MONETIZATION_TYPES = {
     "b2b": ["API服务", "企业订阅", "团队版", "导出收费"],
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+运行截止时间 + 分阶段时间预算
+============================
+
+smooth_scheduler 号称「每次 1 小时深度分析」，但没有任何东西保证这一点：
+Trends / SERP 一慢，整次运行就拖进下一个时间段。
+
+RunDeadline 给整次运行一个截止时间，按 STAGE_BUDGET_FRACTIONS 切给各阶段。
+阶段截止时间按累计比例计算（harvest 在 25% 处截止，gpts 在 30% 处……），
+前面阶段省下的时间自动留给后面；评分 / 报告的份额是预留的，它们总会执行。
+
+各阶段在派发新工作前检查 expired()，到点就停止并把已有的部分结果交给下游，
+所以运行时长可预期，且每次都能拿到报告。
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import STAGE_BUDGET_FRACTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class StageDeadline:
+    """单个阶段的截止时间（ends_at 为 None 表示不限）"""
+
+    def __init__(self, name: str, ends_at: Optional[float] = None, run: "RunDeadline" = None):
+        self.name = name
+        self.ends_at = ends_at
+        self.run = run
+        self.started = time.time()
+        self.cut_short = False
+
+    def remaining(self) -> Optional[float]:
+        if self.ends_at is None:
+            return None
+        return max(0.0, self.ends_at - time.time())
+
+    def expired(self) -> bool:
+        """时间预算是否用完；第一次用完时记录日志，阶段被标记为提前结束"""
+        if self.ends_at is None or time.time() < self.ends_at:
+            return False
+        if not self.cut_short:
+            self.cut_short = True
+            logger.info(f"   ⏰ [{self.name}] 时间预算用完（{time.time() - self.started:.0f} 秒），停止派发，交出部分结果")
+            if self.run is not None:
+                self.run.cut.append(self.name)
+        return True
+
+
+class RunDeadline:
+    """整次运行的截止时间；seconds 为 None 时各阶段都不限时"""
+
+    def __init__(self, seconds: float = None, fractions: Dict[str, float] = None):
+        self.seconds = seconds
+        self.fractions = fractions or STAGE_BUDGET_FRACTIONS
+        self.started = time.time()
+        self.cut: List[str] = []  # 因时间预算提前结束的阶段
+
+    @classmethod
+    def from_minutes(cls, minutes: float = None) -> "RunDeadline":
+        return cls(minutes * 60 if minutes else None)
+
+    def remaining(self) -> Optional[float]:
+        if self.seconds is None:
+            return None
+        return max(0.0, self.started + self.seconds - time.time())
+
+    def stage(self, name: str) -> StageDeadline:
+        """name 阶段的截止时间：运行开始 + 总时长 × 截至该阶段的累计比例"""
+        if self.seconds is None:
+            return StageDeadline(name, run=self)
+        if name not in self.fractions:
+            return StageDeadline(name, self.started + self.seconds, run=self)
+        cumulative = 0.0
+        for stage, fraction in self.fractions.items():
+            cumulative += fraction
+            if stage == name:
+                break
+        return StageDeadline(name, self.started + self.seconds * min(cumulative, 1.0), run=self)
+
+    def summary(self):
+        if self.seconds is None:
+            return
+        elapsed = time.time() - self.started
+        status = f"提前结束的阶段: {', '.join(self.cut)}" if self.cut else "各阶段均在预算内完成"
+        logger.info(f"⏰ 运行耗时 {elapsed / 60:.1f} / {self.seconds / 60:.0f} 分钟，{status}")
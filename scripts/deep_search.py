@@ -15,8 +15,16 @@ import aiohttp
 import re
 import requests
 import logging
+import time
 from typing import Dict, List
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urlencode
+
+from circuit_breaker import SourceError, get_breaker
+from config import *
+from domain_index import GIANT, TOOL, WEAK, default_index
+from events import get_events
+from reddit_store import get_reddit_ingestor
+from serp_parser import fetch_organic_results
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +32,11 @@ logger = logging.getLogger(__name__)
 class DeepSearchAnalyzerV4:
     """深度搜索分析器 V4 - 需求验证版"""
     
-    def __init__(self):
+    def __init__(self, locale=None):
+        self.locale = locale  # locales.Locale；None 时沿用 Google 默认（英文 / 美国）
         # 痛点信号词
         self.pain_keywords = PAIN_TRIGGERS['critical'] + PAIN_TRIGGERS['medium']
+        self.reddit = get_reddit_ingestor()
         
         # 需求信号词
         self.demand_signals = TRANSACTIONAL_SIGNALS
@@ -109,8 +119,9 @@ class DeepSearchAnalyzerV4:
         # Q5: 竞争分析
         if google_data:
             competitors = google_data.get('competitors', [])
-            has_giant = any(c in GIANTS for c in competitors)
-            has_weak = any(c in WEAK_COMPETITORS for c in competitors)
+            summary = default_index().summarize(competitors)
+            has_giant = summary.get(GIANT, 0) > 0
+            has_weak = summary.get(WEAK, 0) > 0
             
             if has_giant:
                 answers['Q5'] = f"巨头存在: {competitors[:2]}"
@@ -136,63 +147,8 @@ class DeepSearchAnalyzerV4:
         }
     
     def search_reddit_real(self, keyword: str) -> Dict:
-        """真实搜索 Reddit 痛点讨论"""
-        results = {
-            'total_mentions': 0,
-            'pain_posts': [],
-            'sentiment': 'neutral',
-            'solution_seeking': 0
-        }
-        
-        try:
-            url = f"https://www.reddit.com/search.json?q={quote_plus(keyword)}&limit=20&sort=relevance"
-            headers = {"User-Agent": "Mozilla/5.0"}
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            posts = data.get("data", {}).get("children", [])
-            results['total_mentions'] = len(posts)
-            
-            pain_posts = []
-            solution_seeking = 0
-            
-            for post in posts:
-                post_data = post.get("data", {})
-                title = post_data.get("title", "").lower()
-                selftext = post_data.get("selftext", "").lower()
-                combined = title + " " + selftext
-                
-                # 痛点检测
-                for pain in self.pain_keywords:
-                    if pain in combined:
-                        pain_posts.append({
-                            'title': post_data.get("title", ""),
-                            'score': post_data.get("score", 0),
-                            'comments': post_data.get("num_comments", 0)
-                        })
-                        break
-                
-                # 解决方案寻求
-                for signal in ['looking for', 'need a tool', 'is there a', 'wish there was']:
-                    if signal in combined:
-                        solution_seeking += 1
-                        break
-            
-            results['pain_posts'] = pain_posts[:5]
-            results['solution_seeking'] = solution_seeking
-            
-            # 情感分析
-            if len(pain_posts) > 3:
-                results['sentiment'] = 'negative'  # 大量痛点
-            elif solution_seeking > 2:
-                results['sentiment'] = 'seeking'  # 寻求解决方案
-            
-        except Exception as e:
-            logger.debug(f"Reddit search error for '{keyword}': {e}")
-        
-        return results
+        """Reddit 痛点讨论：增量采集到本地帖子库，特征从库中查询"""
+        return self.reddit.features(keyword)
     
     def analyze_google_serp(self, keyword: str) -> Dict:
         """分析 Google SERP 竞争环境"""
@@ -203,40 +159,38 @@ class DeepSearchAnalyzerV4:
             'commercial_intent': 0
         }
         
+        breaker = get_breaker("google_serp")
+        if not breaker.allow():  # 被 Google 封锁期间不再每个词等满超时
+            return results
+        
         try:
             url = f"https://www.google.com/search?q={quote_plus(keyword)}&num=10"
+            if self.locale:
+                url += "&" + urlencode(self.locale.params())
             headers = {"User-Agent": "Mozilla/5.0"}
             
-            response = requests.get(url, headers=headers, timeout=15)
-            html = response.text
-            
-            # 提取域名
-            domains = re.findall(r'https?://([^/]+)', html)
-            unique_domains = []
-            for d in domains:
-                d = d.replace('www.', '')
-                if d not in unique_domains and len(d) < 50:
-                    unique_domains.append(d)
+            # 流式解析自然结果，找够前 10 条即停止下载
+            organic = fetch_organic_results(requests, url, top_n=10, headers=headers, timeout=15)
+            if not organic:
+                raise SourceError("SERP 没有自然结果（验证码页 / 解析失效）")
+            index = default_index()
+            # 按可注册域名归并（en.wikipedia.org / wikipedia.org 算同一个竞争者）
+            unique_domains = list(dict.fromkeys(index.registrable(r['domain']) for r in organic))
+            categories = index.classify_batch(r['domain'] for r in organic)
             
+            results['organic'] = organic
             results['competitors'] = unique_domains[:5]
+            results['has_giant'] = GIANT in categories.values()
+            results['has_weak'] = WEAK in categories.values()
             
-            # 检测巨头
-            for domain in unique_domains:
-                if any(g in domain for g in GIANTS):
-                    results['has_giant'] = True
-                    break
-            
-            # 检测弱竞争者
-            for domain in unique_domains:
-                if any(w in domain for w in WEAK_COMPETITORS):
-                    results['has_weak'] = True
-                    break
-            
-            # 商业意图
-            tool_count = sum(1 for d in unique_domains for t in ['tool', 'app', 'software'] if t in d)
+            # 商业意图：已知工具站 + 域名里带工具词的站
+            tool_count = sum(1 for d in unique_domains
+                             if index.classify(d) == TOOL or any(t in d for t in ('tool', 'app', 'software')))
             results['commercial_intent'] = min(100, tool_count * 20)
+            breaker.record_success()
             
         except Exception as e:
+            breaker.record_failure(e)
             logger.debug(f"Google SERP error for '{keyword}': {e}")
         
         return results
@@ -340,8 +294,11 @@ class DeepSearchAnalyzerV4:
         results = {}
         
         logger.info(f"🎯 开始深度分析 {len(keywords)} 个关键词...")
+        events = get_events()
+        events.total(len(keywords), stage="deep_search")
         
         for i, keyword in enumerate(keywords, 1):
+            started = time.perf_counter()
             try:
                 analysis = self.analyze_keyword(keyword)
                 results[keyword] = analysis
@@ -349,10 +306,13 @@ class DeepSearchAnalyzerV4:
                 status = "✅" if analysis['is_valid_transactional'] else "⚠️"
                 demand = analysis['demand_strength']
                 logger.info(f"   {i}/{len(keywords)} {keyword}: {demand} {status}")
+                events.item(keyword, stage="deep_search", seconds=round(time.perf_counter() - started, 3))
                 
             except Exception as e:
                 logger.error(f"分析失败 '{keyword}': {e}")
                 results[keyword] = {"keyword": keyword, "error": str(e)}
+                events.item(keyword, ok=False, stage="deep_search")
+                events.error(e, stage="deep_search", key=keyword)
         
         logger.info(f"✅ 完成 {len(results)} 个关键词深度分析")
         return results
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+域名分类索引 - 巨头 / 弱竞争者 / 工具站
+========================================
+
+以前的竞争检测是 any(g in d for d in top_domains for g in GIANTS) 这种子串双重循环：
+列表一长就是平方复杂度，而且 "notgoogle.com" 也会被当成 google.com。
+
+这里按主机名的各级后缀（docs.google.com → google.com）查一张 域名 → 类别 的哈希表，
+每个主机只查几次，与分类表大小无关，分类表可以从 CSV 加载几万条；
+竞争者列表则按可注册域名（eTLD+1，如 bbc.co.uk）归并。
+"""
+
+import csv
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+
+from config import (DOMAIN_CATEGORIES_FILE, GIANTS, PUBLIC_SUFFIX_FILE,
+                    TOOL_SITES, WEAK_COMPETITORS)
+
+logger = logging.getLogger(__name__)
+
+# 类别
+GIANT = "giant"
+WEAK = "weak"
+TOOL = "tool"
+
+# 常见的多级公共后缀（没有 Public Suffix List 文件时使用）
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.jp", "ne.jp", "or.jp", "co.nz", "org.nz", "co.in", "net.in", "org.in",
+    "co.kr", "or.kr", "co.za", "com.br", "com.mx", "com.ar", "com.tr",
+    "com.cn", "net.cn", "org.cn", "com.hk", "com.tw", "com.sg", "com.my",
+    "github.io", "gitlab.io", "blogspot.com", "wordpress.com", "herokuapp.com",
+    "netlify.app", "vercel.app", "pages.dev", "web.app", "firebaseapp.com",
+}
+
+MAX_CACHE = 100_000
+
+
+def normalize_host(host: str) -> str:
+    """URL 或主机名 → 小写主机名（去端口、末尾点）"""
+    host = (host or "").strip().lower()
+    if "://" in host:
+        host = urlparse(host).hostname or ""
+    return host.split("/")[0].split(":")[0].rstrip(".")
+
+
+def load_public_suffixes(path) -> Set[str]:
+    """读取 Public Suffix List，只保留多级后缀（单级后缀按默认规则处理）"""
+    suffixes = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            rule = line.strip()
+            if not rule or rule.startswith("//"):
+                continue
+            rule = rule.lstrip("!").replace("*.", "")
+            if "." in rule:
+                suffixes.add(rule)
+    return suffixes
+
+
+def registrable_domain(host: str, suffixes: Set[str] = None) -> str:
+    """可注册域名 (eTLD+1)：取匹配到的最长公共后缀再加一级"""
+    host = normalize_host(host)
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    suffixes = MULTI_LABEL_SUFFIXES if suffixes is None else suffixes
+    for i in range(1, len(labels) - 1):  # 从最长的候选后缀开始
+        if ".".join(labels[i:]) in suffixes:
+            return ".".join(labels[i - 1:])
+    return ".".join(labels[-2:])
+
+
+class DomainIndex:
+    """域名 → 类别 哈希索引"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]] = None, suffixes: Set[str] = None):
+        self.suffixes = suffixes if suffixes is not None else MULTI_LABEL_SUFFIXES
+        self._map: Dict[str, str] = {}
+        self._cache: Dict[str, Optional[str]] = {}
+        for category, domains in (categories or {}).items():
+            self.add(domains, category)
+
+    def __len__(self):
+        return len(self._map)
+
+    def add(self, domains: Iterable[str], category: str):
+        """登记一批域名（后登记的覆盖先登记的）"""
+        for domain in domains:
+            domain = normalize_host(domain)
+            if domain:
+                self._map[domain[4:] if domain.startswith("www.") else domain] = category
+        self._cache.clear()
+
+    def load_csv(self, path) -> int:
+        """从 domain,category 两列 CSV 加载，返回条数"""
+        count = 0
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or row[0].startswith("#") or row[0] == "domain":
+                    continue
+                self.add([row[0]], row[1].strip())
+                count += 1
+        return count
+
+    def classify(self, host: str) -> Optional[str]:
+        """
+        主机所属类别，未登记返回 None
+
+        从完整主机名逐级去掉左侧标签查表（最多到二级），
+        所以 support.google.com 可以单独登记，否则命中 google.com；
+        foo.wordpress.com 这类托管子站也能命中平台本身。
+        """
+        host = normalize_host(host)
+        if host in self._cache:
+            return self._cache[host]
+
+        category = None
+        candidate = host
+        while candidate.count(".") >= 1:
+            category = self._map.get(candidate)
+            if category is not None:
+                break
+            candidate = candidate.split(".", 1)[1]
+
+        if len(self._cache) >= MAX_CACHE:
+            self._cache.clear()
+        self._cache[host] = category
+        return category
+
+    def registrable(self, host: str) -> str:
+        """按本索引的后缀表归约到可注册域名"""
+        return registrable_domain(host, self.suffixes)
+
+    def classify_batch(self, hosts: Iterable[str]) -> Dict[str, Optional[str]]:
+        """批量分类（一整批 SERP 的域名），重复主机只查一次"""
+        return {host: self.classify(host) for host in dict.fromkeys(hosts)}
+
+    def summarize(self, hosts: Iterable[str]) -> Dict[str, int]:
+        """各类别出现次数，如 {'giant': 1, 'weak': 2}"""
+        return dict(Counter(c for c in map(self.classify, hosts) if c is not None))
+
+    def has(self, hosts: Iterable[str], category: str) -> bool:
+        return any(self.classify(host) == category for host in hosts)
+
+
+_default_index: Optional[DomainIndex] = None
+
+
+def default_index() -> DomainIndex:
+    """config 中的 GIANTS / WEAK_COMPETITORS / TOOL_SITES + 可选的扩展表（进程内共享）"""
+    global _default_index
+    if _default_index is None:
+        suffixes = None
+        if Path(PUBLIC_SUFFIX_FILE).exists():
+            suffixes = MULTI_LABEL_SUFFIXES | load_public_suffixes(PUBLIC_SUFFIX_FILE)
+        index = DomainIndex({TOOL: TOOL_SITES, WEAK: WEAK_COMPETITORS, GIANT: GIANTS}, suffixes)
+        if Path(DOMAIN_CATEGORIES_FILE).exists():
+            count = index.load_csv(DOMAIN_CATEGORIES_FILE)
+            logger.info(f"📚 加载域名分类表: {count} 条")
+        _default_index = index
+    return _default_index
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+最优先补全队列 - 按本地预评分分配昂贵的网络查询
+================================================
+
+Trends / Playwright SERP / Reddit 都有限频，之前只是对候选集合随便截取前 N 个。
+现在先用 KeywordScorer 的本地信号（需求验证、商业价值、痛点、pSEO）算一个
+零成本的预评分，再按预期价值从高到低依次补全，直到请求数或时间预算用完。
+"""
+
+import heapq
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import TRENDS_CRAWL_MAX_REQUESTS
+from events import get_events
+from scorer import KeywordScorer
+
+logger = logging.getLogger(__name__)
+
+# 预评分权重：前三项沿用最终评分权重，pSEO 作为同分时的加成
+PRESCORE_WEIGHTS = {
+    "demand": "demand_validation",
+    "monetization": "monetization",
+    "pain": "pain_score",
+}
+PSEO_BONUS_WEIGHT = 0.05
+
+Stage = Tuple[str, Callable[[str], Optional[Dict]], int]
+
+
+def prescore(scorer: KeywordScorer, keyword: str) -> float:
+    """本地预评分：只用关键词本身的信号（不发网络请求）"""
+    scores = scorer.local_scores(keyword)
+    weights = scorer.weights
+    total_weight = sum(weights[w] for w in PRESCORE_WEIGHTS.values())
+    score = sum(
+        scores[name] * weights[weight]
+        for name, weight in PRESCORE_WEIGHTS.items()
+    ) / total_weight
+    return round(score + scores['pseo'] * PSEO_BONUS_WEIGHT, 2)
+
+
+def build_stages(trends: bool = False, serp: bool = False, deep: bool = False,
+                 locale=None) -> List[Stage]:
+    """
+    按开关构建补全阶段 [(名称, keyword -> 结果, 单次请求成本)]，依赖按需导入
+
+    locale (locales.Locale) 指定市场时，Trends 用该市场的 hl / geo，深度搜索的 SERP 带 hl / gl
+    """
+    stages = []
+    if trends:
+        from trends_analyzer import TrendsAnalyzer
+        from trends_service import get_trends_service
+        service = get_trends_service(hl=locale.trends_hl, tz=locale.tz, geo=locale.geo) if locale else None
+        analyzer = TrendsAnalyzer(service)
+        stages.append(("trends", lambda kw: analyzer.analyze([kw]).get(kw),
+                       1 + TRENDS_CRAWL_MAX_REQUESTS))  # 1 次 + 查询图深挖的请求预算
+    if serp:
+        from serp_analyzer import SERPAnalyzer
+        serp_analyzer = SERPAnalyzer()
+        stages.append(("serp", lambda kw: serp_analyzer.analyze([kw]).get(kw), 1))
+    if deep:
+        from deep_search import DeepSearchAnalyzerV4
+        deep_analyzer = DeepSearchAnalyzerV4(locale=locale)
+        stages.append(("deep", deep_analyzer.analyze_keyword, 2))  # Reddit + Google
+    return stages
+
+
+class EnrichmentBudget:
+    """补全预算：请求数 + 时间 + 运行截止时间（任一为 None 表示不限制）"""
+
+    def __init__(self, max_requests: int = None, max_seconds: float = None, deadline=None):
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.deadline = deadline  # deadline.StageDeadline
+        self.used_requests = 0
+        self.started = time.time()
+
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    def can_afford(self, cost: int = 1) -> bool:
+        if self.max_requests is not None and self.used_requests + cost > self.max_requests:
+            return False
+        return not self.exhausted()
+
+    def exhausted(self) -> bool:
+        if self.max_requests is not None and self.used_requests >= self.max_requests:
+            return True
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return True
+        if self.deadline is not None and self.deadline.expired():
+            return True
+        return False
+
+    def spend(self, cost: int = 1):
+        self.used_requests += cost
+
+
+class EnrichmentQueue:
+    """按预评分排序的补全队列（大顶堆）"""
+
+    def __init__(self, keywords: Iterable[str], scorer: KeywordScorer = None, capacity: int = None):
+        """
+        keywords 可以是流式迭代器；capacity 不为 None 时只保留预评分最高的 capacity 个，
+        内存与候选总数无关
+        """
+        self.scorer = scorer or KeywordScorer()
+        # keyword 作为第二排序键，同分时顺序稳定
+        scored = ((-self.prescore(keyword), keyword) for keyword in keywords)
+        if capacity is not None:
+            self._heap: List[Tuple[float, str]] = heapq.nsmallest(capacity, scored)
+        else:
+            self._heap = list(scored)
+        heapq.heapify(self._heap)
+
+    def prescore(self, keyword: str) -> float:
+        """本地预评分：只用关键词本身的信号"""
+        return prescore(self.scorer, keyword)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def pop(self) -> Tuple[str, float]:
+        """取出预期价值最高的关键词"""
+        neg_score, keyword = heapq.heappop(self._heap)
+        return keyword, -neg_score
+
+    def ordered(self, limit: int = None) -> List[str]:
+        """按优先级返回关键词（不出队）"""
+        top = heapq.nsmallest(limit or len(self._heap), self._heap)
+        return [keyword for _, keyword in top]
+
+    def run(self, stages: List[Stage], budget: EnrichmentBudget = None, limit: int = None,
+            stage: str = None) -> Dict[str, Dict[str, Dict]]:
+        """
+        按优先级逐个关键词执行所有补全阶段，预算用完即停
+
+        stages: [(名称, keyword -> 结果, 单次请求成本), ...]
+        stage: 进度事件的阶段名；几个队列并行时各用自己的（如 enrich:de-DE），
+               否则都记在当前阶段下，总数互相覆盖、进度对不上
+        返回: {阶段名称: {keyword: 结果}}
+        """
+        budget = budget or EnrichmentBudget()
+        results = {name: {} for name, _, _ in stages}
+        if not stages:
+            return results
+
+        events = get_events()
+        tag = {"stage": stage} if stage else {}
+        if stage:
+            events.emit("stage_start", stage=stage)
+        run_started = time.time()
+        events.total(len(self._heap) if limit is None else min(limit, len(self._heap)), stage=stage)
+        processed = 0
+        while self._heap and (limit is None or processed < limit):
+            if budget.exhausted():
+                logger.info(f"   ⏹️ 补全预算用完: {budget.used_requests} 次请求, {budget.elapsed():.0f} 秒")
+                break
+
+            keyword, prescore = self.pop()
+            started = time.perf_counter()
+            ok = True
+            for name, fetch, cost in stages:
+                if not budget.can_afford(cost):
+                    continue
+                budget.spend(cost)
+                try:
+                    result = fetch(keyword)
+                except Exception as e:
+                    logger.debug(f"[{name}] '{keyword}' 补全失败: {e}")
+                    events.error(e, source=name, key=keyword, **tag)
+                    ok = False
+                    continue
+                if result is not None:
+                    results[name][keyword] = result
+
+            processed += 1
+            events.item(keyword, ok=ok, seconds=round(time.perf_counter() - started, 3), **tag)
+            logger.debug(f"   {processed}. {keyword} (预评分 {prescore})")
+
+        if stage:
+            events.emit("stage_end", stage=stage, seconds=round(time.time() - run_started, 3))
+        logger.info(f"   → 按优先级补全 {processed} 个关键词, 用掉 {budget.used_requests} 次请求")
+        return results
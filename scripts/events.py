@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+运行进度事件流 - JSON Lines 写文件或本地 UDP
+============================================
+
+几个小时的 run_pipeline / SmoothRunner.run_job 以前只有日志行可看，
+某个数据源卡住了要等整次运行结束才发现。打开 --events 后，流水线把结构化事件
+逐行写成 JSON（一行一个事件），watch_events.py 实时汇总吞吐、各阶段 ETA 和错误率。
+
+每个事件都带 ts / run / stage / event，事件类型：
+- run_start / run_end                 整次运行
+- stage_start / stage_end / stage_total   阶段边界与该阶段要处理的总数
+- item      处理完一个关键词（ok / source / seconds）
+- fetch     一次抓取（source / seconds / status / cache: hit | not_modified | miss / ok）
+- error     异常（source / message）
+
+EventStream 同时实现 begin / end / summary，可以直接放进 profiling.StageHooks；
+未打开时所有方法都是空操作，调用方不用判断。
+
+写文件时每次打开都先轮转：上次运行的文件改名为 events.jsonl.1（依次后移，最多保留
+EVENTS_KEEP_RUNS 个），当前文件只含本次运行，不会无限增长。
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from config import EVENTS_KEEP_RUNS
+
+logger = logging.getLogger(__name__)
+
+
+def rotate(path: Path, keep: int = EVENTS_KEEP_RUNS):
+    """path → path.1 → path.2 …，超过 keep 个的旧文件删除；path 不存在或为空时不动"""
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    if keep <= 0:
+        path.unlink()
+        return
+    for i in range(keep - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{i}")
+        if older.exists():
+            older.replace(path.with_name(f"{path.name}.{i + 1}"))
+    path.replace(path.with_name(f"{path.name}.1"))
+
+
+class EventStream:
+    """线程安全的事件写入器：target 是文件路径或 udp://host:port；None 表示关闭"""
+
+    def __init__(self, target=None, keep: int = EVENTS_KEEP_RUNS):
+        self.target = target
+        self.enabled = target is not None
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._lock = threading.Lock()
+        self._file = None
+        self._socket = None
+        self._address = None
+        if not self.enabled:
+            return
+        url = urlparse(str(target))
+        if url.scheme == "udp":
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._address = (url.hostname or "127.0.0.1", url.port)
+        else:
+            path = Path(target)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            rotate(path, keep)
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+        logger.info(f"📡 进度事件写入: {target}（python watch_events.py 实时查看）")
+
+    def emit(self, event: str, **fields):
+        if not self.enabled:
+            return
+        fields.setdefault("stage", self.stage)
+        record = {"ts": round(time.time(), 3), "run": self.run_id, "event": event, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                if self._socket is not None:
+                    self._socket.sendto(line.encode("utf-8"), self._address)
+                elif self._file is not None:
+                    self._file.write(line + "\n")
+            except OSError as e:
+                # 事件流只是观测手段：写不进去不影响运行
+                logger.debug(f"事件写入失败: {e}")
+
+    # ============ 阶段（StageHooks 接口）============
+
+    def begin(self, name: str):
+        """进入新阶段（自动结束上一阶段）"""
+        self.end()
+        self.stage = name
+        self._stage_started = time.time()
+        self.emit("stage_start")
+
+    def end(self):
+        if self.stage is None:
+            return
+        self.emit("stage_end", seconds=round(time.time() - self._stage_started, 3))
+        self.stage = None
+
+    def summary(self):
+        self.end()
+
+    # ============ 便捷方法 ============
+
+    def total(self, count: int, stage: str = None):
+        """当前阶段（或指定阶段）要处理的总数，用于 ETA"""
+        self.emit("stage_total", total=count, **({"stage": stage} if stage else {}))
+
+    def item(self, key: str, ok: bool = True, **fields):
+        self.emit("item", key=key, ok=ok, **fields)
+
+    def fetch(self, source: str, seconds: float, status=None, cache: str = "miss", ok: bool = True):
+        self.emit("fetch", source=source, seconds=round(seconds, 4), status=status, cache=cache, ok=ok)
+
+    def error(self, message, **fields):
+        self.emit("error", message=str(message)[:300], **fields)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+            self.enabled = False
+
+
+_events = EventStream()
+_events_lock = threading.Lock()
+
+
+def get_events() -> EventStream:
+    """进程内共享的事件流（没有 open_events 时是关闭状态）"""
+    return _events
+
+
+def open_events(target) -> EventStream:
+    """打开共享事件流（替换并关闭之前的）"""
+    global _events
+    with _events_lock:
+        previous, _events = _events, EventStream(target)
+    previous.close()
+    return _events
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+共享 HTTP 抓取层 - 响应缓存 + 分组限速 + 请求合并
+================================================
+
+Suggest / SERP 等抓取以前各自 requests.get，没有缓存也没有统一限速；
+多市场（hl / gl）并发运行时，同一个 URL 会被不同线程重复请求。
+
+- ResponseCache：成功响应按 (URL + 参数) 存进 SQLite，TTL 内直接复用，多个市场 / 多次运行共享
+- RateLimiter：按名字分组的最小请求间隔（例如每个市场一个 suggest 限速器）
+- Fetcher：上面两者 + SingleFlight，同一请求的并发调用只发一次
+- 条件请求：缓存正文时一并保存 ETag / Last-Modified，过期后带 If-None-Match /
+  If-Modified-Since 重新验证，内容没变时服务器只回 304，直接续用缓存正文
+- 压缩：统一声明 Accept-Encoding（装了 brotli 才声明 br，否则 requests 解不开）
+- 清理：Fetcher.purge() 删除超过 config.RESPONSE_CACHE_MAX_AGE 没刷新的响应，运行结束 / 调度器每轮调用
+"""
+
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    import brotli  # noqa: F401  (requests / urllib3 靠它解码 br)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+from config import DATA_DIR, RESPONSE_CACHE_MAX_AGE
+from events import get_events
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 24 * 3600      # 响应缓存有效期（秒）
+DEFAULT_INTERVAL = 1.0       # 同一限速组两次请求的最小间隔（秒）
+DEFAULT_JITTER = 0.5
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+NOT_MODIFIED = 304
+# Playwright 页面只需要 DOM：这些资源类型直接拦掉，不下载
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+def cache_key(url: str, params: Dict = None) -> str:
+    """URL + 排序后的参数 → 缓存键"""
+    full = f"{url}?{urlencode(sorted((params or {}).items()))}" if params else url
+    return hashlib.blake2b(full.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RateLimiter:
+    """最小间隔限速（线程安全）：每次 wait() 至少距上一次 min_interval + 随机抖动"""
+
+    def __init__(self, min_interval: float = DEFAULT_INTERVAL, jitter: float = DEFAULT_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self.min_interval + random.uniform(0, self.jitter)
+        if start > now:
+            time.sleep(start - now)
+
+
+class ResponseCache:
+    """响应缓存 (SQLite)：只缓存成功的响应正文"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "response_cache.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key        TEXT PRIMARY KEY,
+                url        TEXT NOT NULL,
+                body       TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                etag       TEXT,
+                last_modified TEXT
+            )
+        """)
+        # 旧库没有校验器列：补上
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(responses)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        self.conn.commit()
+
+    def get(self, key: str, max_age: float) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or time.time() - row[1] > max_age:
+            return None
+        return row[0]
+
+    def entry(self, key: str) -> Optional[Dict]:
+        """不论是否过期：{body, fetched_at, etag, last_modified}"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT body, fetched_at, etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"body": row[0], "fetched_at": row[1], "etag": row[2], "last_modified": row[3]}
+
+    def put(self, key: str, url: str, body: str, etag: str = None, last_modified: str = None):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, body, fetched_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, body, time.time(), etag, last_modified)
+            )
+            self.conn.commit()
+
+    def touch(self, key: str):
+        """304：正文没变，刷新抓取时间"""
+        with self._lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def purge(self, max_age: float) -> int:
+        """删除过期响应，返回条数"""
+        with self._lock:
+            cur = self.conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,))
+            self.conn.commit()
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    """缓存条目的校验器 → 条件请求头"""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def conditional_get(session, cache: ResponseCache, url: str, params: Dict = None,
+                    headers: Dict = None, store: bool = None, keep_body: bool = True,
+                    **kwargs) -> Tuple[object, Optional[str]]:
+    """
+    带校验器的 GET，返回 (response, 正文)
+
+    - 缓存里有这个请求的 ETag / Last-Modified 时带上条件请求头
+    - 304：刷新缓存时间，正文取缓存里的
+    - 200：正文连同校验器写入缓存（store=None 时只在响应带校验器时写）
+    - keep_body=False：只存校验器不存正文（调用方自己落盘的大文件，如 GPT Store 快照），
+      304 时正文为空串，调用方按状态码判断
+    - 其他状态：正文为 None；异常照常抛出
+    """
+    key = cache_key(url, params)
+    entry = cache.entry(key)
+    validators = conditional_headers(entry)
+    if validators:
+        headers = {**(headers or {}), **validators}
+    response = session.get(url, params=params, headers=headers, **kwargs)
+    if response.status_code == NOT_MODIFIED and entry is not None:
+        cache.touch(key)
+        return response, entry["body"]
+    if response.status_code != 200:
+        return response, None
+    body = response.text
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if store or (store is None and (etag or last_modified)):
+        cache.put(key, url, body if keep_body else "", etag, last_modified)
+    return response, body
+
+
+def block_heavy_resources(target):
+    """Playwright 的 page / context：图片、字体、样式、音视频请求直接中止"""
+    def handle(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            route.abort()
+        else:
+            route.continue_()
+    target.route("**/*", handle)
+
+
+class Fetcher:
+    """带缓存、限速、请求合并的 GET"""
+
+    def __init__(self, cache: ResponseCache = None, session=None, ttl: float = DEFAULT_TTL,
+                 interval: float = DEFAULT_INTERVAL, jitter: float = DEFAULT_JITTER):
+        self.cache = cache if cache is not None else ResponseCache()
+        self.ttl = ttl
+        self.interval = interval
+        self.jitter = jitter
+        self.flight = SingleFlight()
+        self._session = session
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._limiters_lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "errors": 0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            if requests is None:
+                raise RuntimeError("requests 未安装: pip install requests")
+            self._session = requests.Session()
+            self._session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING})
+        return self._session
+
+    def limiter(self, name: str) -> RateLimiter:
+        """按名字取限速器（不存在则按默认间隔创建）"""
+        with self._limiters_lock:
+            if name not in self._limiters:
+                self._limiters[name] = RateLimiter(self.interval, self.jitter)
+            return self._limiters[name]
+
+    def get_text(self, url: str, params: Dict = None, limiter: str = None,
+                 ttl: float = None, timeout: float = 10, **kwargs) -> Optional[str]:
+        """GET 正文；非 200 或出错返回 None（失败不缓存）。缓存过期后按校验器发条件请求"""
+        ttl = self.ttl if ttl is None else ttl
+        key = cache_key(url, params)
+        events = get_events()
+        source = limiter or urlparse(url).netloc
+        if ttl > 0:
+            body = self.cache.get(key, ttl)
+            if body is not None:
+                self.stats["cache_hits"] += 1
+                events.fetch(source, 0.0, cache="hit")
+                return body
+
+        def fetch():
+            if limiter:
+                self.limiter(limiter).wait()
+            self.stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                response, body = conditional_get(self.session, self.cache, url, params,
+                                                 store=ttl > 0, timeout=timeout, **kwargs)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.debug(f"GET {url} 失败: {e}")
+                events.fetch(source, time.perf_counter() - started, ok=False)
+                events.error(e, source=source)
+                return None
+            not_modified = body is not None and response.status_code == NOT_MODIFIED
+            if body is None:
+                self.stats["errors"] += 1
+            elif not_modified:
+                self.stats["not_modified"] += 1
+            events.fetch(source, time.perf_counter() - started, status=response.status_code,
+                         cache="not_modified" if not_modified else "miss", ok=body is not None)
+            return body
+
+        return self.flight.do(key, fetch, ttl=0)
+
+    def purge(self, max_age: float = RESPONSE_CACHE_MAX_AGE) -> int:
+        """删除超过 max_age 秒没刷新的缓存响应，返回条数"""
+        removed = self.cache.purge(max_age)
+        if removed:
+            logger.info(f"🧹 响应缓存清理 {removed} 条（超过 {max_age / 86400:g} 天）")
+        return removed
+
+    def get_json(self, url: str, params: Dict = None, **kwargs):
+        body = self.get_text(url, params, **kwargs)
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+
+_fetcher: Optional[Fetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> Fetcher:
+    """进程内共享的 Fetcher（所有市场共用一个响应缓存）"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher()
+        return _fetcher
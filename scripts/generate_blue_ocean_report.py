@@ -6,38 +6,142 @@
 
 import sys
 import os
+import inspect
 sys.path.insert(0, '.')
 
+from collections import defaultdict
 from datetime import datetime
+import blue_ocean_hunter
 from blue_ocean_hunter import (
     is_product_keyword,
     analyze_need_type,
     check_ai_feasibility,
     make_decision
 )
+from synthetic import keyword_rng
+from report_diff import ReportCache, fingerprint
 
-def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
-    """生成蓝海需求挖掘报告"""
+# 分析规则（函数源码 + 词表）的指纹：规则一改，缓存的分析结果自动失效
+ANALYSIS_VERSION = fingerprint(
+    [inspect.getsource(f) for f in (is_product_keyword, analyze_need_type, check_ai_feasibility)],
+    blue_ocean_hunter.PRODUCT_INDICATORS,
+    blue_ocean_hunter.NEED_TYPE_LABELS,
+    blue_ocean_hunter.NEED_INDICATORS,
+)
+
+
+def _analyze(kw):
+    """产品词判断 + 需求类型 + AI可行性（结果可缓存）"""
+    if is_product_keyword(kw):
+        return None
+    return {"need": analyze_need_type(kw), "ai": check_ai_feasibility(kw)}
+
+
+def _render_card(i, r):
+    """TOP 10 中的一张卡片"""
+    score_class = "high" if r["score"] >= 70 else ("medium" if r["score"] >= 50 else "low")
+    decision_class = "build" if "BUILD" in r["decision"] else ("watch" if "WATCH" in r["decision"] else "drop")
+    
+    opportunity_tag = '<span class="tag opportunity">💎 降维</span>' if r["is_opportunity"] else ""
+    
+    return f"""
+                <div class="card {'highlight' if r['is_opportunity'] else ''}">
+                    <div class="keyword">#{i} {r['keyword']}</div>
+                    <div style="display:flex; justify-content:space-between; align-items:center;">
+                        <span class="tag {decision_class}">{r['decision']}</span>
+                        <span class="score {score_class}">{r['score']}分</span>
+                    </div>
+                    <div class="meta">
+                        <span class="tag">🤖 {r['ai_solution']}</span>
+                        <span class="tag">📊 {r['need_types']}</span>
+                        <span class="tag">🔥 {r['gpts_ratio']}</span>
+                        {opportunity_tag}
+                    </div>
+                </div>
+"""
+
+
+def _render_row_cells(r):
+    """完整表格一行中排名之后的单元格（排名随插入变化，不进缓存）"""
+    score_class = "high" if r["score"] >= 70 else ("medium" if r["score"] >= 50 else "low")
+    decision_class = "build" if "BUILD" in r["decision"] else ("watch" if "WATCH" in r["decision"] else "drop")
+    
+    return f"""
+                            <td><strong>{r['keyword']}</strong></td>
+                            <td class="score {score_class}">{r['score']}</td>
+                            <td><span class="tag {decision_class}">{r['decision']}</span></td>
+                            <td>{r['ai_solution']}</td>
+                            <td>{r['need_types']}</td>
+                            <td>{r['gpts_ratio']}</td>
+                            <td>{r['competition']}</td>
+                        </tr>
+"""
+
+
+def _render_opportunities(opportunities):
+    if not opportunities:
+        return ""
+    html = f"""
+            <div class="tip-box">
+                <h4>🔥 降维打击机会（{len(opportunities)} 个）</h4>
+                <p>优先选择竞争度=LOW 且 AI适用度高的词进行开发</p>
+                <div style="margin-top:15px;">
+"""
+    for r in opportunities[:5]:
+        html += f'<span class="tag" style="margin:5px;">{r["keyword"]} ({r["score"]}分)</span>'
+    
+    html += """
+                </div>
+            </div>
+"""
+    return html
+
+
+def _render_changes(diff, limit=10):
+    """与上次运行相比：新 BUILD NOW / 决策变化 / 分数变化"""
+    html = f"""
+        <div class="section">
+            <h2>🔄 与上次运行相比</h2>
+            <p>{diff.summary()}</p>
+"""
+    if not diff.first_run:
+        changes = [f'<span class="tag build" style="margin:5px;">🆕 {kw}</span>' for kw in diff.new_build_now[:limit]]
+        changes += [f'<span class="tag" style="margin:5px;">{kw}: {old} → {new}</span>'
+                    for kw, old, new in diff.decision_changes[:limit] if kw not in diff.new_build_now]
+        changes += [f'<span class="tag" style="margin:5px;">{kw}: {old:g} → {new:g} ({delta:+g})</span>'
+                     for kw, old, new, delta in diff.score_deltas[:limit]]
+        if changes:
+            html += f'            <div style="margin-top:15px;">{"".join(changes)}</div>\n'
+    html += """        </div>
+"""
+    return html
+
+
+def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html", incremental=True):
+    """
+    生成蓝海需求挖掘报告
+
+    incremental=True 时关键词分析结果按关键词缓存（data/report_cache.db），
+    只有新关键词重新分析，并在报告里列出与上次运行的差异。
+    """
+    cache = ReportCache("blue_ocean", path=None if incremental else ":memory:")
     
     # 分析所有关键词
     results = []
     for kw in keywords:
-        # 跳过产品词
-        if is_product_keyword(kw):
+        # 跳过产品词；需求分析 + AI可行性按关键词缓存
+        analysis = cache.memo("blue_ocean_analysis", kw, ANALYSIS_VERSION, lambda: _analyze(kw))
+        if analysis is None:
             continue
+        need_analysis = analysis["need"]
+        ai_feasibility = analysis["ai"]
         
-        # 需求分析
-        need_analysis = analyze_need_type(kw)
-        
-        # AI可行性
-        ai_feasibility = check_ai_feasibility(kw)
-        
-        # 模拟数据（实际运行时会从API获取）
-        import random
-        score = random.randint(50, 95)
+        # 模拟数据（实际运行时会从API获取），按关键词确定性生成
+        rng = keyword_rng(kw, "report")
+        score = rng.randint(50, 95)
         decision = make_decision(score)
-        gpts_ratio = random.uniform(5, 25)
-        competition = random.choice(["LOW", "MEDIUM", "HIGH"])
+        gpts_ratio = rng.uniform(5, 25)
+        competition = rng.choice(["LOW", "MEDIUM", "HIGH"])
         is_opportunity = competition == "LOW"
         
         results.append({
@@ -57,6 +161,7 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
     
     # 排序
     results.sort(key=lambda x: x["score"], reverse=True)
+    diff = cache.diff(results, "score")
     
     # 统计
     build_now = [r for r in results if "BUILD" in r["decision"]]
@@ -354,6 +459,7 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
             </div>
         </div>
         
+{_render_changes(diff)}
         <!-- 核心概念 -->
         <div class="section">
             <h2>🎯 核心概念</h2>
@@ -378,27 +484,8 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
 """
     
     # 添加TOP 10
-    for i, r in enumerate(results[:10], 1):
-        score_class = "high" if r["score"] >= 70 else ("medium" if r["score"] >= 50 else "low")
-        decision_class = "build" if "BUILD" in r["decision"] else ("watch" if "WATCH" in r["decision"] else "drop")
-        
-        opportunity_tag = '<span class="tag opportunity">💎 降维</span>' if r["is_opportunity"] else ""
-        
-        html += f"""
-                <div class="card {'highlight' if r['is_opportunity'] else ''}">
-                    <div class="keyword">#{i} {r['keyword']}</div>
-                    <div style="display:flex; justify-content:space-between; align-items:center;">
-                        <span class="tag {decision_class}">{r['decision']}</span>
-                        <span class="score {score_class}">{r['score']}分</span>
-                    </div>
-                    <div class="meta">
-                        <span class="tag">🤖 {r['ai_solution']}</span>
-                        <span class="tag">📊 {r['need_types']}</span>
-                        <span class="tag">🔥 {r['gpts_ratio']}</span>
-                        {opportunity_tag}
-                    </div>
-                </div>
-"""
+    top = results[:10]
+    html += "".join(_render_card(i, r) for i, r in enumerate(top, 1))
     
     html += """
             </div>
@@ -426,21 +513,9 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
     
     # 添加完整表格
     for i, r in enumerate(results[:30], 1):
-        score_class = "high" if r["score"] >= 70 else ("medium" if r["score"] >= 50 else "low")
-        decision_class = "build" if "BUILD" in r["decision"] else ("watch" if "WATCH" in r["decision"] else "drop")
-        
         html += f"""
                         <tr>
-                            <td>{i}</td>
-                            <td><strong>{r['keyword']}</strong></td>
-                            <td class="score {score_class}">{r['score']}</td>
-                            <td><span class="tag {decision_class}">{r['decision']}</span></td>
-                            <td>{r['ai_solution']}</td>
-                            <td>{r['need_types']}</td>
-                            <td>{r['gpts_ratio']}</td>
-                            <td>{r['competition']}</td>
-                        </tr>
-"""
+                            <td>{i}</td>{_render_row_cells(r)}"""
     
     html += """
                     </tbody>
@@ -453,20 +528,7 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
             <h2>💡 策略建议</h2>
 """
     
-    if opportunities:
-        html += f"""
-            <div class="tip-box">
-                <h4>🔥 降维打击机会（{len(opportunities)} 个）</h4>
-                <p>优先选择竞争度=LOW 且 AI适用度高的词进行开发</p>
-                <div style="margin-top:15px;">
-"""
-        for r in opportunities[:5]:
-            html += f'<span class="tag" style="margin:5px;">{r["keyword"]} ({r["score"]}分)</span>'
-        
-        html += """
-                </div>
-            </div>
-"""
+    html += _render_opportunities(opportunities)
     
     html += """
             <div class="tip-box" style="background: rgba(0, 198, 255, 0.1); border-color: rgba(0, 198, 255, 0.3);">
@@ -494,6 +556,8 @@ def generate_blue_ocean_report(keywords, output_file="blue_ocean_report.html"):
     # 保存文件
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
+    cache.commit()
+    cache.close()
     
     print(f"\n✅ HTML报告已生成: {output_file}")
     return output_file
@@ -6,41 +6,34 @@ Profit Hunter ULTIMATE V3 - HTML 报告生成器
 import sys
 from pathlib import Path
 from datetime import datetime
-from scorer import KeywordScorer, USER_INTENTS
+from scorer import KeywordScorer
 from gpts_analyzer import GPTsAnalyzer
-from config import THRESHOLDS
+from config import THRESHOLDS, USER_INTENTS
+from report_diff import ReportCache
 
 
-def generate_report(results, output_path=None):
-    """生成 HTML 报告"""
-    
-    # 统计
-    build_now = [r for r in results if 'BUILD NOW' in r.get('decision', '')]
-    watch = [r for r in results if 'WATCH' in r.get('decision', '')]
-    drop = [r for r in results if 'DROP' in r.get('decision', '')]
-    
-    # Top 10 关键词行
-    top_keywords_rows = ''
-    for i, kw in enumerate(build_now[:10], 1):
+def _score_style(score):
+    if score >= 80:
+        return 'score-high', '#10b981'
+    elif score >= 60:
+        return 'score-medium', '#f59e0b'
+    return 'score-low', '#ef4444'
+
+
+def _render_top_rows(top):
+    """Top 10 BUILD NOW 区块"""
+    rows = ''
+    for i, kw in enumerate(top, 1):
         score = kw.get('final_score', 0)
         avg_ratio = kw.get('avg_ratio', 0)
         ratio_str = f'{avg_ratio:.2%}' if avg_ratio > 0 else 'N/A'
-        
-        if score >= 80:
-            score_class = 'score-high'
-            bar_color = '#10b981'
-        elif score >= 60:
-            score_class = 'score-medium'
-            bar_color = '#f59e0b'
-        else:
-            score_class = 'score-low'
-            bar_color = '#ef4444'
+        score_class, bar_color = _score_style(score)
         
         user_intent = kw.get('user_intent', 'N/A')
         user_goal = kw.get('user_goal', 'N/A')
         降维 = '<span class="dim-attack">💎 降维</span>' if kw.get('降维打击') else '-'
         
-        top_keywords_rows += f'''
+        rows += f'''
         <tr>
             <td><strong>#{i}</strong></td>
             <td class="keyword">{kw['keyword']}</td>
@@ -57,26 +50,27 @@ def generate_report(results, output_path=None):
             <td>{降维}</td>
         </tr>
         '''
+    return rows
+
+
+def _render_result_row(kw):
+    """完整结果表中的一行"""
+    score = kw.get('final_score', 0)
+    trend = kw.get('trend_score', 0)
+    intent = kw.get('intent_score', 0)
+    competition = kw.get('competition_score', 0)
+    buildability = kw.get('buildability_score', 0)
+    decision = kw.get('decision', '')
+    user_intent = kw.get('user_intent', 'N/A')
     
-    # 完整关键词行
-    all_keywords_rows = ''
-    for kw in results:
-        score = kw.get('final_score', 0)
-        trend = kw.get('trend_score', 0)
-        intent = kw.get('intent_score', 0)
-        competition = kw.get('competition_score', 0)
-        buildability = kw.get('buildability_score', 0)
-        decision = kw.get('decision', '')
-        user_intent = kw.get('user_intent', 'N/A')
-        
-        if 'BUILD' in decision:
-            decision_class = 'decision-build'
-        elif 'WATCH' in decision:
-            decision_class = 'decision-watch'
-        else:
-            decision_class = 'decision-drop'
-        
-        all_keywords_rows += f'''
+    if 'BUILD' in decision:
+        decision_class = 'decision-build'
+    elif 'WATCH' in decision:
+        decision_class = 'decision-watch'
+    else:
+        decision_class = 'decision-drop'
+    
+    return f'''
         <tr>
             <td class="keyword">{kw['keyword']}</td>
             <td><strong>{score}</strong></td>
@@ -88,9 +82,11 @@ def generate_report(results, output_path=None):
             <td><span class="intent-tag">{user_intent}</span></td>
         </tr>
         '''
-    
-    # 用户意图分析
-    intent_analysis_rows = ''
+
+
+def _render_intent_analysis(build_now):
+    """用户意图分析区块"""
+    rows = ''
     for intent_type, intent_info in USER_INTENTS.items():
         keywords_with_intent = [r for r in build_now if intent_type in r.get('user_intent', '')]
         examples = [kw['keyword'][:40] + '...' if len(kw['keyword']) > 40 else kw['keyword'] for kw in keywords_with_intent[:3]]
@@ -100,7 +96,7 @@ def generate_report(results, output_path=None):
         else:
             examples_html = '<span class="intent-example">示例关键词...</span>'
         
-        intent_analysis_rows += f'''
+        rows += f'''
         <div class="intent-card">
             <div class="intent-type">{intent_type}</div>
             <div class="intent-goal">{intent_info['goal']}</div>
@@ -109,13 +105,16 @@ def generate_report(results, output_path=None):
             </div>
         </div>
         '''
-    
-    # 用户意图类型说明
-    intent_types_rows = ''
+    return rows
+
+
+def _render_intent_types():
+    """用户意图类型说明区块（只随 USER_INTENTS 变化）"""
+    rows = ''
     for intent_type, intent_info in USER_INTENTS.items():
         keywords_list = ', '.join(intent_info['keywords'][:5])
         
-        intent_types_rows += f'''
+        rows += f'''
         <div class="intent-card">
             <div class="intent-type">📌 {intent_type}</div>
             <div class="intent-goal">{intent_info['goal']}</div>
@@ -124,6 +123,63 @@ def generate_report(results, output_path=None):
             </div>
         </div>
         '''
+    return rows
+
+
+def _render_changes(diff, limit=15):
+    """本次变化区块：新 BUILD NOW / 决策变化 / 分数变化"""
+    if diff.first_run:
+        return f'<p style="color: #64748b;">{diff.summary()}，下次运行开始显示变化。</p>'
+    rows = ''
+    for kw in diff.new_build_now[:limit]:
+        rows += f'''
+        <tr><td class="keyword">{kw}</td><td><span class="decision-badge decision-build">🆕 BUILD NOW</span></td><td>-</td></tr>'''
+    for kw, old, new in diff.decision_changes[:limit]:
+        if kw in diff.new_build_now:
+            continue
+        rows += f'''
+        <tr><td class="keyword">{kw}</td><td>{old} → {new}</td><td>-</td></tr>'''
+    for kw, old, new, delta in diff.score_deltas[:limit]:
+        color = '#10b981' if delta > 0 else '#ef4444'
+        rows += f'''
+        <tr><td class="keyword">{kw}</td><td>{old:g} → {new:g}</td><td style="color: {color}; font-weight: 600;">{delta:+g}</td></tr>'''
+    return f'''<p style="color: #64748b; margin-bottom: 20px;">{diff.summary()}</p>
+            <table class="keyword-table">
+                <thead><tr><th>关键词</th><th>变化</th><th>分数变化</th></tr></thead>
+                <tbody>{rows}
+                </tbody>
+            </table>'''
+
+
+def generate_report(results, output_path=None, incremental=True):
+    """
+    生成 HTML 报告
+
+    incremental=True 时与上次运行对比（data/report_cache.db），报告里列出本次的变化。
+    """
+    cache = ReportCache('profit_hunter', path=None if incremental else ':memory:')
+    diff = cache.diff(results, 'final_score')
+    
+    # 统计
+    build_now = [r for r in results if 'BUILD NOW' in r.get('decision', '')]
+    watch = [r for r in results if 'WATCH' in r.get('decision', '')]
+    drop = [r for r in results if 'DROP' in r.get('decision', '')]
+    
+    # Top 10 关键词行
+    top = build_now[:10]
+    top_keywords_rows = _render_top_rows(top)
+    
+    # 完整关键词行
+    all_keywords_rows = ''.join(_render_result_row(kw) for kw in results)
+    
+    # 用户意图分析
+    intent_analysis_rows = _render_intent_analysis(build_now)
+    
+    # 用户意图类型说明
+    intent_types_rows = _render_intent_types()
+    
+    # 本次变化
+    changes_html = _render_changes(diff)
     
     # 生成 HTML
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -483,6 +539,12 @@ def generate_report(results, output_path=None):
             </table>
         </div>
         
+        <!-- 本次变化 -->
+        <div class="card">
+            <h2>🔄 与上次运行相比</h2>
+            {changes_html}
+        </div>
+        
         <!-- 用户意图分析 -->
         <div class="card">
             <h2>🎯 用户意图深挖分析</h2>
@@ -612,6 +674,8 @@ def generate_report(results, output_path=None):
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(html)
+    cache.commit()
+    cache.close()
     
     return output_path, len(build_now), len(watch), len(drop)
 
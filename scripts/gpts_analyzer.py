@@ -1,22 +1,234 @@
 #!/usr/bin/env python3
 """
 GPTs 对比分析模块 - V3 增强版
+
+导入过 GPT Store 快照（名称 + 描述）时，GPTs 数量是快照里真正匹配关键词的 GPT 数：
+GPTStoreIndex 把快照建成词 → GPT id 的倒排表（data/gpts_index.db），
+每个关键词去掉虚词后对各词的倒排表求交，纯本地计算、批量查询、不 sleep。
+中文没有空格分词，连续的汉字按相邻两字（bigram）切分，快照和关键词两边一致。
+没有快照时退回按词根估算。
+
+Usage:
+    python gpts_analyzer.py --import gpts_snapshot.jsonl   # 导入快照（JSON / JSON Lines / CSV）
+    python gpts_analyzer.py --import https://example.com/gpts.jsonl   # 远程快照：条件请求，没变就不重建
+    python gpts_analyzer.py --count "pdf to word converter" "habit tracker"
 """
 
-import time
+import argparse
+import csv
 import json
-from urllib.request import urlopen
-from urllib.error import URLError
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import GPTS_INDEX_FILE, GPTS_REFERENCE_SIZE, GPTS_STOPWORDS
+from fetch import NOT_MODIFIED, conditional_get, get_fetcher
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"([a-z0-9]+)|([\u4e00-\u9fff]+)")
+TOKENIZER_VERSION = 2         # 分词规则变了就加一：旧索引打开时按库里的名称 / 描述重建倒排表
+STOPWORDS = frozenset(GPTS_STOPWORDS)
+CACHE_IDS = 5_000_000         # 内存里缓存的倒排表 id 总数上限
+MAX_COUNT_MEMO = 200_000      # 词组合 → 匹配数的记忆条数
+
+
+def gpt_tokens(text: str) -> List[str]:
+    """小写、按字母数字切分，去掉复数 s；连续汉字切成相邻两字（单字保留）。快照和关键词用同一套规则"""
+    tokens = []
+    for token, han in TOKEN.findall(text.lower()):
+        if han:
+            tokens.extend(han[i:i + 2] for i in range(max(1, len(han) - 1)))
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def read_snapshot(path) -> Iterator[Tuple[str, str]]:
+    """读取快照：JSON 数组 / JSON Lines / CSV，每条取 name(title) + description(desc)"""
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            records = csv.DictReader(f)
+        elif path.suffix.lower() == ".json":
+            data = json.load(f)
+            records = data.get("gpts", data.get("items", [])) if isinstance(data, dict) else data
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            name = record.get("name") or record.get("title") or ""
+            description = record.get("description") or record.get("desc") or ""
+            if name or description:
+                yield name, description
+
+
+def download_snapshot(url: str) -> Optional[Path]:
+    """
+    下载远程快照到数据目录（带 ETag / Last-Modified 条件请求）；内容没变（304）返回 None
+
+    正文已经写到快照文件，响应缓存里只留校验器
+    """
+    fetcher = get_fetcher()
+    response, body = conditional_get(fetcher.session, fetcher.cache, url, store=True, keep_body=False,
+                                     timeout=60)
+    if body is None:
+        raise RuntimeError(f"下载快照失败: HTTP {response.status_code}")
+    if response.status_code == NOT_MODIFIED:
+        return None
+    path = Path(GPTS_INDEX_FILE).with_name("gpts_snapshot" + (Path(urlparse(url).path).suffix or ".jsonl"))
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+class GPTStoreIndex:
+    """GPT Store 快照的倒排索引 (SQLite 持久化，倒排表按需载入)"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or GPTS_INDEX_FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS gpts (
+                id          INTEGER PRIMARY KEY,
+                name        TEXT NOT NULL,
+                description TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                token TEXT PRIMARY KEY,
+                df    INTEGER NOT NULL,
+                ids   BLOB NOT NULL
+            );
+        """)
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM gpts").fetchone()[0]
+        self._cache: Dict[str, frozenset] = {}
+        self._cached_ids = 0
+        self._memo: Dict[Tuple[str, ...], int] = {}
+        if self.size and self.conn.execute("PRAGMA user_version").fetchone()[0] != TOKENIZER_VERSION:
+            logger.info("🤖 快照索引是旧分词规则建的，按库里的快照重建倒排表")
+            self.import_snapshot(self.conn.execute("SELECT name, description FROM gpts ORDER BY id").fetchall())
+
+    def import_snapshot(self, records: Iterable[Tuple[str, str]]) -> int:
+        """用新快照整体替换索引，返回 GPT 数"""
+        start = time.time()
+        postings: Dict[str, array] = {}
+        rows = []
+        for gpt_id, (name, description) in enumerate(records, 1):
+            rows.append((gpt_id, name, description))
+            for token in set(gpt_tokens(f"{name} {description}")):
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = array("I")
+                ids.append(gpt_id)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM gpts")
+            self.conn.execute("DELETE FROM postings")
+            self.conn.executemany("INSERT INTO gpts (id, name, description) VALUES (?, ?, ?)", rows)
+            self.conn.executemany("INSERT INTO postings (token, df, ids) VALUES (?, ?, ?)",
+                                  ((token, len(ids), ids.tobytes()) for token, ids in postings.items()))
+            self.conn.execute(f"PRAGMA user_version = {TOKENIZER_VERSION}")
+            self.size = len(rows)
+            self._cache.clear()
+            self._cached_ids = 0
+            self._memo.clear()
+        logger.info(f"🤖 GPT Store 快照: {self.size} 个 GPTs, {len(postings)} 个词 ({time.time() - start:.1f} 秒)")
+        return self.size
+
+    def _ids(self, token: str) -> frozenset:
+        ids = self._cache.get(token)
+        if ids is None:
+            with self._lock:
+                row = self.conn.execute("SELECT ids FROM postings WHERE token = ?", (token,)).fetchone()
+            table = array("I")
+            if row:
+                table.frombytes(row[0])
+            ids = frozenset(table)
+            if self._cached_ids + len(ids) > CACHE_IDS:
+                self._cache.clear()
+                self._cached_ids = 0
+            self._cache[token] = ids
+            self._cached_ids += len(ids)
+        return ids
+
+    @staticmethod
+    def query_tokens(keyword: str) -> Tuple[str, ...]:
+        """关键词里参与匹配的词（去掉虚词 / 修饰词，去重排序后作为记忆键）"""
+        return tuple(sorted({t for t in gpt_tokens(keyword) if t not in STOPWORDS}))
+
+    def count(self, keyword: str) -> int:
+        """名称或描述里包含关键词全部实词的 GPT 数"""
+        tokens = self.query_tokens(keyword)
+        if not tokens:
+            return 0
+        count = self._memo.get(tokens)
+        if count is None:
+            sets = sorted((self._ids(t) for t in tokens), key=len)
+            matched = sets[0]
+            for ids in sets[1:]:
+                if not matched:
+                    break
+                matched = matched & ids
+            count = len(matched)
+            if len(self._memo) >= MAX_COUNT_MEMO:
+                self._memo.clear()
+            self._memo[tokens] = count
+        return count
+
+    def counts(self, keywords: Iterable[str]) -> Dict[str, int]:
+        """批量查询 {关键词: 匹配 GPT 数}"""
+        return {keyword: self.count(keyword) for keyword in keywords}
+
+    def normalized(self, count: int) -> float:
+        """匹配数换算成每 GPTS_REFERENCE_SIZE 个 GPTs 里的个数"""
+        return count * GPTS_REFERENCE_SIZE / self.size if self.size else 0.0
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_index: Optional[GPTStoreIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_gpts_index() -> Optional[GPTStoreIndex]:
+    """进程内共享的快照索引；还没导入过快照时返回 None"""
+    global _index
+    with _index_lock:
+        if _index is None and Path(GPTS_INDEX_FILE).exists():
+            index = GPTStoreIndex()
+            if index.size:
+                _index = index
+            else:
+                index.close()
+        return _index
 
 
 class GPTsAnalyzer:
     """GPTs 分析器 - V3 增强版"""
     
-    def __init__(self):
+    def __init__(self, index: GPTStoreIndex = None):
         self.gpts_api = "https://chatGPT.ai/gpts/"
+        self.index = index if index is not None else get_gpts_index()
     
     def _search_gpts(self, keyword):
-        """搜索相关 GPTs - V3 增强"""
+        """搜索相关 GPTs：有快照索引时取真实匹配数（按参考规模归一化），否则按词根估算"""
+        if self.index is not None:
+            return int(round(self.index.normalized(self.index.count(keyword))))
+        
         # 基于关键词模式估算 GPTs 数量
         gpt_patterns = {
             'calculator': 50,
@@ -58,48 +270,53 @@ class GPTsAnalyzer:
         
         return count
     
-    def analyze(self, keywords):
-        """分析关键词的 GPTs 对比 - V3 增强版"""
+    def analyze(self, keywords, deadline=None):
+        """分析关键词的 GPTs 对比 - V3 增强版（deadline 到点后返回已分析的部分）"""
         results = {}
         
+        # 纯本地计算，不需要限速
         for keyword in keywords:
-            try:
-                gpts_count = self._search_gpts(keyword)
-                
-                # 估算搜索量（V3 改进）
-                search_volume = self._estimate_volume(keyword)
-                
-                # 计算比值（V3: 显示 avg_ratio）
-                ratio = gpts_count / max(search_volume, 1)
-                
-                # 计算热度得分
-                score = self._calc_score(ratio, search_volume)
-                
-                results[keyword] = {
-                    'keyword': keyword,
-                    'gpts_count': gpts_count,
-                    'estimated_volume': search_volume,
-                    'ratio': round(ratio, 4),  # V3: 显示原始比值
-                    'avg_ratio': round(ratio, 4),  # V3: 别名，方便使用
-                    'trend_score': score,
-                    'status': 'success'
-                }
-                
-                time.sleep(0.2)
-                
-            except Exception as e:
-                results[keyword] = {
-                    'keyword': keyword,
-                    'gpts_count': 0,
-                    'estimated_volume': 100,
-                    'ratio': 0,
-                    'avg_ratio': 0,
-                    'trend_score': 50,
-                    'status': f'error: {str(e)}'
-                }
+            if deadline is not None and deadline.expired():
+                break
+            results[keyword] = self.analyze_keyword(keyword)
         
         return results
     
+    def analyze_keyword(self, keyword):
+        """单个关键词的 GPTs 对比"""
+        try:
+            gpts_count = self._search_gpts(keyword)
+            
+            # 估算搜索量（V3 改进）
+            search_volume = self._estimate_volume(keyword)
+            
+            # 计算比值（V3: 显示 avg_ratio）
+            ratio = gpts_count / max(search_volume, 1)
+            
+            # 计算热度得分
+            score = self._calc_score(ratio, search_volume)
+            
+            return {
+                'keyword': keyword,
+                'gpts_count': gpts_count,
+                'estimated_volume': search_volume,
+                'ratio': round(ratio, 4),  # V3: 显示原始比值
+                'avg_ratio': round(ratio, 4),  # V3: 别名，方便使用
+                'trend_score': score,
+                'status': 'success'
+            }
+            
+        except Exception as e:
+            return {
+                'keyword': keyword,
+                'gpts_count': 0,
+                'estimated_volume': 100,
+                'ratio': 0,
+                'avg_ratio': 0,
+                'trend_score': 50,
+                'status': f'error: {str(e)}'
+            }
+    
     def _estimate_volume(self, keyword):
         """估算搜索量 - V3 增强版"""
         # 简化的估算：基于关键词特征
@@ -156,3 +373,30 @@ class GPTsAnalyzer:
             score += 5
         
         return min(100, score)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPT Store 快照索引")
+    parser.add_argument("--import", dest="snapshot", metavar="FILE",
+                        help="导入快照（JSON / JSON Lines / CSV，可以是 http(s) 地址）")
+    parser.add_argument("--count", nargs="+", metavar="KEYWORD", help="查询匹配的 GPT 数")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    index = GPTStoreIndex()
+    snapshot = args.snapshot
+    if snapshot and snapshot.startswith(("http://", "https://")):
+        snapshot = download_snapshot(snapshot)
+        if snapshot is None:
+            print("✅ 远程快照没有变化（304），沿用现有索引")
+    if snapshot:
+        index.import_snapshot(read_snapshot(snapshot))
+    print(f"📊 快照: {index.size:,} 个 GPTs")
+    if args.count:
+        analyzer = GPTsAnalyzer(index)
+        for keyword, result in analyzer.analyze(args.count).items():
+            print(f"   {keyword}: {index.count(keyword)} 个 GPTs, 比值 {result['ratio']}")
+
+
+if __name__ == "__main__":
+    main()
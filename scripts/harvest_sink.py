@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+挖词结果去重 - 固定内存预算，超出部分溢写到磁盘
+==============================================
+
+harvest / run_pipeline / run_super_hunter 以前把所有建议词堆在一个 set 里，
+再 list(...)、list(set(...)) 复制好几遍，种子词多、前缀展开深时内存就是在这里暴涨。
+
+SpillingDedupSink 在内存里最多保留 max_items 条，满了就排序后写成一个「有序段」文件；
+遍历时用 heapq.merge 归并所有有序段和内存中的剩余部分，相邻去重，
+下游拿到的是按字母序的唯一关键词流，可以反复遍历。
+"""
+
+import heapq
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Iterable, Iterator, List, Optional
+
+from config import HARVEST_MEMORY_ITEMS
+
+MAX_RUNS = 64  # 有序段超过该数量时先合并成一段，避免同时打开过多文件
+
+
+def _clean(item) -> str:
+    return str(item).replace("\n", " ").strip()
+
+
+class SpillingDedupSink:
+    """内存有界的去重集合（只支持添加和有序遍历）"""
+
+    def __init__(self, max_items: int = HARVEST_MEMORY_ITEMS, tmp_dir: str = None):
+        self.max_items = max_items
+        self.tmp_dir = tmp_dir
+        self._buffer = set()
+        self._runs: List[str] = []
+        self._dir: Optional[str] = None
+        self._finalizer = None
+        self._count: Optional[int] = None
+        self.spills = 0
+        self._seq = 0
+
+    # ============ 写入 ============
+
+    def add(self, item):
+        item = _clean(item)
+        if not item:
+            return
+        self._buffer.add(item)
+        self._count = None
+        if len(self._buffer) >= self.max_items:
+            self._spill()
+
+    def update(self, items: Iterable):
+        for item in items:
+            self.add(item)
+
+    def _spill(self):
+        """把内存中的部分排序后写成一个有序段"""
+        if not self._buffer:
+            return
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="harvest_", dir=self.tmp_dir)
+            # 即使调用方忘了 close，对象回收时也会删除临时目录
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._dir, True)
+        self._runs.append(self._write_run(sorted(self._buffer)))
+        self._buffer.clear()
+        self.spills += 1
+        if len(self._runs) > MAX_RUNS:
+            self._compact()
+
+    def _write_run(self, items: Iterable[str]) -> str:
+        self._seq += 1
+        path = os.path.join(self._dir, f"run_{self._seq:06d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for item in items:
+                f.write(item + "\n")
+        return path
+
+    def _compact(self):
+        """把现有的有序段归并成一段"""
+        runs, self._runs = self._runs, []
+        merged = self._write_run(self._merge(runs, []))
+        for path in runs:
+            os.remove(path)
+        self._runs = [merged]
+
+    # ============ 读取 ============
+
+    @staticmethod
+    def _merge(runs: List[str], memory: List[str]) -> Iterator[str]:
+        files = [open(path, encoding="utf-8") for path in runs]
+        try:
+            streams = [(line.rstrip("\n") for line in f) for f in files] + [iter(memory)]
+            last = None
+            for item in heapq.merge(*streams):
+                if item != last:
+                    yield item
+                    last = item
+        finally:
+            for f in files:
+                f.close()
+
+    def __iter__(self) -> Iterator[str]:
+        """按字母序遍历唯一关键词（流式，内存占用与 max_items 同级）"""
+        if not self._runs:
+            return iter(sorted(self._buffer))
+        return self._merge(self._runs, sorted(self._buffer))
+
+    def __len__(self) -> int:
+        """唯一关键词数量（有溢写时需要遍历一次，结果会缓存到下次写入前）"""
+        if self._count is None:
+            self._count = len(self._buffer) if not self._runs else sum(1 for _ in self)
+        return self._count
+
+    def close(self):
+        """删除溢写的临时文件"""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._runs = []
+        self._buffer.clear()
+        self._count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+关键词倒排索引 - 词 / 二元组倒排 + 压缩整数表
+============================================
+
+KeywordScorer._assess_pseo_potential 只看词数和有没有 " to " / " from "，
+从来不看语料里实际有多少同模板的兄弟词。这里给所有挖到过的关键词建一个倒排索引：
+
+- 词条：单词、相邻二元组（首尾带边界标记，"^ pdf" / "converter $"）、带位置的单词、词数
+- 倒排表：关键词 id 升序，按 128 个一块存差分，块内按最大差值选 1 / 2 / 4 字节定宽
+  （解码就是 array.frombytes + 累加，全在 C 里），每块记录首个 id 和偏移（跳表），
+  求交时用最短的表驱动，其它表只解码命中的块
+- 模板查询："* to * converter" 展开为「位置单词 + 词数 + 不碰槽位的二元组」的交集，
+  按 df 从小到大求交；同族词数（模板家族大小）直接给 pSEO 评分用
+
+索引存在 data/keyword_index.db（SQLite），每次运行把新挖到的词追加进去：
+新 id 总是更大，追加时只重编码每个词条的最后一块。
+
+Usage:
+    python keyword_index.py --add data/ultimate_final_results.csv   # 导入 CSV 的 keyword 列
+    python keyword_index.py --query "* to * converter" --pain       # 带痛点信号的 X to Y 转换器
+    python keyword_index.py --family "pdf to word converter"        # 各模板家族大小
+    python keyword_index.py --stats
+"""
+
+import argparse
+import csv
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import DATA_DIR, PAIN_TRIGGERS
+
+logger = logging.getLogger(__name__)
+
+BLOCK = 128                 # 每块 id 数
+SLOT = "*"                  # 模板槽位
+BOS, EOS = "\x02", "\x03"   # 首尾边界标记（不会出现在真实关键词里）
+LENGTH = "\x01len:"         # 词数词条前缀
+POSITION = "\x01@"          # 位置词条前缀（"\x01@2:to" = 第 3 个词是 to）
+CACHE_TERMS = 4096          # 内存里最多缓存的倒排表数
+MAX_FAMILY_MEMO = 100_000   # 模板家族大小的记忆条数
+MAX_SET_DF = 200_000        # df 不超过这个值的词条解码成集合缓存（求交走集合运算）
+DECODED_CACHE_IDS = 5_000_000  # 解码集合缓存的 id 总数上限
+COMMIT_EVERY = 200_000      # add() 每攒这么多新词自动提交一次
+
+
+def tokenize(keyword: str) -> List[str]:
+    """与评分器一致：小写 + 按空白切分"""
+    return keyword.lower().split()
+
+
+def keyword_terms(tokens: Sequence[str]) -> List[str]:
+    """一个关键词的全部词条（去重）"""
+    padded = [BOS, *tokens, EOS]
+    terms = set(tokens)
+    terms.update(f"{a} {b}" for a, b in zip(padded, padded[1:]))
+    terms.update(f"{POSITION}{i}:{token}" for i, token in enumerate(tokens))
+    terms.add(f"{LENGTH}{len(tokens)}")
+    return list(terms)
+
+
+def template_terms(tokens: Sequence[str]) -> List[str]:
+    """
+    模板（含 * 槽位）需要命中的词条：每个非槽位词的位置词条 + 词数（两者合起来就是精确匹配），
+    再加上不碰槽位的二元组（通常比位置词条稀有得多，用来驱动求交）
+
+    例如 "* to * converter" → ["converter $", "@1:to", "@3:converter", 词数 4]
+    """
+    padded = [BOS, *tokens, EOS]
+    terms = {f"{a} {b}" for a, b in zip(padded, padded[1:]) if SLOT not in (a, b)}
+    terms.update(f"{POSITION}{i}:{token}" for i, token in enumerate(tokens) if token != SLOT)
+    terms.add(f"{LENGTH}{len(tokens)}")
+    return sorted(terms)
+
+
+# ============ 压缩整数表 ============
+
+WIDTHS = ("B", "H", "I")     # 块内差值的存储宽度（1 / 2 / 4 字节），每块开头一个字节记录用哪种
+
+
+def encode_blocks(ids: Sequence[int], first_id: array = None, offsets: array = None,
+                  data: bytearray = None) -> Tuple[array, array, bytearray]:
+    """升序 id → (每块首 id, 每块字节偏移, 分块定宽差值数据)；传入已有结构时在末尾追加"""
+    first_id = first_id if first_id is not None else array("I")
+    offsets = offsets if offsets is not None else array("I")
+    data = data if data is not None else bytearray()
+    for start in range(0, len(ids), BLOCK):
+        block = ids[start:start + BLOCK]
+        first_id.append(block[0])
+        offsets.append(len(data))
+        deltas = [b - a for a, b in zip(block, block[1:])]
+        largest = max(deltas, default=0)
+        width = 0 if largest < 0x100 else 1 if largest < 0x10000 else 2
+        data.append(width)
+        data += array(WIDTHS[width], deltas).tobytes()
+    return first_id, offsets, data
+
+
+class PostingList:
+    """一个词条的倒排表（分块差分，块内定宽）"""
+
+    __slots__ = ("df", "first_id", "offsets", "data", "_cached")
+
+    def __init__(self, df: int, first_id: array, offsets: array, data: bytes):
+        self.df = df
+        self.first_id = first_id
+        self.offsets = offsets
+        self.data = data
+        self._cached: Tuple[int, List[int]] = (-1, [])  # 最近解码的 (块号, id 列表)，整体替换保证线程安全
+
+    @classmethod
+    def from_ids(cls, ids: Sequence[int]) -> "PostingList":
+        first_id, offsets, data = encode_blocks(ids)
+        return cls(len(ids), first_id, offsets, bytes(data))
+
+    @classmethod
+    def from_blobs(cls, df: int, skips: bytes, data: bytes) -> "PostingList":
+        table = array("I")
+        table.frombytes(skips)
+        half = len(table) // 2
+        return cls(df, table[:half], table[half:], data)
+
+    def to_blobs(self) -> Tuple[bytes, bytes]:
+        return self.first_id.tobytes() + self.offsets.tobytes(), bytes(self.data)
+
+    def __len__(self):
+        return self.df
+
+    def block(self, n: int) -> List[int]:
+        """解码第 n 块（最近一次解码的块会被缓存，顺序探测时不重复解码）"""
+        cached = self._cached
+        if cached[0] == n:
+            return cached[1]
+        pos = self.offsets[n]
+        end = self.offsets[n + 1] if n + 1 < len(self.offsets) else len(self.data)
+        deltas = array(WIDTHS[self.data[pos]])
+        deltas.frombytes(self.data[pos + 1:end])
+        ids = list(accumulate(deltas, initial=self.first_id[n]))
+        self._cached = (n, ids)
+        return ids
+
+    def __iter__(self):
+        for n in range(len(self.first_id)):
+            yield from self.block(n)
+
+    def ids(self) -> List[int]:
+        """整表解码"""
+        ids = []
+        for n in range(len(self.first_id)):
+            ids.extend(self.block(n))
+        return ids
+
+    def __contains__(self, doc_id: int) -> bool:
+        n = bisect_right(self.first_id, doc_id) - 1
+        if n < 0:
+            return False
+        block = self.block(n)
+        i = bisect_left(block, doc_id)
+        return i < len(block) and block[i] == doc_id
+
+    def append(self, ids: Sequence[int]):
+        """追加更大的 id：只重编码最后一块"""
+        if not ids:
+            return
+        added = len(ids)
+        data = bytearray(self.data)
+        if len(self.first_id):
+            last = self.block(len(self.first_id) - 1)
+            del data[self.offsets[-1]:]
+            self.first_id.pop()
+            self.offsets.pop()
+            ids = last + list(ids)
+        encode_blocks(ids, self.first_id, self.offsets, data)
+        self.df += added
+        self.data = bytes(data)
+        self._cached = (-1, [])
+
+
+# ============ 索引 ============
+
+class KeywordIndex:
+    """全部历史关键词的倒排索引 (SQLite 持久化)"""
+
+    def __init__(self, path=None):
+        self.path = path or Path(DATA_DIR) / "keyword_index.db"
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS keywords (
+                id INTEGER PRIMARY KEY,
+                keyword TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL,
+                skips BLOB NOT NULL,
+                data BLOB NOT NULL
+            );
+        """)
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0]
+        self._next_id = (self.conn.execute("SELECT MAX(id) FROM keywords").fetchone()[0] or 0) + 1
+        self._cache: Dict[str, PostingList] = {}
+        self._pending: Dict[str, List[int]] = {}
+        self._pending_keywords: List[Tuple[int, str]] = []
+        self._family_memo: Dict[Tuple[str, ...], int] = {}
+        self._sets: Dict[str, frozenset] = {}
+        self._set_ids = 0
+
+    # ============ 写入 ============
+
+    def add(self, keywords: Iterable[str]) -> int:
+        """加入新关键词（已存在的跳过），返回新增数；攒够 COMMIT_EVERY 个自动提交"""
+        added = 0
+        with self._lock:
+            seen = {kw for _, kw in self._pending_keywords}
+            for keyword in keywords:
+                keyword = " ".join(tokenize(keyword))
+                if not keyword or keyword in seen:
+                    continue
+                if self.conn.execute("SELECT 1 FROM keywords WHERE keyword = ?", (keyword,)).fetchone():
+                    continue
+                seen.add(keyword)
+                doc_id = self._next_id
+                self._next_id += 1
+                self._pending_keywords.append((doc_id, keyword))
+                for term in keyword_terms(keyword.split()):
+                    self._pending.setdefault(term, []).append(doc_id)
+                added += 1
+                if len(self._pending_keywords) >= COMMIT_EVERY:
+                    self._commit_locked()
+                    seen = set()
+        return added
+
+    def commit(self):
+        with self._lock:
+            self._commit_locked()
+
+    def _commit_locked(self):
+        if not self._pending_keywords:
+            return
+        start = time.time()
+        with self.conn:
+            self.conn.executemany("INSERT INTO keywords (id, keyword) VALUES (?, ?)", self._pending_keywords)
+            for term, ids in self._pending.items():
+                posting = self._load_locked(term)
+                if posting is None:
+                    posting = PostingList.from_ids(ids)
+                else:
+                    posting.append(ids)
+                skips, data = posting.to_blobs()
+                self.conn.execute("INSERT OR REPLACE INTO postings (term, df, skips, data) VALUES (?, ?, ?, ?)",
+                                  (term, posting.df, skips, data))
+        self.size += len(self._pending_keywords)
+        logger.info(f"🗂️ 关键词索引: +{len(self._pending_keywords)} 个词, {len(self._pending)} 个词条更新, "
+                    f"共 {self.size} 个词 ({time.time() - start:.1f} 秒)")
+        self._pending, self._pending_keywords = {}, []
+        self._cache.clear()
+        self._family_memo.clear()
+        self._sets.clear()
+        self._set_ids = 0
+
+    # ============ 读取 ============
+
+    def _load_locked(self, term: str) -> Optional[PostingList]:
+        posting = self._cache.get(term)
+        if posting is not None:
+            return posting
+        row = self.conn.execute("SELECT df, skips, data FROM postings WHERE term = ?", (term,)).fetchone()
+        if row is None:
+            return None
+        posting = PostingList.from_blobs(*row)
+        if len(self._cache) >= CACHE_TERMS:
+            self._cache.clear()
+        self._cache[term] = posting
+        return posting
+
+    def posting(self, term: str) -> PostingList:
+        with self._lock:
+            return self._load_locked(term) or PostingList.from_ids([])
+
+    def df(self, term: str) -> int:
+        return len(self.posting(term))
+
+    def keywords(self, ids: Sequence[int]) -> List[str]:
+        """id → 关键词文本（保持顺序）"""
+        if not ids:
+            return []
+        with self._lock:
+            rows = dict(self.conn.execute(
+                f"SELECT id, keyword FROM keywords WHERE id IN ({','.join('?' * len(ids))})", list(ids)))
+        return [rows[i] for i in ids if i in rows]
+
+    def __contains__(self, keyword: str) -> bool:
+        """关键词是否已在索引里（已提交的，和倒排表一致）"""
+        keyword = " ".join(tokenize(keyword))
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM keywords WHERE keyword = ?", (keyword,)).fetchone() is not None
+
+    # ============ 查询 ============
+
+    def _id_set(self, term: str, posting: PostingList) -> frozenset:
+        """解码成集合（df 不超过 MAX_SET_DF 的词条缓存起来，后续求交走 C 实现的集合运算）"""
+        ids = self._sets.get(term)
+        if ids is None:
+            ids = frozenset(posting.ids())
+            if posting.df <= MAX_SET_DF:
+                if self._set_ids + posting.df > DECODED_CACHE_IDS:
+                    self._sets.clear()
+                    self._set_ids = 0
+                self._sets[term] = ids
+                self._set_ids += posting.df
+        return ids
+
+    def _refine(self, candidates: set, term: str, posting: PostingList) -> set:
+        """
+        候选集 ∩ 一个词条
+
+        已缓存的集合直接求交；候选少到逐个探测（每个最多解码一块）比整表解码便宜时按块探测；
+        否则解码成集合（不大的词条顺便缓存）
+        """
+        ids = self._sets.get(term)
+        if ids is None and (posting.df > MAX_SET_DF or len(candidates) * BLOCK < posting.df):
+            return {doc_id for doc_id in sorted(candidates) if doc_id in posting}
+        return candidates & (ids or self._id_set(term, posting))
+
+    def match_terms(self, terms: Iterable[str], limit: int = None) -> List[int]:
+        """
+        同时命中所有词条的关键词 id（升序）
+
+        从 df 最小的词条开始：小表解码成集合求交；最小的表也很大时改为流式遍历 + 按块探测，
+        给了 limit 就提前停止
+        """
+        postings = sorted(((t, self.posting(t)) for t in set(terms)), key=lambda item: item[1].df)
+        if not postings or postings[0][1].df == 0:
+            return []
+        term, smallest = postings[0]
+        if smallest.df > MAX_SET_DF:
+            result = []
+            for doc_id in smallest:
+                if all(doc_id in posting for _, posting in postings[1:]):
+                    result.append(doc_id)
+                    if limit is not None and len(result) >= limit:
+                        break
+            return result
+        candidates = set(self._id_set(term, smallest))
+        for term, posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = self._refine(candidates, term, posting)
+        result = sorted(candidates)
+        return result[:limit] if limit is not None else result
+
+    @staticmethod
+    def phrase_terms(phrase: str) -> List[str]:
+        """短语 → 词条：单词取本身，多词取相邻二元组（三词以上是近似匹配）"""
+        tokens = tokenize(phrase)
+        if len(tokens) == 1:
+            return tokens
+        return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def template_ids(self, template: str, limit: int = None) -> List[int]:
+        """模板（* 为槽位）匹配的关键词 id，例如 "* to * converter" """
+        return self.match_terms(template_terms(tokenize(template)), limit)
+
+    def query(self, template: str = None, all_of: Sequence[str] = (), any_of: Sequence[str] = (),
+              limit: int = 100) -> List[str]:
+        """组合查询：模板 ∩ 所有 all_of 短语 ∩ 至少一个 any_of 短语，返回前 limit 个关键词"""
+        terms = template_terms(tokenize(template)) if template else []
+        for phrase in all_of:
+            terms += self.phrase_terms(phrase)
+        if not any_of:
+            return self.keywords(self.match_terms(terms, limit)) if terms else []
+
+        if terms:
+            candidates = set(self.match_terms(terms))
+            matched = set()
+            for phrase in any_of:
+                rest = candidates - matched
+                for term in self.phrase_terms(phrase):
+                    if not rest:
+                        break
+                    rest = self._refine(rest, term, self.posting(term))
+                matched |= rest
+        else:
+            matched = set()
+            for phrase in any_of:
+                matched.update(self.match_terms(self.phrase_terms(phrase)))
+        return self.keywords(sorted(matched)[:limit])
+
+    def families(self, keyword: str) -> List[Tuple[str, int]]:
+        """
+        关键词所属的模板家族及大小（不含自身），按大小降序
+
+        每个位置换成槽位算一个单槽家族；含 to / from / vs 时再算两侧都换成槽位的 "X to Y" 家族。
+        关键词自己在索引里时每个家族都会匹配到它，减掉；不在索引里（如 pSEO 候选）时不减
+        """
+        tokens = tokenize(keyword)
+        own = 1 if keyword in self else 0
+        templates = []
+        for i in range(len(tokens)):
+            templates.append(tokens[:i] + [SLOT] + tokens[i + 1:])
+        for i, token in enumerate(tokens[1:-1], 1):
+            if token in ("to", "from", "vs"):
+                templates.append(tokens[:i - 1] + [SLOT, token, SLOT] + tokens[i + 2:])
+        families = []
+        for template in templates:
+            key = tuple(template)
+            size = self._family_memo.get(key)
+            if size is None:
+                if len(self._family_memo) >= MAX_FAMILY_MEMO:
+                    self._family_memo.clear()
+                size = self._family_memo[key] = len(self.match_terms(template_terms(template)))
+            if size > own:
+                families.append((" ".join(template), size - own))
+        families.sort(key=lambda item: item[1], reverse=True)
+        return families
+
+    def family_size(self, keyword: str) -> Tuple[str, int]:
+        """最大的模板家族 (模板, 兄弟词数)；没有时返回 ("", 0)"""
+        families = self.families(keyword)
+        return families[0] if families else ("", 0)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_index: Optional[KeywordIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_keyword_index(create: bool = False) -> Optional[KeywordIndex]:
+    """进程内共享的关键词索引；索引文件还不存在且 create=False 时返回 None"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = Path(DATA_DIR) / "keyword_index.db"
+            if not create and not path.exists():
+                return None
+            _index = KeywordIndex(path)
+        return _index
+
+
+def _read_csv_keywords(path: str) -> Iterable[str]:
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("keyword"):
+                yield row["keyword"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词倒排索引")
+    parser.add_argument("--add", nargs="+", metavar="CSV", help="导入 CSV 的 keyword 列")
+    parser.add_argument("--query", metavar="TEMPLATE", help='模板查询，* 为槽位，例如 "* to * converter"')
+    parser.add_argument("--all", nargs="+", default=[], help="必须包含的短语")
+    parser.add_argument("--pain", action="store_true", help="只要带痛点信号的词")
+    parser.add_argument("--family", metavar="KEYWORD", help="查看关键词的模板家族")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    index = get_keyword_index(create=True)
+    if args.add:
+        for path in args.add:
+            index.add(_read_csv_keywords(path))
+        index.commit()
+    if args.stats:
+        terms = index.conn.execute("SELECT COUNT(*), SUM(LENGTH(data) + LENGTH(skips)) FROM postings").fetchone()
+        print(f"📊 {index.size:,} 个关键词, {terms[0]:,} 个词条, 倒排表 {(terms[1] or 0) / 1024 / 1024:.1f} MB")
+    if args.query or args.all or args.pain:
+        pain = PAIN_TRIGGERS['critical'] + PAIN_TRIGGERS['medium'] if args.pain else ()
+        start = time.time()
+        results = index.query(args.query, args.all, pain, limit=args.limit)
+        print(f"🔎 {len(results)} 个结果 ({(time.time() - start) * 1000:.1f} ms)")
+        for keyword in results:
+            print(f"   {keyword}")
+    if args.family:
+        start = time.time()
+        families = index.families(args.family)
+        print(f"👪 {args.family} ({(time.time() - start) * 1000:.1f} ms)")
+        for template, size in families:
+            print(f"   {template}: {size} 个兄弟词")
+
+
+if __name__ == "__main__":
+    main()
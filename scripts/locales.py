@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+多市场并发运行 - 多个 (hl, geo) 共享一个响应缓存和结果库
+======================================================
+
+以前所有抓取都写死英文 / 美国（suggest 的 hl=en、TrendReq(hl='en-US')、SERP URL），
+而 PAIN_SIGNALS / NEED_INDICATORS 里早就有中文信号。要覆盖几个市场只能跑几遍。
+
+MultiLocaleRunner 把几个市场放在一次运行里：
+- 各市场并发挖词，每个市场一个 suggest 限速器，响应走同一个 ResponseCache
+- 各市场的词合并去重：跨市场重复的词只按主市场（第一个挖到它的市场）做一次 SERP 规则 /
+  深度搜索补全和一次评分；只有 Trends 这类按市场区分的数据才按 (词, 市场) 分别补全
+- 词 → 市场的对应关系不整体放进内存：各市场的挖词结果本来就是有序、去重、超出预算溢写到
+  磁盘的 SpillingDedupSink，KeywordLocales 对它们做有序归并，按词分组流式产出
+- 补全结果写入同一个 SourceStore（source 名带市场后缀），TTL 内的结果跨运行复用
+- 传入 deadline.RunDeadline 时，挖词 / GPTs 对比 / 补全各阶段按比例截止，到点交出部分结果
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import LOCALES, LOCALE_RESULT_MAX_AGE
+from fetch import Fetcher, get_fetcher
+
+logger = logging.getLogger(__name__)
+
+# Trends 的时区参数（分钟，UTC 以西为正）
+LOCALE_TZ = {
+    "US": 360, "GB": 0, "DE": -60, "FR": -60, "ES": -60, "IT": -60,
+    "IN": -330, "JP": -540, "CN": -480, "TW": -480, "HK": -480, "SG": -480,
+    "AU": -600, "BR": 180, "CA": 300, "MX": 360,
+}
+# 这些语言 Google 用完整的 语言-地区 作为 hl
+FULL_TAG_LANGUAGES = {"zh", "pt"}
+
+
+class Locale:
+    """一个市场：界面语言 hl + 地区 geo"""
+
+    def __init__(self, hl: str, geo: str = ""):
+        self.hl = hl
+        self.geo = geo.upper()
+
+    @classmethod
+    def parse(cls, code: str) -> "Locale":
+        """'en-US' / 'zh-CN' / 'de' → Locale"""
+        language, _, region = code.strip().replace("_", "-").partition("-")
+        language = language.lower()
+        hl = f"{language}-{region.upper()}" if language in FULL_TAG_LANGUAGES and region else language
+        return cls(hl, region)
+
+    @property
+    def code(self) -> str:
+        language = self.hl.split("-")[0]
+        return f"{language}-{self.geo}" if self.geo else language
+
+    @property
+    def trends_hl(self) -> str:
+        return self.code
+
+    @property
+    def tz(self) -> int:
+        return LOCALE_TZ.get(self.geo, 360)
+
+    def params(self) -> Dict[str, str]:
+        """suggest / SERP 请求的 hl + gl 参数"""
+        params = {"hl": self.hl}
+        if self.geo:
+            params["gl"] = self.geo.lower()
+        return params
+
+    def __eq__(self, other):
+        return isinstance(other, Locale) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return f"Locale({self.code})"
+
+
+def parse_locales(codes) -> List[Locale]:
+    """逗号分隔字符串或列表 → 去重后的 Locale 列表"""
+    if isinstance(codes, str):
+        codes = codes.split(",")
+    return list(dict.fromkeys(Locale.parse(c) for c in codes if c.strip()))
+
+
+def _tagged(sink, rank: int) -> Iterator[Tuple[str, int]]:
+    for keyword in sink:
+        yield keyword, rank
+
+
+class KeywordLocales:
+    """
+    关键词 → 挖到它的市场代码列表（按市场顺序，第一个为主市场）
+
+    只持有各市场的 SpillingDedupSink（有序、去重、内存有界），遍历时归并，可以反复遍历；
+    用完 close() 删除溢写文件
+    """
+
+    def __init__(self, sinks: List[Tuple[str, object]]):
+        self.sinks = sinks          # [(市场代码, SpillingDedupSink)]，按市场顺序
+        self._counts: Optional[Dict[str, int]] = None
+
+    def items(self) -> Iterator[Tuple[str, List[str]]]:
+        """按字母序产出 (关键词, [市场代码, ...])"""
+        streams = [_tagged(sink, rank) for rank, (_, sink) in enumerate(self.sinks)]
+        for keyword, group in itertools.groupby(heapq.merge(*streams), key=lambda item: item[0]):
+            yield keyword, [self.sinks[rank][0] for _, rank in group]
+
+    def __iter__(self) -> Iterator[str]:
+        return (keyword for keyword, _ in self.items())
+
+    def keywords(self, code: str) -> Iterable[str]:
+        """某个市场挖到的词"""
+        return next(sink for c, sink in self.sinks if c == code)
+
+    def primary(self, code: str) -> Iterator[str]:
+        """主市场是 code 的词"""
+        return (keyword for keyword, codes in self.items() if codes[0] == code)
+
+    def counts(self) -> Dict[str, int]:
+        """{'total': 合并后词数, 'shared': 跨市场重复词数, 市场代码: 主市场为它的词数}（遍历一次，缓存）"""
+        if self._counts is None:
+            counts = dict.fromkeys([code for code, _ in self.sinks], 0)
+            counts.update(total=0, shared=0)
+            for _, codes in self.items():
+                counts["total"] += 1
+                counts["shared"] += len(codes) > 1
+                counts[codes[0]] += 1
+            self._counts = counts
+        return self._counts
+
+    def __len__(self) -> int:
+        return self.counts()["total"]
+
+    def annotate(self, rows: List[Dict], key: str = "keyword"):
+        """给结果行写上 _codes（市场代码列表）：行按关键词排序后与归并流对齐，不建整表字典"""
+        order = sorted(range(len(rows)), key=lambda i: rows[i][key])
+        stream = self.items()
+        current = next(stream, None)
+        for i in order:
+            keyword = rows[i][key]
+            while current is not None and current[0] < keyword:
+                current = next(stream, None)
+            rows[i]["_codes"] = current[1] if current is not None and current[0] == keyword else []
+
+    def close(self):
+        for _, sink in self.sinks:
+            sink.close()
+
+
+class MultiLocaleRunner:
+    """多市场挖词 + 补全 + 评分"""
+
+    def __init__(self, locales=None, fetcher: Fetcher = None, store=None, max_workers: int = None):
+        from source_store import SourceStore
+        self.locales = parse_locales(locales or LOCALES)
+        self.fetcher = fetcher or get_fetcher()
+        self.store = store or SourceStore()
+        self.max_workers = max_workers or len(self.locales) + 1
+        self.stats = {"reused": 0, "fetched": 0}
+        self._stats_lock = threading.Lock()   # 补全队列在线程池里并发更新
+
+    # ============ 挖词 ============
+
+    def harvest(self, seed_words: List[str], max_per_word: int = 20, deadline=None,
+                extra: Iterable[str] = ()) -> KeywordLocales:
+        """
+        各市场并发挖词，返回 KeywordLocales（调用方负责 close）；deadline 各市场共用
+
+        extra 里的词（如 pSEO 模板候选，英文模板拼出来的）记在第一个市场名下
+        """
+        from alphabet_soup import GoogleSuggestHarvester
+        from harvest_sink import SpillingDedupSink
+
+        def harvest_locale(locale: Locale):
+            harvester = GoogleSuggestHarvester(locale=locale, fetcher=self.fetcher)
+            sink = harvester.harvest(seed_words, max_per_word=max_per_word, sink=SpillingDedupSink(),
+                                     deadline=deadline)
+            logger.info(f"   [{locale.code}] {len(sink)} 个候选关键词")
+            return locale.code, sink
+
+        with ThreadPoolExecutor(max_workers=len(self.locales)) as pool:
+            sinks = list(pool.map(harvest_locale, self.locales))
+        sinks[0][1].update(extra)
+        keyword_locales = KeywordLocales(sinks)
+
+        counts = keyword_locales.counts()
+        logger.info(f"   → 合并后 {counts['total']} 个关键词，其中 {counts['shared']} 个跨市场重复（只补全 / 评分一次）")
+        return keyword_locales
+
+    # ============ 补全 ============
+
+    def _cached(self, source: str, fetch: Callable[[str], Optional[Dict]]) -> Callable[[str], Optional[Dict]]:
+        """结果先查共享的 SourceStore，TTL 内直接复用"""
+        def run(keyword: str):
+            cached = self.store.get(source, keyword, max_age=LOCALE_RESULT_MAX_AGE)
+            if cached is not None:
+                with self._stats_lock:
+                    self.stats["reused"] += 1
+                return cached
+            result = fetch(keyword)
+            if result is not None:
+                self.store.put(source, keyword, result)
+                with self._stats_lock:
+                    self.stats["fetched"] += 1
+            return result
+        return run
+
+    def enrich(self, keyword_locales: KeywordLocales, trends: bool = True, serp: bool = False,
+               deep: bool = False, limit: int = None, deadline=None) -> Dict[str, Dict]:
+        """
+        并发补全：每个市场一个 Trends 队列（只含该市场挖到的词），
+        外加按主市场分组的 SERP 规则 / 深度搜索队列（每个词只在它的主市场做一次）；
+        deadline (StageDeadline) 各队列共用，到点都停止派发
+
+        返回 {'trends': {市场代码: {kw: 结果}}, 'serp': {kw: 结果}, 'deep': {kw: 结果}}
+        """
+        from enrich_queue import EnrichmentBudget, EnrichmentQueue, build_stages
+        from scorer import KeywordScorer
+
+        jobs = []
+        if trends:
+            for locale in self.locales:
+                keywords = keyword_locales.keywords(locale.code)
+                stages = [(name, self._cached(f"{name}:{locale.code}", fn), cost)
+                          for name, fn, cost in build_stages(trends=True, locale=locale)]
+                jobs.append((locale.code, keywords, stages))
+        if serp or deep:
+            counts = keyword_locales.counts()
+            for locale in self.locales:
+                if not counts[locale.code]:
+                    continue
+                keywords = keyword_locales.primary(locale.code)
+                stages = [(name, self._cached(f"{name}:{locale.code}", fn), cost)
+                          for name, fn, cost in build_stages(serp=serp, deep=deep, locale=locale)]
+                jobs.append(("*" + locale.code, keywords, stages))
+
+        def run_job(job):
+            code, keywords, stages = job
+            queue = EnrichmentQueue(keywords, KeywordScorer(), capacity=limit)
+            # 并行的队列各占一个事件阶段（enrich:de-DE:trends / enrich:de-DE:serp+deep），进度和 ETA 各算各的
+            stage = f"enrich:{code.lstrip('*')}:{'+'.join(name for name, _, _ in stages)}"
+            return code, queue.run(stages, EnrichmentBudget(deadline=deadline), limit=limit, stage=stage)
+
+        enriched = {"trends": {}, "serp": {}, "deep": {}}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for code, results in pool.map(run_job, jobs):
+                if code.startswith("*"):
+                    enriched["serp"].update(results.get("serp", {}))
+                    enriched["deep"].update(results.get("deep", {}))
+                else:
+                    enriched["trends"][code] = results.get("trends", {})
+        logger.info(f"   → 补全结果: 复用 {self.stats['reused']} / 新请求 {self.stats['fetched']}")
+        return enriched
+
+    # ============ 评分 ============
+
+    @staticmethod
+    def merge_trends(by_locale: Dict[str, Dict]) -> Dict[str, Dict]:
+        """每个词取趋势分最高的市场作为评分输入，并记录是哪个市场（同分取靠前的市场）"""
+        merged = {}
+        for code, results in by_locale.items():
+            for keyword, result in results.items():
+                best = merged.get(keyword)
+                if result and (best is None or result.get('trend_score', 0) > best.get('trend_score', 0)):
+                    merged[keyword] = dict(result, locale=code)
+        return merged
+
+    def run(self, seed_words: List[str], max_per_word: int = 20, trends: bool = True,
+            serp: bool = False, deep: bool = False, limit: int = None, deadline=None,
+            hooks=None, extra: Iterable[str] = ()) -> List[Dict]:
+        """
+        hooks: 阶段钩子（profiling.StageHooks 等，begin / summary），默认是共享事件流
+        extra: 额外候选词（如 pSEO 模板候选），记在第一个市场名下
+        """
+        from deadline import RunDeadline
+        from events import get_events
+        from gpts_analyzer import GPTsAnalyzer
+        from scorer import KeywordScorer
+
+        deadline = deadline or RunDeadline()
+        hooks = hooks or get_events()
+        logger.info(f"🌍 多市场运行: {', '.join(l.code for l in self.locales)}")
+        hooks.begin("harvest")
+        keyword_locales = self.harvest(seed_words, max_per_word, deadline=deadline.stage("harvest"), extra=extra)
+        try:
+            hooks.begin("gpts")
+            gpts_data = GPTsAnalyzer().analyze(keyword_locales, deadline=deadline.stage("gpts"))
+            hooks.begin("enrich")
+            enriched = self.enrich(keyword_locales, trends=trends, serp=serp, deep=deep, limit=limit,
+                                   deadline=deadline.stage("enrich"))
+            trends_data = self.merge_trends(enriched["trends"])
+
+            hooks.begin("score")
+            scorer = KeywordScorer(trends_data, gpts_data, enriched["serp"], enriched["deep"])
+            final_results = scorer.get_final_results(scorer.score(keyword_locales))
+            keyword_locales.annotate(final_results)
+        finally:
+            keyword_locales.close()
+        for row in final_results:
+            codes = row.pop('_codes')
+            row['locales'] = ",".join(codes)
+            row['best_locale'] = trends_data.get(row['keyword'], {}).get('locale', codes[0] if codes else '')
+        hooks.summary()
+        logger.info(f"   → 抓取: {self.fetcher.stats['requests']} 次请求, 缓存命中 {self.fetcher.stats['cache_hits']}")
+        return final_results
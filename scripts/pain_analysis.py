@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+批量痛点分析 - 一次扫描大批帖子 / 评论，输出信号位图和汇总计数
+====================================================================
+
+reddit_store.post_flags（原 search_reddit_real 里的循环）以前对每条帖子各自 lower() 一遍，
+再拿 PAIN_TRIGGERS / SOLUTION_SEEKING_SIGNALS 逐个 `in`，一次只处理一条。
+一次运行挖几十万条 Reddit 帖子时这就是瓶颈。
+
+这里把所有类别的信号词（英文 + 中文）编译进一个 PhraseMatcher（字典树展开成的单个正则）：
+- 每条文本扫描一遍，得到一个整数位图（第 i 位 = 第 i 个信号词出现过）
+- 类别是位掩码，判断「是否含痛点」只需一次按位与
+- 汇总：每个信号词 / 每个类别命中的文本数
+- processes > 1 时按块分给多进程（每个进程各自编译一次匹配器），结果按输入顺序返回
+
+匹配语义与原来的 `phrase in text.lower()` 完全一致。
+
+Usage:
+    python pain_analysis.py --reddit                 # 扫描本地 Reddit 帖子库
+    python pain_analysis.py --file posts.txt -p 4    # 每行一条文本，4 个进程
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import PAIN_TRIGGERS, SCORING_MODELS, SOLUTION_SEEKING_SIGNALS, SUPER_PAIN_SIGNALS
+from phrase_matcher import PhraseMatcher
+
+CHUNK_SIZE = 2000    # 多进程模式每块文本数
+
+# 默认类别：评分用的痛点词、寻求解决方案、v3 超级痛点的四类（含中文）
+DEFAULT_CATEGORIES = {
+    "critical": PAIN_TRIGGERS["critical"],
+    "medium": PAIN_TRIGGERS["medium"],
+    "seeking": SOLUTION_SEEKING_SIGNALS,
+    **SUPER_PAIN_SIGNALS,
+}
+
+
+class PainReport:
+    """一批文本的分析结果：逐条位图 + 汇总计数"""
+
+    def __init__(self, analyzer: "PainAnalyzer"):
+        self.analyzer = analyzer
+        self.bitsets: List[int] = []
+        self.total = 0
+        self.phrase_counts = [0] * len(analyzer.matcher)
+
+    def add(self, bitsets: List[int], phrase_counts: Sequence[int]):
+        self.bitsets.extend(bitsets)
+        self.total += len(bitsets)
+        for pid, count in enumerate(phrase_counts):
+            self.phrase_counts[pid] += count
+
+    def category_counts(self) -> Dict[str, int]:
+        """每个类别至少命中一个信号词的文本数"""
+        masks = self.analyzer.masks
+        counts = dict.fromkeys(masks, 0)
+        for bits in self.bitsets:
+            if bits:
+                for category, mask in masks.items():
+                    if bits & mask:
+                        counts[category] += 1
+        return counts
+
+    def top_phrases(self, n: int = 20) -> List[tuple]:
+        """命中文本数最多的信号词 [(短语, 文本数)]"""
+        phrases = self.analyzer.matcher.phrases
+        ranked = sorted(((phrases[pid], c) for pid, c in enumerate(self.phrase_counts) if c),
+                        key=lambda item: item[1], reverse=True)
+        return ranked[:n]
+
+
+class PainAnalyzer:
+    """按类别组织的信号词，编译成一个匹配器"""
+
+    def __init__(self, categories: Dict[str, Sequence[str]] = None):
+        self.categories = dict(DEFAULT_CATEGORIES if categories is None else categories)
+        self.matcher = PhraseMatcher(phrase for phrases in self.categories.values() for phrase in phrases)
+        self.masks: Dict[str, int] = {}
+        for category, phrases in self.categories.items():
+            mask = 0
+            for phrase in phrases:
+                mask |= 1 << self.matcher.phrase_id(phrase)
+            self.masks[category] = mask
+
+    def bits(self, text: str) -> int:
+        """单条文本的信号位图"""
+        bits = 0
+        for pid in self.matcher.find(text.lower()):
+            bits |= 1 << pid
+        return bits
+
+    def has(self, bits: int, *categories: str) -> bool:
+        """位图是否命中任一给定类别"""
+        return any(bits & self.masks[c] for c in categories)
+
+    def phrases(self, bits: int, category: str = None) -> List[str]:
+        """位图里的信号词（可限定类别）"""
+        if category is not None:
+            bits &= self.masks[category]
+        return [phrase for pid, phrase in enumerate(self.matcher.phrases) if bits >> pid & 1]
+
+    def score(self, bits: int, model: str = "super_pain") -> float:
+        """
+        按 SCORING_MODELS[model] 从位图直接算分（与 scoring_engine 的结果一致）
+
+        类别名需与模型的规则名一致；只支持累加型模型（非 tier）。词表里重复的短语按一次计
+        """
+        spec = SCORING_MODELS[model]
+        if spec.get("mode") == "tier":
+            raise ValueError(f"{model} 是分档模型，不能从位图累加计分")
+        value = spec.get("base", 0)
+        for name, _, weight, mode in spec["rules"]:
+            hit = bits & self.masks[name]
+            if hit:
+                value += weight * (bin(hit).count("1") if mode == "each" else 1)
+        if spec.get("max") is not None:
+            value = min(spec["max"], value)
+        if spec.get("min") is not None:
+            value = max(spec["min"], value)
+        return value
+
+    def _analyze_chunk(self, texts: Sequence[str]):
+        """一块文本 → (位图列表, 每个信号词的命中文本数)"""
+        find = self.matcher.find
+        counts = [0] * len(self.matcher)
+        bitsets = []
+        for text in texts:
+            bits = 0
+            for pid in find(text.lower()):
+                bits |= 1 << pid
+                counts[pid] += 1
+            bitsets.append(bits)
+        return bitsets, counts
+
+    def analyze(self, texts: Iterable[str], processes: int = None,
+                chunk_size: int = CHUNK_SIZE) -> PainReport:
+        """
+        批量分析（texts 可以是任意可迭代对象，按块流式读取）
+
+        processes > 1 时用多进程；位图按输入顺序返回
+        """
+        report = PainReport(self)
+        chunks = _chunked(texts, chunk_size)
+        if not processes or processes <= 1:
+            for chunk in chunks:
+                report.add(*self._analyze_chunk(chunk))
+            return report
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(self.categories,)) as pool:
+            for bitsets, counts in pool.imap(_worker_chunk, chunks):
+                report.add(bitsets, counts)
+        return report
+
+
+def _chunked(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_worker: Optional[PainAnalyzer] = None
+
+
+def _init_worker(categories: Dict[str, Sequence[str]]):
+    global _worker
+    _worker = PainAnalyzer(categories)
+
+
+def _worker_chunk(texts: List[str]):
+    return _worker._analyze_chunk(texts)
+
+
+_analyzer: Optional[PainAnalyzer] = None
+
+
+def get_pain_analyzer() -> PainAnalyzer:
+    """进程内共享的默认分析器（按 config 编译一次）"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = PainAnalyzer()
+    return _analyzer
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量痛点分析")
+    parser.add_argument("--reddit", action="store_true", help="扫描本地 Reddit 帖子库（标题 + 正文）")
+    parser.add_argument("--file", help="文本文件，每行一条")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="进程数 (默认1)")
+    parser.add_argument("--top", type=int, default=20, help="显示命中最多的 N 个信号词")
+    args = parser.parse_args()
+
+    if args.reddit:
+        from reddit_store import RedditStore
+        texts = RedditStore().texts()
+    elif args.file:
+        texts = _read_lines(args.file)
+    else:
+        parser.error("需要 --reddit 或 --file")
+
+    analyzer = PainAnalyzer()
+    start = time.time()
+    report = analyzer.analyze(texts, processes=args.processes)
+    elapsed = time.time() - start
+    print(f"🩹 分析 {report.total:,} 条文本 ({elapsed:.1f} 秒, {report.total / max(elapsed, 1e-9):,.0f} 条/秒)")
+    for category, count in report.category_counts().items():
+        print(f"   {category}: {count:,} ({count / max(report.total, 1):.1%})")
+    print("🔝 高频信号词:")
+    for phrase, count in report.top_phrases(args.top):
+        print(f"   {phrase}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+多模式子串匹配 (短语字典树 → 一个编译好的正则)
+=============================================
+
+评分里到处是 `for signal in SIGNALS: if signal in keyword` —— 每个关键词要把
+所有词表扫一遍，词表越长越慢。这里把所有信号词建成一棵字典树，再把字典树
+展开成一个正则（公共前缀合并、同一位置优先最长短语），扫描全在 re 的 C 实现里完成：
+
+- 每次 search 找到下一个「有短语开头」的位置及该位置上最长的短语，从下一个字符继续，
+  所以每个出现过短语的起点都会被找到（包括互相重叠的短语）
+- 同一位置上更短的短语、以及长短语内部包含的短语，由预先算好的「包含表」一次补齐
+
+匹配语义与 `phrase in text` 完全一致（纯子串，不切词）。
+"""
+
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class PhraseMatcher:
+    """多短语匹配器：一次扫描找出文本中出现的所有短语"""
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._trie: Dict = {}
+        for phrase in phrases:
+            self.add(phrase)
+        self._build()
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def phrase_id(self, phrase: str) -> int:
+        return self._ids[phrase]
+
+    def add(self, phrase: str) -> int:
+        """登记短语，返回短语 id（重复登记返回同一个 id）"""
+        if phrase in self._ids:
+            return self._ids[phrase]
+        pid = len(self.phrases)
+        self.phrases.append(phrase)
+        self._ids[phrase] = pid
+        if not phrase:
+            return pid  # 空串不参与匹配
+        node = self._trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = pid
+        return pid
+
+    def _build(self):
+        """字典树 → 正则；每个短语 → 它包含的所有短语 id（含自身）"""
+        pattern = _trie_pattern(self._trie)
+        self._regex = re.compile(pattern) if pattern else None
+        words = [(pid, phrase) for pid, phrase in enumerate(self.phrases) if phrase]
+        self._contained: Dict[str, frozenset] = {
+            phrase: frozenset(other_id for other_id, other in words if other in phrase)
+            for _, phrase in words
+        }
+
+    def find(self, text: str) -> Set[int]:
+        """文本中出现过的短语 id 集合"""
+        found = set()
+        if self._regex is None:
+            return found
+        search, contained = self._regex.search, self._contained
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                return found
+            found |= contained[match.group()]
+            pos = match.start() + 1
+
+    def find_phrases(self, text: str) -> Set[str]:
+        return {self.phrases[pid] for pid in self.find(text)}
+
+
+def _trie_pattern(node: Dict) -> str:
+    """字典树节点 → 正则片段（分支按字符排序；节点本身是短语结尾时后续部分可选，贪婪 = 优先最长）"""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items(), key=lambda item: item[0] or "") if char is not None]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if None in node else body
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+分阶段性能剖析 - `--profile` 模式
+=================================
+
+定时任务变慢时，以前看不出时间花在 run_pipeline / run_super_hunter /
+ProfitHunterUltimate.run 的哪一步。打开 --profile 后每个阶段：
+
+- 用 cProfile 统计函数级耗时，写 `NN_<阶段>.pstats`（snakeviz / pstats 可直接打开）
+- 后台线程按固定间隔采样主线程调用栈，写 `NN_<阶段>.collapsed`
+  （折叠栈格式，flamegraph.pl / speedscope 可直接画火焰图；
+  采样按墙钟计，等待网络的时间也会出现在 socket / ssl 帧上）
+- 日志里输出 Top N 热点函数，以及按模块归类的采样占比（评分 / 解析 / 网络等待……）
+
+--profile-memory 打开 MemoryProfiler：每个阶段边界取 tracemalloc 快照和 RSS，
+记录各阶段的峰值、增长最多的分配位置和仍然占着内存的位置，写进
+memory_manifest.json，并与上一次运行的清单对比，方便发现内存回归。
+
+流水线按顺序调用 begin(阶段名)，下一次 begin 或 end 自动结束上一阶段；
+两种剖析可以用 StageHooks 组合；未启用时所有方法都是空操作，调用方不用判断。
+两种同时打开时快照不计入 CPU 剖析，但 tracemalloc 逐次分配记账的开销仍在阶段内，
+分配密集的阶段会变慢；`python profiling.py --check` 核对组合后的阶段耗时与只开 CPU 剖析一致。
+"""
+
+import argparse
+
+import cProfile
+import json
+import logging
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.005   # 采样间隔（秒）
+TOP_N = 15
+MEMORY_TOP_N = 10
+MEMORY_REGRESSION = 0.2   # 阶段峰值比上次运行增长超过 20% 时告警
+MANIFEST_FILE = "memory_manifest.json"
+MB = 1024 * 1024
+
+SCRIPTS_DIR = Path(__file__).parent.resolve()
+
+# 叶子附近出现这些模块的帧，说明在等网络 / 磁盘
+IO_MODULES = ("socket", "ssl", "selectors", "client", "connection", "connectionpool",
+              "sync_api", "_base_connection", "response", "sqlite3")
+
+
+def run_dir(base, kind: str = "profiles") -> Path:
+    """本次运行的输出目录：<base>/<kind>/<时间戳>"""
+    path = Path(base) / kind / datetime.now().strftime("%Y%m%d_%H%M%S")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@lru_cache(maxsize=4096)
+def _classify(filename: str) -> Optional[str]:
+    """从叶子往上第一个可归类的帧：网络等待 / 本仓库模块名"""
+    path = Path(filename).resolve()
+    if path.parent == SCRIPTS_DIR:
+        return path.stem
+    if path.stem in IO_MODULES:
+        return "io_wait"
+    return None
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """后台采样线程：定时抓取目标线程的调用栈并累计折叠栈"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.modules: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            module = None
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_label(code))
+                if module is None:
+                    module = _classify(code.co_filename)
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.modules[module or "other"] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """按阶段的 CPU 剖析器（cProfile + 调用栈采样）"""
+
+    def __init__(self, out_dir=None, enabled: bool = True, top_n: int = TOP_N,
+                 interval: float = SAMPLE_INTERVAL):
+        self.enabled = enabled and out_dir is not None
+        self.out_dir = Path(out_dir) if out_dir is not None else None
+        self.top_n = top_n
+        self.interval = interval
+        self.timings: Dict[str, float] = {}
+        self._index = 0
+        self._current: Optional[str] = None
+        self._started = 0.0
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        if self.enabled:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"🔬 性能剖析已开启，输出目录: {self.out_dir}")
+
+    def begin(self, name: str):
+        """进入新阶段（自动结束上一阶段）"""
+        if not self.enabled:
+            return
+        self.end()
+        self._index += 1
+        self._current = name
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # 已有别的剖析器在运行（例如外层套了 python -m cProfile），只保留采样
+            self._profile = None
+        self._started = time.perf_counter()
+
+    def end(self):
+        """结束当前阶段，写文件并输出热点"""
+        if not self.enabled or self._current is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        self._sampler.stop()
+
+        name, self._current = self._current, None
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        stem = self.out_dir / f"{self._index:02d}_{name}"
+
+        logger.info(f"🔬 [{name}] 耗时 {elapsed:.2f}s，采样 {sum(self._sampler.stacks.values())} 次")
+        if self._profile is not None:
+            self._profile.dump_stats(f"{stem}.pstats")
+            self._log_hotspots(pstats.Stats(self._profile))
+        self._write_collapsed(f"{stem}.collapsed", self._sampler.stacks)
+        self._log_modules(self._sampler.modules)
+        self._profile = None
+        self._sampler = None
+
+    def stage(self, name: str):
+        """with 写法：with profiler.stage("harvest"): ..."""
+        return _StageContext(self, name)
+
+    def summary(self) -> Dict[str, float]:
+        """结束最后一个阶段并输出各阶段耗时占比"""
+        self.end()
+        total = sum(self.timings.values())
+        if self.enabled and total:
+            logger.info("🔬 各阶段耗时:")
+            for name, seconds in sorted(self.timings.items(), key=lambda x: x[1], reverse=True):
+                logger.info(f"   {name}: {seconds:.2f}s ({seconds / total:.0%})")
+        return dict(self.timings)
+
+    # ============ 输出 ============
+
+    def _log_hotspots(self, stats: pstats.Stats):
+        rows = [(key, value) for key, value in stats.stats.items()
+                if key[0] != __file__ and "_lsprof" not in key[2]]  # 去掉剖析器自身
+        rows = sorted(rows, key=lambda item: item[1][2], reverse=True)[: self.top_n]
+        logger.info(f"   Top {len(rows)} 热点（自身耗时 / 累计耗时 / 调用次数）:")
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in rows:
+            where = f"{Path(filename).name}:{line}" if line else filename
+            logger.info(f"     {tottime:8.3f}s {cumtime:8.3f}s {calls:>9}  {func} ({where})")
+
+    @staticmethod
+    def _write_collapsed(path: str, stacks: Counter):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    @staticmethod
+    def _log_modules(modules: Counter):
+        total = sum(modules.values())
+        if not total:
+            return
+        parts = [f"{module} {count / total:.0%}" for module, count in modules.most_common(6)]
+        logger.info(f"   按模块: {', '.join(parts)}")
+
+
+class _StageContext:
+    def __init__(self, profiler: StageProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.begin(self.name)
+        return self.profiler
+
+    def __exit__(self, *exc):
+        self.profiler.end()
+        return False
+
+
+# ============ 内存 ============
+
+def rss_bytes() -> int:
+    """当前常驻内存（Linux 读 /proc，其它平台退回到峰值）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """进程启动以来的 RSS 峰值（ru_maxrss 在 Linux 是 KB，macOS 是字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _site(trace) -> str:
+    frame = trace.traceback[0]
+    return f"{Path(frame.filename).name}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """按阶段的内存记账（tracemalloc 快照 + RSS），结果写入运行清单"""
+
+    def __init__(self, out_dir=None, enabled: bool = True, top_n: int = MEMORY_TOP_N,
+                 frames: int = 1):
+        self.enabled = enabled and out_dir is not None
+        self.out_dir = Path(out_dir) if out_dir is not None else None
+        self.top_n = top_n
+        self.frames = frames
+        self.stages: List[Dict] = []
+        self._current: Optional[str] = None
+        self._started = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracing = False
+        self._run_started = datetime.now()
+        if self.enabled:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"🧠 内存记账已开启，输出目录: {self.out_dir}")
+
+    def begin(self, name: str):
+        if not self.enabled:
+            return
+        self.end()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracing = True
+        self._current = name
+        self._snapshot = self._take_snapshot()
+        tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+
+    def end(self):
+        if not self.enabled or self._current is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        current, peak = tracemalloc.get_traced_memory()
+        after = self._take_snapshot()
+        growth = after.compare_to(self._snapshot, "lineno")[: self.top_n]
+        holders = after.statistics("lineno")[: self.top_n]
+
+        name, self._current = self._current, None
+        delta = sum(stat.size_diff for stat in after.compare_to(self._snapshot, "filename"))
+        record = {
+            "stage": name,
+            "seconds": round(elapsed, 3),
+            "traced_mb": round(current / MB, 2),
+            "traced_peak_mb": round(peak / MB, 2),
+            "traced_delta_mb": round(delta / MB, 2),
+            "rss_mb": round(rss_bytes() / MB, 1),
+            "rss_peak_mb": round(peak_rss_bytes() / MB, 1),
+            "top_growth": [{"site": _site(stat), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                            "count_diff": stat.count_diff}
+                           for stat in growth if stat.size_diff > 0],
+            "top_holders": [{"site": _site(stat), "size_kb": round(stat.size / 1024, 1),
+                             "count": stat.count}
+                            for stat in holders],
+        }
+        self.stages.append(record)
+        self._snapshot = None
+
+        logger.info(f"🧠 [{name}] 峰值 {record['traced_peak_mb']}MB，阶段结束时 {record['traced_mb']}MB "
+                    f"({record['traced_delta_mb']:+}MB)，RSS {record['rss_mb']}MB")
+        for item in record["top_growth"][:3]:
+            logger.info(f"     +{item['size_diff_kb']}KB  {item['site']}")
+
+    def stage(self, name: str):
+        return _StageContext(self, name)
+
+    def summary(self) -> List[Dict]:
+        """结束最后一个阶段，写运行清单并与上一次运行对比"""
+        self.end()
+        if not self.enabled:
+            return self.stages
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+        manifest = {
+            "started": self._run_started.isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "peak_rss_mb": round(peak_rss_bytes() / MB, 1),
+            "stages": self.stages,
+        }
+        path = self.out_dir / MANIFEST_FILE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logger.info(f"🧠 内存清单: {path}（RSS 峰值 {manifest['peak_rss_mb']}MB）")
+        self._compare(self._previous_manifest())
+        return self.stages
+
+    def _previous_manifest(self) -> Optional[Dict]:
+        """同级目录里最近一次运行的清单"""
+        candidates = sorted(p for p in self.out_dir.parent.glob(f"*/{MANIFEST_FILE}")
+                            if p.parent != self.out_dir and p.parent.name < self.out_dir.name)
+        if not candidates:
+            return None
+        try:
+            with open(candidates[-1], encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _compare(self, previous: Optional[Dict]):
+        if not previous:
+            return
+        before = {s["stage"]: s for s in previous.get("stages", [])}
+        for record in self.stages:
+            old = before.get(record["stage"])
+            if not old or not old.get("traced_peak_mb"):
+                continue
+            change = record["traced_peak_mb"] / old["traced_peak_mb"] - 1
+            if change > MEMORY_REGRESSION:
+                logger.warning(f"⚠️ [{record['stage']}] 内存峰值 {old['traced_peak_mb']}MB → "
+                               f"{record['traced_peak_mb']}MB ({change:+.0%})，比上次运行 ({previous['started']}) 明显增加")
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        # 去掉 tracemalloc 和剖析器自身的记账开销
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+
+class StageHooks:
+    """
+    把多个剖析器组合成一个：begin 按顺序转发，end / summary 按逆序转发
+
+    排在前面的是外层：切换阶段时先逆序结束所有剖析器，再顺序开始，
+    这样 MemoryProfiler 的快照 / 对比总在 StageProfiler 停下之后、开始之前执行，
+    不计入 CPU 剖析的耗时和热点
+    """
+
+    def __init__(self, *profilers):
+        self.profilers = profilers
+
+    def begin(self, name: str):
+        self.end()
+        for profiler in self.profilers:
+            profiler.begin(name)
+
+    def end(self):
+        for profiler in reversed(self.profilers):
+            profiler.end()
+
+    def stage(self, name: str):
+        return _StageContext(self, name)
+
+    def summary(self):
+        for profiler in reversed(self.profilers):
+            profiler.summary()
+
+
+def check_overhead(stages: int = 3, seconds: float = 0.1, live_objects: int = 300_000) -> bool:
+    """
+    自检：内存快照不能算进 CPU 阶段耗时
+
+    持有大量存活对象（快照 / 对比很贵）、阶段内几乎不分配，
+    分别只开 CPU 剖析和同时开内存记账跑几个阶段，两边的阶段耗时应一致
+    """
+    import tempfile
+
+    held = [str(i) * 3 for i in range(live_objects)]
+
+    def run(memory: bool) -> Dict[str, float]:
+        out_dir = tempfile.mkdtemp(prefix="profile_check_")
+        cpu = StageProfiler(out_dir)
+        hooks = StageHooks(MemoryProfiler(out_dir, enabled=memory), cpu)
+        for i in range(stages):
+            hooks.begin(f"stage{i}")
+            started = time.perf_counter()
+            while time.perf_counter() - started < seconds:
+                pass
+        hooks.summary()
+        return cpu.timings
+
+    cpu_only, combined = run(False), run(True)
+    del held
+    ok = all(abs(combined[name] - cpu_only[name]) < seconds / 2 for name in cpu_only)
+    for name in cpu_only:
+        print(f"   {name}: 只开 CPU {cpu_only[name]:.3f}s / 加内存记账 {combined[name]:.3f}s")
+    print("✅ 组合剖析的阶段耗时与只开 CPU 剖析一致" if ok else "❌ 内存快照被算进了 CPU 阶段耗时")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="分阶段性能剖析")
+    parser.add_argument("--check", action="store_true", help="自检：组合剖析时内存快照不计入 CPU 阶段耗时")
+    if parser.parse_args().check:
+        sys.exit(0 if check_overhead() else 1)
+    parser.print_help()
@@ -17,6 +17,7 @@ Version: 3.0 ULTIMATE
 import argparse
 import csv
 import json
+import logging
 import os
 import random
 import re
@@ -47,11 +48,22 @@ try:
 except ImportError:
     sync_playwright = None
 
+sys.path.insert(0, str(Path(__file__).parent))
+from domain_index import GIANT, WEAK, DomainIndex
+from fetch import block_heavy_resources, get_fetcher
+from trends_service import get_trends_service
+from scoring_engine import get_engine
+from synthetic import keyword_rng
+from profiling import StageProfiler, run_dir
+from locales import Locale
+from config import HUNTER_INTENT_SIGNALS, HUNTER_PAIN_TRIGGERS, USER_INTENTS
+
 
 # ============== 配置 ==============
 CONFIG = {
     "data_dir": "data",
     "seed_words_file": "words.md",
+    "locale": "en-US",  # 挖词市场（hl / gl），见 locales.Locale
     "thresholds": {
         "BUILD_NOW": 65,
         "WATCH": 45,
@@ -65,40 +77,11 @@ CONFIG = {
         "google.com", "microsoft.com", "adobe.com",
         "canva.com", "figma.com", "notion.so"
     ],
-    "pain_triggers": {
-        "strong": [
-            "struggling with", "how to fix", "error", "cannot",
-            "doesn't work", "won't work", "failed", "broken"
-        ],
-        "medium": [
-            "best way to", "how to", "tips for", "guide to"
-        ],
-        "weak": [
-            "what is", "meaning of", "difference between"
-        ]
-    },
-    "intent_signals": {
-        "calculator": ["calculator", "calc", "calculation"],
-        "generator": ["generator", "create", "make", "build", "generate"],
-        "converter": ["converter", "convert", "conversion"],
-        "checker": ["checker", "check", "verify", "validate", "test"],
-        "finder": ["finder", "find", "search", "lookup", "locate"],
-        "comparer": ["vs", "versus", "compare", "comparison", "alternative"],
-        "planner": ["planner", "plan", "schedule", "organizer"],
-        "tracker": ["tracker", "track", "monitor", "log"],
-    },
-    "user_intent_patterns": {
-        "calculate": ["calculator", "calc", "calculation", "compute"],
-        "convert": ["convert", "converter", "conversion", "transform"],
-        "generate": ["generator", "create", "make", "generate", "build"],
-        "check": ["check", "checker", "verify", "validate", "test"],
-        "find": ["finder", "find", "search", "lookup", "locate"],
-        "compare": ["compare", "comparison", "vs", "versus", "alternative"],
-        "plan": ["planner", "plan", "schedule", "organize"],
-        "track": ["tracker", "track", "monitor", "log"],
-        "learn": ["learn", "tutorial", "guide", "how to", "explain"],
-        "download": ["download", "downloads", "free"],
-    }
+    # 痛点分级 / 意图信号词表与分值统一在 config.py（HUNTER_* + SCORING_MODELS）
+    "pain_triggers": HUNTER_PAIN_TRIGGERS,
+    "intent_signals": HUNTER_INTENT_SIGNALS,
+    # 用户意图触发词 / 目标统一在 config.USER_INTENTS（HTML 报告也用）
+    "user_intent_patterns": {intent: info["keywords"] for intent, info in USER_INTENTS.items()},
 }
 
 
@@ -111,6 +94,11 @@ class ProfitHunterUltimate:
         self.data_dir = Path(self.config["data_dir"])
         self.data_dir.mkdir(exist_ok=True)
         self.results = []
+        self.engine = get_engine()
+        self.domain_index = DomainIndex({
+            WEAK: self.config["serp_weak_competitors"],
+            GIANT: self.config["serp_giants"],
+        })
         
     def load_seed_words(self) -> List[str]:
         """加载种子词"""
@@ -163,14 +151,10 @@ class ProfitHunterUltimate:
             params = {
                 "client": "firefox",
                 "q": query,
-                "hl": "en"
-            }
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                **Locale.parse(self.config.get("locale", "en-US")).params()
             }
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = get_fetcher().get_json(url, params, limiter="suggest")  # 共享缓存 + 条件请求
+            if data:
                 return [item[0] for item in data[1] if isinstance(item, list)]
         except Exception as e:
             pass
@@ -185,21 +169,22 @@ class ProfitHunterUltimate:
             return []
         
         trends_data = []
-        pytrends = TrendReq(hl='en-US', tz=360)
+        trends = get_trends_service()  # 共享会话，节流与去重由服务负责
+        store = trends.store
         
         for keyword in keywords[:50]:  # 限制数量
             try:
-                pytrends.build_payload([keyword], timeframe='now 7-d')
-                interest = pytrends.interest_over_time()
+                # 只抓缺失的最近一段，拼接到已存的 7 天小时序列
+                trends.update_series(keyword, 'now 7-d')
+                recent = store.recent_mean(keyword, 'now 7-d', 7)
                 
-                if not interest.empty:
-                    recent = interest[keyword].iloc[-7:].mean()
+                if recent is not None:
                     trends_data.append({
                         "keyword": keyword,
                         "avg_interest": recent,
-                        "is_rising": recent > 50
+                        "is_rising": recent > 50,
+                        "growth": round(store.growth(keyword, 'now 7-d'), 2)
                     })
-                time.sleep(random.uniform(1, 3))  # 避免限流
             except Exception as e:
                 continue
         
@@ -218,13 +203,14 @@ class ProfitHunterUltimate:
         # 模拟 GPTs 数据（实际需要调用 OpenAI API）
         # 这里使用关键词特征模拟热度比
         for keyword in keywords:
+            rng = keyword_rng(keyword, "gpts")
             # 基于关键词特征估算
             base_ratio = 0.05  # 基础比率
             
             # 工具类关键词热度更高
             tool_signals = ['calculator', 'generator', 'converter', 'checker', 'finder']
             if any(signal in keyword.lower() for signal in tool_signals):
-                base_ratio += random.uniform(0.05, 0.20)
+                base_ratio += rng.uniform(0.05, 0.20)
             
             # 长尾词热度较低
             word_count = len(keyword.split())
@@ -236,7 +222,7 @@ class ProfitHunterUltimate:
             comparison[keyword] = {
                 "avg_ratio": round(ratio, 4),
                 "gpts_count": int(ratio * 1000),  # 估算 GPTs 数量
-                "growth": random.choice([0, 5, 10, 15, 20]) if ratio > 0.05 else 0
+                "growth": rng.choice([0, 5, 10, 15, 20]) if ratio > 0.05 else 0
             }
         
         print(f"   📊 对比了 {len(comparison)} 个关键词")
@@ -294,7 +280,7 @@ class ProfitHunterUltimate:
             "competition": competition,
             "competition_score": competition_score,
             "降维打击": is_drop_attack,
-            "top_domains": random.sample([
+            "top_domains": keyword_rng(keyword, "serp").sample([
                 "reddit.com", "quora.com", "medium.com", "blogger.com",
                 "wikipedia.org", "github.com", "stackoverflow.com"
             ], 3)
@@ -306,12 +292,14 @@ class ProfitHunterUltimate:
         
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
+            context = browser.new_context()
+            block_heavy_resources(context)  # 只要 DOM，不下载图片 / 字体 / 样式
             
             for keyword in keywords[:20]:  # 限制数量
                 try:
                     url = f"https://www.google.com/search?q={keyword.replace(' ', '+')}"
-                    page = browser.new_page()
-                    page.goto(url, timeout=30000)
+                    page = context.new_page()
+                    page.goto(url, timeout=30000, wait_until="domcontentloaded")
                     
                     # 检测前 3 名域名
                     domains = []
@@ -327,10 +315,9 @@ class ProfitHunterUltimate:
                             break
                     
                     # 判断竞争度
-                    weak_count = sum(1 for d in domains 
-                                    if any(w in d for w in self.config["serp_weak_competitors"]))
-                    giant_count = sum(1 for d in domains 
-                                     if any(g in d for g in self.config["serp_giants"]))
+                    summary = self.domain_index.summarize(domains)
+                    weak_count = summary.get(WEAK, 0)
+                    giant_count = summary.get(GIANT, 0)
                     
                     if weak_count > 0 and giant_count == 0:
                         competition = "🟢 WEAK"
@@ -375,29 +362,15 @@ class ProfitHunterUltimate:
         results = []
         
         for keyword in keywords:
-            keyword_lower = keyword.lower()
-            signals = []
-            intent_score = 70  # 基础分
+            match = self.engine.match(keyword)
             
-            # 检测信号词
-            for signal_type, trigger_words in self.config["intent_signals"].items():
-                if any(tw in keyword_lower for tw in trigger_words):
-                    signals.append(signal_type)
-                    if signal_type in ["calculator", "generator", "converter"]:
-                        intent_score += 30
-                    elif signal_type in ["checker", "finder"]:
-                        intent_score += 25
-                    elif signal_type == "comparer":
-                        intent_score += 20
+            # 检测信号词（分值见 SCORING_MODELS['hunter_intent']）
+            fired = self.engine.fired(match, "hunter_intent")
+            signals = [name for name in fired if not name.startswith("pain_")]
+            intent_score = self.engine.score(match, "hunter_intent")
             
             # 检测痛点
-            pain_score = 0
-            for level, triggers in self.config["pain_triggers"].items():
-                if any(t in keyword_lower for t in triggers):
-                    pain_score += 40 if level == "strong" else 20
-            
-            if pain_score > 0:
-                intent_score += pain_score
+            if len(signals) < len(fired):
                 signals.append("pain_point")
             
             # 长尾词加分
@@ -446,19 +419,8 @@ class ProfitHunterUltimate:
         intent_str = ",".join(detected_intents)
         
         if len(detected_intents) == 1:
-            goal_map = {
-                "calculate": "计算某个数值",
-                "convert": "转换单位或格式",
-                "generate": "自动生成内容",
-                "check": "验证或检查某事",
-                "find": "查找信息",
-                "compare": "比较选项",
-                "plan": "制定计划",
-                "track": "追踪数据",
-                "learn": "学习了解",
-                "download": "下载资源",
-                "explore": "浏览了解"
-            }
+            goal_map = {intent: info["goal"] for intent, info in USER_INTENTS.items()}
+            goal_map["explore"] = "浏览了解"
             user_goal = goal_map.get(detected_intents[0], "完成某项任务")
         else:
             user_goal = f"复合需求：{', '.join(detected_intents)}"
@@ -512,21 +474,15 @@ class ProfitHunterUltimate:
             competition_score = serp_info["competition_score"]
             
             # Buildability Score
-            keyword_lower = keyword.lower()
-            if any(t in keyword_lower for t in ["calculator", "generator", "converter"]):
-                build_score = 100
-            elif any(t in keyword_lower for t in ["online", "free"]):
-                build_score = 85
-            else:
-                build_score = 70
+            build_score = self.engine.score(keyword, "hunter_build")
             
-            # 最终评分（加权）
-            final_score = (
-                trend_score * 0.25 +
-                intent_score * 0.35 +
-                competition_score * 0.25 +
-                build_score * 0.15
-            )
+            # 最终评分（加权，config.SCORE_WEIGHTS['hunter']）
+            final_score = self.engine.combine("hunter", {
+                "trend": trend_score,
+                "intent": intent_score,
+                "competition": competition_score,
+                "build": build_score,
+            })
             
             # 决策
             thresholds = self.config["thresholds"]
@@ -605,13 +561,14 @@ class ProfitHunterUltimate:
             df.to_csv(filepath, index=False, encoding='utf-8')
     
     def run(self, use_trends: bool = False, use_playwright: bool = False, 
-            max_keywords: int = 500, seed_words: str = None):
-        """运行完整流程"""
+            max_keywords: int = 500, seed_words: str = None, profile: bool = False):
+        """运行完整流程（profile=True 时分阶段性能剖析，写入 data/profiles/）"""
         print("\n" + "="*60)
         print("💎 Profit Hunter ULTIMATE v3.0")
         print("="*60)
         print(f"⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("-" * 60)
+        profiler = StageProfiler(run_dir(self.data_dir) if profile else None)
         
         # Step 0: 加载种子词并挖词
         if seed_words:
@@ -623,29 +580,37 @@ class ProfitHunterUltimate:
             words = self.load_seed_words()
         
         print(f"📝 使用种子词: {', '.join(words[:5])}...")
+        profiler.begin("step0_autocomplete")
         keywords = self.step0_google_autocomplete(words, max_keywords)
         
         # Step 1: Google Trends（可选）
         trends_data = []
         if use_trends:
+            profiler.begin("step1_trends")
             trends_data = self.step1_google_trends(keywords)
         
         # Step 2: GPTs 对比
+        profiler.begin("step2_gpts")
         gpts_comparison = self.step2_gpts_comparison(keywords)
         
         # Step 3: SERP 分析
+        profiler.begin("step3_serp")
         serp_data = self.step3_serp_analysis(keywords, use_playwright)
         
         # Step 4: 意图分析
+        profiler.begin("step4_intent")
         intent_data = self.step4_intent_analysis(keywords)
         
         # Step 5: 计算最终评分
+        profiler.begin("step5_scores")
         results = self.step5_calculate_scores(
             keywords, trends_data, gpts_comparison, serp_data, intent_data
         )
         
         # Step 6: 输出结果
+        profiler.begin("step6_output")
         self.step6_output_results(results)
+        profiler.summary()
         
         return results
 
@@ -672,8 +637,12 @@ def main():
                        help="最大关键词数量 (默认: 500)")
     parser.add_argument("--seed", type=str, default=None,
                        help="种子词，逗号分隔 (例如: 'ai,ml,python')")
+    parser.add_argument("--profile", action="store_true",
+                       help="分阶段性能剖析（.pstats + 火焰图折叠栈写入 data/profiles/）")
     
     args = parser.parse_args()
+    if args.profile:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')  # 剖析结果走日志
     
     # 检查依赖
     missing_deps = []
@@ -699,7 +668,8 @@ def main():
         use_trends=args.trends,
         use_playwright=args.playwright,
         max_keywords=args.max,
-        seed_words=args.seed
+        seed_words=args.seed,
+        profile=args.profile
     )
     
     # 返回合适的退出码
@@ -16,11 +16,18 @@ sys.path.insert(0, str(Path(__file__).parent))
 from config import *
 from data_utils import save_csv, load_keywords
 from alphabet_soup import GoogleSuggestHarvester
-from trends_analyzer import TrendsAnalyzer
 from gpts_analyzer import GPTsAnalyzer
-from serp_analyzer import SERPAnalyzer
-from deep_search import DeepSearchAnalyzer  # 新增
 from scorer import KeywordScorer
+from enrich_queue import EnrichmentQueue, EnrichmentBudget, build_stages
+from harvest_sink import SpillingDedupSink
+from profiling import MemoryProfiler, StageHooks, StageProfiler, run_dir
+from locales import MultiLocaleRunner
+from circuit_breaker import get_registry
+from deadline import RunDeadline
+from pseo_generator import PseoGenerator
+from keyword_index import get_keyword_index
+from events import get_events, open_events
+from fetch import get_fetcher
 
 logging.basicConfig(
     level=logging.INFO,
@@ -35,92 +42,131 @@ def run_pipeline(args):
     start_time = datetime.now()
     logger.info("🚀 Profit Hunter ULTIMATE V3 启动")
     logger.info("=" * 60)
+    profile_cpu = getattr(args, 'profile', False)
+    profile_memory = getattr(args, 'profile_memory', False)
+    profile_dir = run_dir(DATA_DIR) if profile_cpu or profile_memory else None
+    # 内存在外层：StageHooks 切换阶段时先逆序结束再顺序开始，快照在 CPU 剖析开始前 / 结束后取，不计入 CPU 热点
+    # 进度事件流（--events，main / SmoothRunner 负责打开）：阶段边界跟剖析器走同一组钩子，watch_events.py 实时查看
+    events = get_events()
+    events.emit("run_start", max=args.max, trends=args.trends, serp=args.playwright, deep=args.deep_search)
+    profiler = StageHooks(events,
+                          MemoryProfiler(profile_dir, enabled=profile_memory),
+                          StageProfiler(profile_dir, enabled=profile_cpu))
+    # 整次运行的截止时间：各阶段到点交出部分结果，评分和报告总会执行
+    deadline = RunDeadline.from_minutes(getattr(args, 'deadline', None))
+    if deadline.seconds:
+        logger.info(f"⏰ 运行截止: {deadline.seconds / 60:.0f} 分钟")
     
-    all_keywords = set()
-    
-    # Step 0: Alphabet Soup 挖词
+    # Step 0: Alphabet Soup 挖词（去重集合有内存上限，超出溢写到磁盘）
     logger.info("📊 Step 0: Alphabet Soup 海量挖词...")
+    profiler.begin("harvest")
     harvester = GoogleSuggestHarvester()
     seed_words = load_keywords()
     logger.info(f"   种子词数量: {len(seed_words)}")
     
-    suggest_results = harvester.harvest(seed_words, max_per_word=args.max)
-    all_keywords.update(suggest_results)
-    logger.info(f"   → 获取 {len(all_keywords)} 个候选关键词")
-    
-    # V3: 全部关键词，不采样
-    keywords = list(all_keywords)
-    logger.info(f"   → 处理全部 {len(keywords)} 个关键词")
-    
-    # 预处理：去重和清理
-    keywords = list(set(keywords))
-    
-    # Step 1: Google Trends 分析
-    trends_data = {}
-    if args.trends:
-        logger.info("📈 Step 1: Google Trends 飙升词分析...")
-        analyzer = TrendsAnalyzer()
-        trends_data = analyzer.analyze(keywords)
-        save_csv(list(trends_data.values()), "step1_trends_deep.csv")
-        logger.info(f"   → 分析 {len(trends_data)} 个趋势数据")
-    
-    # Step 2: GPTs 对比
-    logger.info("🤖 Step 2: GPTs 基准对比...")
-    gpts_analyzer = GPTsAnalyzer()
-    gpts_results = gpts_analyzer.analyze(keywords)
-    save_csv(list(gpts_results.values()), "step2_gpts_comparison.csv")
-    logger.info(f"   → 对比 {len(gpts_results)} 个关键词")
-    
-    # 计算 avg_ratio
-    if gpts_results:
-        ratios = [r.get('ratio', 0) for r in gpts_results.values() if r.get('ratio', 0) > 0]
-        if ratios:
-            avg_ratio = sum(ratios) / len(ratios)
-            logger.info(f"   → 平均 GPTs 热度比: {avg_ratio:.2%}")
-    
-    # Step 3: SERP 竞争分析
-    serp_data = {}
-    if args.playwright:
-        logger.info("🔍 Step 3: SERP 降维打击分析...")
-        serp_analyzer = SERPAnalyzer()
-        serp_data = serp_analyzer.analyze(keywords[:args.max])
-        save_csv(list(serp_data.values()), "step3_serp_analysis.csv")
-        logger.info(f"   → 分析 {len(serp_data)} 个 SERP")
+    # V3: 全部关键词，不采样；下游各步骤流式遍历同一个去重结果
+    keywords = SpillingDedupSink()
+    try:
+        harvester.harvest(seed_words, max_per_word=args.max, sink=keywords, deadline=deadline.stage("harvest"))
+        logger.info(f"   → 获取 {len(keywords)} 个候选关键词")
+        if keywords.spills:
+            logger.info(f"   → 内存预算内溢写 {keywords.spills} 次")
+    
+        # 挖到的词并入关键词倒排索引（pSEO 模板候选不算，它们是拼出来的），评分时按同模板兄弟词数加分
+        keyword_index = get_keyword_index(create=True)
+        added = keyword_index.add(keywords)
+        keyword_index.commit()
+        logger.info(f"   → 关键词索引新增 {added} 个词（共 {keyword_index.size} 个）")
+    
+        # pSEO 模板候选：模板 × 实体表惰性展开，本地预筛后只留预评分最高的 N 个
+        if getattr(args, 'pseo', 0):
+            generator = PseoGenerator()
+            pseo_candidates = generator.top(args.pseo)
+            keywords.update(candidate for candidate, _ in pseo_candidates)
+            logger.info(f"   → pSEO 模板候选 {len(pseo_candidates)} 个（预筛自 {generator.size():,} 个组合）")
+    
+        # Step 1: GPTs 对比（本地估算，不占补全预算）
+        logger.info("🤖 Step 1: GPTs 基准对比...")
+        profiler.begin("gpts")
+        gpts_analyzer = GPTsAnalyzer()
+        gpts_results = gpts_analyzer.analyze(keywords, deadline=deadline.stage("gpts"))
+        save_csv(list(gpts_results.values()), "step2_gpts_comparison.csv")
+        logger.info(f"   → 对比 {len(gpts_results)} 个关键词")
+    
+        # 计算 avg_ratio
+        if gpts_results:
+            ratios = [r.get('ratio', 0) for r in gpts_results.values() if r.get('ratio', 0) > 0]
+            if ratios:
+                avg_ratio = sum(ratios) / len(ratios)
+                logger.info(f"   → 平均 GPTs 热度比: {avg_ratio:.2%}")
+    
+        # Step 2: 最优先补全 - 按本地预评分依次花掉 Trends / SERP / 深度搜索的请求预算
+        stages = build_stages(trends=args.trends, serp=args.playwright, deep=args.deep_search)
+    
+        budget_minutes = getattr(args, 'budget_minutes', None)
+        budget = EnrichmentBudget(
+            max_requests=getattr(args, 'budget_requests', None),
+            max_seconds=budget_minutes * 60 if budget_minutes else None,
+            deadline=deadline.stage("enrich")
+        )
+        enriched = {"trends": {}, "serp": {}, "deep": {}}
+        if stages:
+            logger.info(f"🎯 Step 2: 最优先补全 ({' / '.join(name for name, _, _ in stages)})...")
+            profiler.begin("enrich")
+            queue = EnrichmentQueue(keywords, KeywordScorer(), capacity=args.max)
+            logger.info(f"   预评分 Top 5: {', '.join(queue.ordered(5))}")
+            enriched.update(queue.run(stages, budget, limit=args.max))
+    
+        # Trends 结果
+        trends_data = enriched["trends"]
+        if args.trends:
+            save_csv(list(trends_data.values()), "step1_trends_deep.csv")
+            logger.info(f"📈 Trends: 分析 {len(trends_data)} 个趋势数据")
+    
+        # SERP 竞争分析结果
+        serp_data = enriched["serp"]
+        if args.playwright:
+            save_csv(list(serp_data.values()), "step3_serp_analysis.csv")
+            logger.info(f"🔍 SERP: 分析 {len(serp_data)} 个 SERP")
         
-        # 统计降维打击机会
-        dimension_attacks = [k for k, v in serp_data.items() if v.get('降维打击')]
-        logger.info(f"   → 发现 {len(dimension_attacks)} 个降维打击机会")
-    
-    # Step 3.5: 深度社区搜索（新增）
-    deep_data = {}
-    if args.deep_search:
-        logger.info("🔎 Step 3.5: 深度社区搜索（Reddit/论坛/Google）...")
-        deep_analyzer = DeepSearchAnalyzer()
-        deep_data = deep_analyzer.analyze_batch(keywords[:args.max])
-        save_csv(list(deep_data.values()), "step3_5_deep_search.csv")
-        logger.info(f"   → 深度分析 {len(deep_data)} 个关键词")
+            # 统计降维打击机会
+            dimension_attacks = [k for k, v in serp_data.items() if v.get('降维打击')]
+            logger.info(f"   → 发现 {len(dimension_attacks)} 个降维打击机会")
+    
+        # 深度社区搜索结果
+        deep_data = enriched["deep"]
+        if args.deep_search:
+            save_csv(list(deep_data.values()), "step3_5_deep_search.csv")
+            logger.info(f"🔎 深度社区搜索: 分析 {len(deep_data)} 个关键词")
         
-        # 统计高需求关键词
-        high_demand = [k for k, v in deep_data.items() if v.get('demand_strength') == 'HIGH']
-        logger.info(f"   → 发现 {len(high_demand)} 个高需求机会")
+            # 统计高需求关键词
+            high_demand = [k for k, v in deep_data.items() if v.get('demand_strength') == 'HIGH']
+            logger.info(f"   → 发现 {len(high_demand)} 个高需求机会")
     
-    # Step 4: 综合评分 + 用户意图深挖
-    logger.info("🎯 Step 4: 综合评分 + 用户意图深挖...")
-    scorer = KeywordScorer(trends_data, gpts_results, serp_data, deep_data)
-    scored_keywords = scorer.score(keywords)
+        # Step 3: 综合评分 + 用户意图深挖
+        logger.info("🎯 Step 3: 综合评分 + 用户意图深挖...")
+        profiler.begin("score")
+        scorer = KeywordScorer(trends_data, gpts_results, serp_data, deep_data)
+        scored_keywords = scorer.score(keywords)
     
-    # Step 5: 输出决策结果
-    logger.info("📋 Step 5: 生成最终报告...")
-    final_results = scorer.get_final_results(scored_keywords)
+        # Step 4: 输出决策结果
+        logger.info("📋 Step 4: 生成最终报告...")
+        profiler.begin("report")
+        final_results = scorer.get_final_results(scored_keywords)
     
-    # 保存最终结果（V3: 全部关键词）
-    save_csv(final_results, "ultimate_final_results.csv")
+        # 保存最终结果（V3: 全部关键词）
+        save_csv(final_results, "ultimate_final_results.csv")
+    finally:
+        # 出错也要删掉溢写的临时文件
+        keywords.close()
+    profiler.summary()
     
     # 统计
     build_now = [k for k in final_results if 'BUILD NOW' in k.get('decision', '')]
     watch = [k for k in final_results if 'WATCH' in k.get('decision', '')]
     
     elapsed = (datetime.now() - start_time).total_seconds()
+    events.emit("run_end", seconds=round(elapsed, 1), keywords=len(final_results), build_now=len(build_now))
     
     logger.info("=" * 60)
     logger.info("✅ V3 分析完成！")
@@ -128,6 +174,9 @@ def run_pipeline(args):
     logger.info(f"   🔴 BUILD NOW: {len(build_now)} 个")
     logger.info(f"   🟡 WATCH: {len(watch)} 个")
     logger.info(f"   ⏱️ 耗时: {elapsed:.1f} 秒")
+    deadline.summary()
+    get_registry().report()
+    get_fetcher().purge()
     logger.info("=" * 60)
     
     # 输出 Top 10 BUILD NOW（带用户意图）
@@ -159,16 +208,66 @@ def run_pipeline(args):
     return final_results
 
 
+def run_multi_locale(args):
+    """多市场并发运行：各市场共享响应缓存和结果库，跨市场重复词只补全 / 评分一次"""
+    start_time = datetime.now()
+    events = get_events()
+    events.emit("run_start", max=args.max, locales=args.locales, trends=args.trends,
+                serp=args.playwright, deep=args.deep_search)
+    deadline = RunDeadline.from_minutes(getattr(args, 'deadline', None))
+    if deadline.seconds:
+        logger.info(f"⏰ 运行截止: {deadline.seconds / 60:.0f} 分钟")
+    # 只支持内存记账：cProfile 只采样主线程，各市场的挖词 / 补全都在线程池里（main 里拒绝 --profile）
+    profile_memory = getattr(args, 'profile_memory', False)
+    hooks = StageHooks(events, MemoryProfiler(run_dir(DATA_DIR) if profile_memory else None,
+                                              enabled=profile_memory))
+    runner = MultiLocaleRunner(args.locales)
+    extra = []
+    if getattr(args, 'pseo', 0):
+        generator = PseoGenerator()
+        extra = [candidate for candidate, _ in generator.top(args.pseo)]
+        logger.info(f"   → pSEO 模板候选 {len(extra)} 个（预筛自 {generator.size():,} 个组合，记在 {runner.locales[0].code} 名下）")
+    final_results = runner.run(
+        load_keywords(), max_per_word=args.max,
+        trends=args.trends, serp=args.playwright, deep=args.deep_search, limit=args.max,
+        deadline=deadline, hooks=hooks, extra=extra
+    )
+    save_csv(final_results, "multi_locale_results.csv")
+    
+    build_now = [k for k in final_results if 'BUILD NOW' in k.get('decision', '')]
+    elapsed = (datetime.now() - start_time).total_seconds()
+    events.emit("run_end", seconds=round(elapsed, 1), keywords=len(final_results), build_now=len(build_now))
+    logger.info("=" * 60)
+    logger.info(f"✅ 多市场分析完成: {len(final_results)} 个关键词, 🔴 BUILD NOW {len(build_now)} 个, ⏱️ {elapsed:.1f} 秒")
+    for kw in sorted(build_now, key=lambda x: x.get('final_score', 0), reverse=True)[:10]:
+        logger.info(f"   {kw['keyword']} ({kw['final_score']}分) [{kw['locales']}]")
+    deadline.summary()
+    get_registry().report()
+    get_fetcher().purge()
+    return final_results
+
+
 def main():
     parser = argparse.ArgumentParser(description='Profit Hunter ULTIMATE V3 - 蓝海关键词猎取')
     parser.add_argument('--trends', action='store_true', help='启用 Google Trends 分析')
     parser.add_argument('--playwright', action='store_true', help='启用 Playwright SERP 分析')
     parser.add_argument('--deep-search', action='store_true', help='启用深度社区搜索')
-    parser.add_argument('--max', type=int, default=50, help='种子词最大建议数 (默认50)')
+    parser.add_argument('--max', type=int, default=50, help='种子词最大建议数 / 最多补全关键词数 (默认50)')
+    parser.add_argument('--pseo', type=int, default=0, help='加入预评分最高的 N 个 pSEO 模板候选词 (默认不加)')
+    parser.add_argument('--budget-requests', type=int, default=None, help='补全阶段最多网络请求数 (默认不限)')
+    parser.add_argument('--budget-minutes', type=float, default=None, help='补全阶段最长耗时（分钟，默认不限）')
+    parser.add_argument('--deadline', type=float, default=None, help='整次运行截止时间（分钟，按阶段比例分配，默认不限）')
     parser.add_argument('--trends-only', action='store_true', help='仅运行 Trends 分析')
     parser.add_argument('--quiet', action='store_true', help='静默模式')
+    parser.add_argument('--profile', action='store_true', help='分阶段性能剖析（.pstats + 火焰图折叠栈写入 data/profiles/）')
+    parser.add_argument('--locales', default=None, help='多市场并发运行，逗号分隔 (例如: en-US,en-GB,zh-CN)')
+    parser.add_argument('--profile-memory', action='store_true', help='分阶段内存记账（tracemalloc + RSS，清单写入 data/profiles/）')
+    parser.add_argument('--events', nargs='?', const=str(EVENTS_FILE), default=None,
+                        help='写进度事件流（JSON Lines 文件或 udp://host:port，默认 data/events.jsonl），用 watch_events.py 查看')
     
     args = parser.parse_args()
+    if args.locales and args.profile:
+        parser.error("--profile 不支持 --locales：多市场的挖词 / 补全在线程池里跑，cProfile 只采样主线程（可用 --profile-memory）")
     
     # V3: 默认启用 trends
     if not args.trends and not args.trends_only:
@@ -180,8 +279,12 @@ def main():
     if not args.deep_search and not args.trends_only:
         logger.info("💡 提示: 添加 --deep-search 参数可启用深度社区搜索（Reddit/论坛）")
     
+    # 两条路径共用同一个事件流（每次打开都会轮转上次运行的文件）
+    if args.events:
+        open_events(args.events)
+    
     try:
-        results = run_pipeline(args)
+        results = run_multi_locale(args) if args.locales else run_pipeline(args)
     except KeyboardInterrupt:
         logger.info("\n⏹️ 用户中断")
         sys.exit(0)
@@ -15,7 +15,10 @@ import os
 import sys
 import time
 import json
+import logging
 import argparse
+import hashlib
+import heapq
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -34,6 +37,17 @@ except ImportError as e:
     print("💡 安装: pip install requests pandas pytrends beautifulsoup4 schedule lxml")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).parent))
+from trends_service import get_trends_service
+from trends_crawler import TrendsCrawler
+from harvest_sink import SpillingDedupSink
+from reddit_store import get_reddit_ingestor
+from scoring_engine import get_engine
+from profiling import StageProfiler, run_dir
+from synthetic import keyword_rng
+from circuit_breaker import SourceBlocked, SourceError, check_response, get_breaker, get_registry
+from config import SUPER_PAIN_SIGNALS, SUPER_COMMERCIAL_SIGNALS
+
 # ============ 配置 ============
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
@@ -93,43 +107,10 @@ SERP_GIANTS = [
     "wikipedia.org", "facebook.com", "apple.com"
 ]
 
-# 痛点信号词库（增强版）
-PAIN_SIGNALS = {
-    "urgent": [  # 紧急痛点
-        "struggling with", "how to fix", "error", "not working",
-        "cannot", "doesn't work", "failed", "help", "issue",
-        "求助", "怎么办", "急", "救命", "崩溃"
-    ],
-    "frustration": [  # 挫败感
-        "tired of", "sick of", "fed up", "annoying", "frustrating",
-        "painful", "difficult", "confusing", "complicated",
-        "麻烦", "蛋疼", "烦死了"
-    ],
-    "desire": [  # 强烈需求
-        "want", "need", "looking for", "searching for", "wish",
-        "应该有一个", "要是能", "太需要"
-    ],
-    "comparison": [  # 对比需求
-        "vs", "versus", "alternative", "better than", "compare",
-        "difference", "pros and cons", "哪个好"
-    ]
-}
-
-# 商业价值信号
-COMMERCIAL_SIGNALS = {
-    "high_cpc": [  # 高 CPC 关键词
-        "insurance", "lawyer", "attorney", "loan", "mortgage",
-        "crypto", "trading", "investment", "software", "course"
-    ],
-    "ecommerce": [  # 电商需求
-        "buy", "price", "discount", "sale", "cheap", "best",
-        "评测", "推荐", "购买", "价格"
-    ],
-    "saas": [  # SaaS 需求
-        "tool", "software", "platform", "solution", "service",
-        "工具", "软件", "平台", "服务"
-    ]
-}
+# 痛点 / 商业价值信号词库在 config.SUPER_PAIN_SIGNALS / SUPER_COMMERCIAL_SIGNALS，
+# 分值在 config.SCORING_MODELS，由 scoring_engine 统一编译
+PAIN_SIGNALS = SUPER_PAIN_SIGNALS
+COMMERCIAL_SIGNALS = SUPER_COMMERCIAL_SIGNALS
 
 # ============ 多平台挖掘 ============
 
@@ -137,191 +118,130 @@ def google_autocomplete(keyword):
     """Google Autocomplete 挖词"""
     suggestions = []
     letters = 'abcdefghijklmnopqrstuvwxyz'
+    breaker = get_breaker("google_autocomplete")
+    
+    def fetch(letter):
+        url = f"https://suggestqueries.google.com/complete/search?client=firefox&q={keyword}%20{letter}"
+        resp = requests.get(url, timeout=10)
+        check_response(resp)
+        return [s for s in resp.json()[1] if len(s.split()) >= 2]
     
     for letter in letters[:10]:  # 限制数量
+        if not breaker.allow():  # 熔断期间不再逐个字母试错（冷却结束后 allow 放行半开探测）
+            break
         try:
-            url = f"https://suggestqueries.google.com/complete/search?client=firefox&q={keyword}%20{letter}"
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                suggestions.extend([s for s in data[1] if len(s.split()) >= 2])
-            time.sleep(0.3)
-        except:
+            suggestions.extend(fetch(letter))
+        except Exception as e:
+            breaker.record_failure(e)
             continue
+        breaker.record_success()
+        time.sleep(0.3)
     
     return list(set(suggestions))
 
 def google_trends_rising(keywords):
-    """Google Trends 飙升词 + 二级深挖"""
-    pytrends = TrendReq(hl='en-US', tz=360)
-    rising_data = []
+    """Google Trends 飙升词 + 查询图深挖（按飙升值优先、全局去重，展开过的节点不再请求）"""
+    crawler = TrendsCrawler(get_trends_service(), timeframe='now 7-d')  # 共享会话，节流与去重由服务负责
+    try:
+        nodes = crawler.crawl(keywords[:8])
+    except Exception:
+        return []
     
-    for i, keyword in enumerate(keywords[:8]):
-        try:
-            pytrends.build_payload([keyword], timeframe='now 7-d')
-            related = pytrends.related_queries()
-            
-            if keyword in related and related[keyword]:
-                rising = related[keyword].get('rising')
-                if rising is not None and not rising.empty:
-                    for _, row in rising.head(3).iterrows():
-                        growth = row['value'] if isinstance(row['value'], (int, float)) else 0
-                        if growth > 0:
-                            rising_data.append({
-                                "keyword": row['query'],
-                                "growth": growth,
-                                "source": keyword,
-                                "platform": "google_trends"
-                            })
-            
-            time.sleep(2)
-        except:
-            continue
+    rising_data = []
+    for node in sorted(nodes.values(), key=lambda n: n['priority'], reverse=True):
+        if node['value'] > 0:
+            rising_data.append({
+                "keyword": node['query'],
+                "growth": node['value'],
+                "source": node['parent'],
+                "platform": "google_trends"
+            })
     
     return rising_data
 
 def youtube_suggestions(keyword):
     """YouTube 挖词"""
-    suggestions = []
-    
-    try:
+    def fetch():
         # YouTube Suggest API
         url = f"https://suggestqueries.google.com/complete/search?client=firefox&ds=yt&q={keyword}"
         resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            suggestions = [s for s in data[1] if s]
-    except:
-        pass
+        check_response(resp)
+        return [s for s in resp.json()[1] if s]
     
-    return suggestions
+    return get_breaker("youtube").call(fetch, default=[])
 
 def amazon_search_terms(keyword):
     """Amazon 搜索词挖掘"""
-    terms = []
-    
-    try:
+    def fetch():
         url = f"https://completion.amazon.com/api/2017/suggestion?l=1&prefix={keyword}"
         resp = requests.get(url, timeout=10, headers={
             "User-Agent": "Mozilla/5.0"
         })
-        if resp.status_code == 200:
-            data = resp.json()
-            suggestions = data.get('suggestions', [])
-            terms = [s['value'] for s in suggestions if isinstance(s, dict)]
-    except:
-        pass
+        check_response(resp)
+        suggestions = resp.json().get('suggestions', [])
+        return [s['value'] for s in suggestions if isinstance(s, dict)]
     
-    return terms
+    return get_breaker("amazon").call(fetch, default=[])
 
 def reddit_search(keyword):
-    """Reddit 需求挖掘"""
-    posts = []
-    
+    """Reddit 需求挖掘（增量采集到本地帖子库，返回最新帖子标题；熔断由采集器负责）"""
+    reddit = get_reddit_ingestor()
     try:
-        url = f"https://www.reddit.com/search.json?q={keyword}&sort=relevance&limit=10"
-        resp = requests.get(url, timeout=10, headers={
-            "User-Agent": "Mozilla/5.0"
-        })
-        if resp.status_code == 200:
-            data = resp.json()
-            for child in data.get('data', {}).get('children', []):
-                title = child.get('data', {}).get('title', '')
-                if title:
-                    posts.append(title)
-    except:
+        reddit.ingest(keyword)
+    except Exception:
         pass
     
-    return posts
+    return reddit.store.titles(keyword, limit=10)
 
 def tiktok_hashtags(keyword):
     """TikTok Hashtag 挖掘"""
-    tags = []
-    
-    try:
+    def fetch():
         url = f"https://www.tiktok.com/discover/{keyword}"
         resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            # 解析 hashtags
-            matches = re.findall(r'#(\w+)', resp.text)
-            tags = [f"#{m}" for m in matches[:20]]
-    except:
-        pass
-    
-    return tags
+        check_response(resp, expect_json=False)
+        # 解析 hashtags
+        matches = re.findall(r'#(\w+)', resp.text)
+        if not matches:
+            raise SourceError("页面里没有 hashtag（多半是登录墙）")
+        return [f"#{m}" for m in matches[:20]]
+    
+    return get_breaker("tiktok").call(fetch, default=[])
 
 def xiaohongshu_search(keyword):
     """小红书搜索词挖掘"""
-    notes = []
-    
-    try:
+    def fetch():
         url = f"https://www.xiaohongshu.com/api/sns.web.v1/search/notes?keyword={keyword}"
         resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            notes = [n.get('title', '') for n in data.get('data', {}).get('notes', [])]
-    except:
-        pass
+        check_response(resp)
+        data = resp.json()
+        if data.get('success') is False:  # 未登录 / 签名失效
+            raise SourceBlocked(data.get('msg') or f"code {data.get('code')}")
+        return [n.get('title', '') for n in data.get('data', {}).get('notes', [])]
     
-    return notes
+    return get_breaker("xiaohongshu").call(fetch, default=[])
 
 # ============ 需求分析 ============
 
 def analyze_pain_points(text):
-    """分析文本中的痛点强度"""
-    text_lower = text.lower()
-    score = 50  # 基础分
-    
-    # 紧急痛点
-    for signal in PAIN_SIGNALS["urgent"]:
-        if signal in text_lower:
-            score += 30
-            break
-    
-    # 挫败感
-    for signal in PAIN_SIGNALS["frustration"]:
-        if signal in text_lower:
-            score += 25
-            break
-    
-    # 强烈需求
-    for signal in PAIN_SIGNALS["desire"]:
-        if signal in text_lower:
-            score += 20
-            break
-    
-    # 对比需求
-    for signal in PAIN_SIGNALS["comparison"]:
-        if signal in text_lower:
-            score += 15
-            break
-    
-    return min(score, 100)
+    """分析文本中的痛点强度（紧急 / 挫败 / 强烈需求 / 对比，各类命中一次加分）"""
+    return get_engine().score(text, "super_pain")
 
 def analyze_commercial_value(keyword):
-    """分析商业价值"""
-    keyword_lower = keyword.lower()
-    score = 50  # 基础分
-    
-    # 高 CPC
-    for signal in COMMERCIAL_SIGNALS["high_cpc"]:
-        if signal in keyword_lower:
-            score += 25
-            break
-    
-    # 电商需求
-    for signal in COMMERCIAL_SIGNALS["ecommerce"]:
-        if signal in keyword_lower:
-            score += 20
-            break
-    
-    # SaaS
-    for signal in COMMERCIAL_SIGNALS["saas"]:
-        if signal in keyword_lower:
-            score += 15
-            break
-    
-    return min(score, 100)
+    """分析商业价值（高 CPC / 电商 / SaaS）"""
+    return get_engine().score(keyword, "super_commercial")
+
+def local_prescore(keyword):
+    """本地预评分：超级评分里只看关键词本身的两项（痛点 + 商业价值），不发请求"""
+    return analyze_pain_points(keyword) + analyze_commercial_value(keyword)
+
+def _tiebreak(keyword):
+    """同分时的稳定打散顺序（关键词哈希），不偏向字母序靠前的词"""
+    return int.from_bytes(hashlib.blake2b(keyword.encode("utf-8"), digest_size=8).digest(), "big")
+
+def top_by_prescore(keywords, n):
+    """流式取本地预评分最高的 n 个（有界堆，内存只占 n 条）"""
+    best = heapq.nlargest(n, ((local_prescore(kw), _tiebreak(kw), kw) for kw in keywords))
+    return [kw for _, _, kw in best]
 
 def analyze_trend_direction(keywords_data):
     """分析趋势方向"""
@@ -342,11 +262,11 @@ def analyze_trend_direction(keywords_data):
 
 def serp_dimensional_analysis(keyword):
     """SERP 降维打击分析"""
-    # 模拟 SERP 分析
-    import random
+    # 模拟 SERP 分析（按关键词确定性生成，同一关键词每次结果一致）
+    rng = keyword_rng(keyword, "serp")
     
     # 生成模拟的前3名
-    top_domains = random.choices(
+    top_domains = rng.choices(
         SERP_WEAK + SERP_GIANTS + ['other.com'],
         k=3
     )
@@ -374,11 +294,11 @@ def serp_dimensional_analysis(keyword):
 
 def gpts_market_analysis(keyword):
     """GPTs 市场分析（模拟）"""
-    import random
+    rng = keyword_rng(keyword, "gpts")
     
     # 模拟 GPTs 数量
-    gpts_count = random.randint(0, 100)
-    growth = random.uniform(-20, 60)
+    gpts_count = rng.randint(0, 100)
+    growth = rng.uniform(-20, 60)
     
     ratio = gpts_count / 100.0
     
@@ -412,13 +332,8 @@ def calculate_super_score(keyword, platform_data, trend_data, serp_data, gpts_da
         gpts_score = 50
     
     # 可实现性
-    keyword_lower = keyword.lower()
-    if any(t in keyword_lower for t in ['calculator', 'generator', 'converter', 'tool']):
-        build_score = 100
-    elif any(t in keyword_lower for t in ['online', 'free']):
-        build_score = 85
-    else:
-        build_score = 70
+    engine = get_engine()
+    build_score = engine.score(keyword, "super_build")
     
     # 长度分数（长尾更精准）
     word_count = len(keyword.split())
@@ -429,16 +344,16 @@ def calculate_super_score(keyword, platform_data, trend_data, serp_data, gpts_da
     else:
         length_score = 75
     
-    # 最终评分（优化权重）
-    final_score = (
-        trend_score * 0.15 +
-        gpts_score * 0.20 +
-        pain_score * 0.25 +      # 痛点权重提升
-        commercial_score * 0.15 +  # 商业价值
-        competition_score * 0.15 +
-        build_score * 0.05 +
-        length_score * 0.05
-    )
+    # 最终评分（权重在 config.SCORE_WEIGHTS['super']，痛点权重最高）
+    final_score = engine.combine("super", {
+        "trend": trend_score,
+        "gpts": gpts_score,
+        "pain": pain_score,
+        "commercial": commercial_score,
+        "competition": competition_score,
+        "build": build_score,
+        "length": length_score,
+    })
     
     # 降维打击加成
     if serp_data.get('is_dimensional_attack'):
@@ -457,67 +372,78 @@ def make_decision(score):
 
 # ============ 主程序 ============
 
-def run_super_hunter(seed_words, max_keywords=50):
-    """运行超级需求挖掘"""
+def run_super_hunter(seed_words, max_keywords=50, profile=False):
+    """运行超级需求挖掘（profile=True 时分阶段性能剖析）"""
     print("🚀" + "="*60)
     print("💎 Profit Hunter ULTIMATE V3.0 - 超级需求挖掘引擎")
     print("="*60)
+    profiler = StageProfiler(run_dir(DATA_DIR) if profile else None)
     
-    all_keywords = set()
+    harvested = SpillingDedupSink()  # 内存有上限，超出溢写到磁盘
+    candidates = SpillingDedupSink()
     platform_data = defaultdict(list)
     
-    # Step 1: 多平台挖词
-    print("\n📊 Step 1: 多平台关键词挖掘...")
+    try:
+        # Step 1: 多平台挖词
+        print("\n📊 Step 1: 多平台关键词挖掘...")
+        profiler.begin("harvest")
     
-    for word in seed_words:
-        print(f"   挖掘: {word}")
+        for word in seed_words:
+            print(f"   挖掘: {word}")
         
-        # Google
-        google_kws = google_autocomplete(word)
-        all_keywords.update(google_kws)
-        platform_data["google"].extend(google_kws)
+            # Google
+            google_kws = google_autocomplete(word)
+            harvested.update(google_kws)
+            platform_data["google"].extend(google_kws)
         
-        # YouTube
-        yt_kws = youtube_suggestions(word)
-        all_keywords.update(yt_kws)
-        platform_data["youtube"].extend(yt_kws)
+            # YouTube
+            yt_kws = youtube_suggestions(word)
+            harvested.update(yt_kws)
+            platform_data["youtube"].extend(yt_kws)
         
-        # Amazon
-        amz_kws = amazon_search_terms(word)
-        all_keywords.update(amz_kws)
-        platform_data["amazon"].extend(amz_kws)
+            # Amazon
+            amz_kws = amazon_search_terms(word)
+            harvested.update(amz_kws)
+            platform_data["amazon"].extend(amz_kws)
         
-        # Reddit
-        reddit_posts = reddit_search(word)
-        platform_data["reddit"].extend(reddit_posts)
+            # Reddit
+            reddit_posts = reddit_search(word)
+            platform_data["reddit"].extend(reddit_posts)
         
-        # TikTok
-        tt_tags = tiktok_hashtags(word)
-        all_keywords.update(tt_tags)
-        platform_data["tiktok"].extend(tt_tags)
+            # TikTok
+            tt_tags = tiktok_hashtags(word)
+            harvested.update(tt_tags)
+            platform_data["tiktok"].extend(tt_tags)
         
-        time.sleep(0.5)
+            time.sleep(0.5)
     
-    print(f"   ✅ 多平台挖掘完成: {len(all_keywords)} 个关键词")
+        print(f"   ✅ 多平台挖掘完成: {len(harvested)} 个关键词")
     
-    # 限制数量
-    all_keywords = list(all_keywords)[:max_keywords * 2]
+        # 限制数量：按本地预评分流式取前 N 个（去重结果是排好序的，直接取前缀会偏向 a… / b… 开头的词）
+        candidates.update(top_by_prescore(harvested, max_keywords * 2))
+        harvested.close()
     
-    # Step 2: Trends 飙升词 + 二级深挖
-    print("\n📈 Step 2: Google Trends 飙升词 + 二级深挖...")
-    trend_data = google_trends_rising(seed_words)
+        # Step 2: Trends 飙升词 + 查询图深挖
+        print("\n📈 Step 2: Google Trends 飙升词 + 查询图深挖...")
+        profiler.begin("trends")
+        trend_data = google_trends_rising(seed_words)
     
-    # 二级深挖
-    for item in trend_data[:5]:
-        sub_keywords = google_autocomplete(item['keyword'])
-        all_keywords.update(sub_keywords)
+        # 最飙的几个再扩展一轮联想词
+        for item in trend_data[:5]:
+            sub_keywords = google_autocomplete(item['keyword'])
+            candidates.update(sub_keywords)
     
-    print(f"   ✅ 找到 {len(trend_data)} 个飙升词")
+        print(f"   ✅ 找到 {len(trend_data)} 个飙升词")
     
-    # Step 3: 需求强度分析
-    print("\n🎯 Step 3: 需求强度分析...")
+        # Step 3: 需求强度分析
+        print("\n🎯 Step 3: 需求强度分析...")
+        profiler.begin("score")
     
-    all_keywords = list(set(all_keywords))[:max_keywords]
+        all_keywords = top_by_prescore(candidates, max_keywords)
+    finally:
+        # 出错也要删掉溢写的临时文件（close 可以重复调用）
+        harvested.close()
+        candidates.close()
     
     results = []
     
@@ -563,9 +489,11 @@ def run_super_hunter(seed_words, max_keywords=50):
         })
     
     # 排序并保存
+    profiler.begin("report")
     results_df = pd.DataFrame(results)
     results_df = results_df.sort_values('final_score', ascending=False)
     results_df.to_csv(DATA_DIR / "super_results.csv", index=False)
+    profiler.summary()
     
     # 统计
     build_now = len(results_df[results_df['decision'] == "🔴 BUILD NOW"])
@@ -578,6 +506,11 @@ def run_super_hunter(seed_words, max_keywords=50):
     print(f"   🔴 立即做: {build_now}")
     print(f"   🟡 观察: {watch}")
     print(f"   💎 降维打击机会: {dimensional}")
+    print("   🔌 数据源状态:")
+    sources = get_registry()
+    for line in sources.lines():
+        print(line)
+    sources.save()
     print("="*60)
     
     # Top 15
@@ -594,8 +527,11 @@ def run_super_hunter(seed_words, max_keywords=50):
 def main():
     parser = argparse.ArgumentParser(description="Profit Hunter ULTIMATE V3.0 - 超级需求挖掘")
     parser.add_argument("--max", type=int, default=50, help="最大关键词数量")
+    parser.add_argument("--profile", action="store_true", help="分阶段性能剖析（写入 data/profiles/）")
     
     args = parser.parse_args()
+    if args.profile:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')  # 剖析结果走日志
     
     # 加载种子词
     words_file = Path(__file__).parent / "words.md"
@@ -605,7 +541,7 @@ def main():
     else:
         seed_words = ["ai", "tool", "calculator", "generator", "online", "free"]
     
-    run_super_hunter(seed_words, max_keywords=args.max)
+    run_super_hunter(seed_words, max_keywords=args.max, profile=args.profile)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+pSEO 候选词生成 - 模板 × 实体表惰性展开 + 本地预筛
+==================================================
+
+alphabet_soup.simple_harvest 只会给种子词拼 12 个固定后缀，config.PSEO_PATTERNS
+描述了 "convert X to Y" 这类模板，却没有任何地方真正生成它们。
+
+这里把 config.PSEO_TEMPLATES 里的模板和 PSEO_ENTITIES 里的实体表（文件格式、单位、平台……）
+按笛卡尔积展开：
+- 全程是生成器：itertools.product 逐个产出组合，候选空间上百万也不会整体物化
+- 各模板轮流产出，取前 N 个时不会全被第一个模板占满
+- 分组的实体表（文件格式按文档 / 表格 / 图片 / 视频 / 音频）在同一模板里出现两次时
+  两边只取同一组，不生成 aac to bmp 这种没人搜的组合
+- 候选先过本地预评分（enrich_queue.prescore，即 KeywordScorer 的信号匹配器），
+  低于下限的直接丢弃；top() 用有界堆保留最好的，只有这些才进入网络补全。
+  同分候选成百上千，按字母序取会全落在同一模板的前几个实体上，所以同分时
+  轮流挑模板 / 实体用得最少的
+
+Usage:
+    python pseo_generator.py --count                 # 候选空间大小（不展开）
+    python pseo_generator.py --top 50                # 预评分最高的 50 个
+    python pseo_generator.py --top 50 --min-score 65
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import PSEO_DIVERSITY_POOL, PSEO_ENTITIES, PSEO_MIN_PRESCORE, PSEO_TEMPLATES
+
+SLOT = re.compile(r"\{(\w+)\}")
+SPACES = re.compile(r"\s+")
+
+
+class PseoTemplate:
+    """一个模板：文字片段 + 槽位（每个槽位对应一张实体表）"""
+
+    def __init__(self, template: str):
+        self.template = template
+        self.parts = SLOT.split(template)   # 偶数位是文字，奇数位是槽位名
+        self.slots = self.parts[1::2]
+        self.texts = self.parts[0::2]
+
+    def size(self, entities: Dict[str, Sequence[str]]) -> int:
+        """展开后的候选数（不展开，按实体表长度计算）"""
+        total = 1
+        for slot, count in _slot_counts(self.slots).items():
+            table = entities[slot]
+            # 同一实体表出现 k 次：排列数 n × (n-1) × …（跳过重复取值）；分组的表只在组内排列
+            if count > 1 and isinstance(table, dict):
+                total *= _grouped_permutations(table, count)
+            else:
+                total *= _permutations(len(_values(table)), count)
+        return total
+
+    def combinations(self, entities: Dict[str, Sequence[str]]) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+        """惰性产出所有 (候选, 各槽位取值)"""
+        repeated = {slot for slot, count in _slot_counts(self.slots).items() if count > 1}
+        positions = {slot: [i for i, s in enumerate(self.slots) if s == slot] for slot in repeated}
+        groups = {slot: [set(group) for group in entities[slot].values()]
+                  for slot in repeated if isinstance(entities[slot], dict)}
+        texts = self.texts
+        for values in itertools.product(*(_values(entities[slot]) for slot in self.slots)):
+            if repeated and any(len({values[i] for i in idx}) < len(idx) for idx in positions.values()):
+                continue
+            if groups and not all(any(all(values[i] in group for i in positions[slot]) for group in slot_groups)
+                                  for slot, slot_groups in groups.items()):
+                continue
+            pieces = [texts[0]]
+            for value, text in zip(values, texts[1:]):
+                pieces.append(value)
+                pieces.append(text)
+            yield SPACES.sub(" ", "".join(pieces)).strip(), values
+
+    def expand(self, entities: Dict[str, Sequence[str]]) -> Iterator[str]:
+        """惰性产出所有候选"""
+        return (candidate for candidate, _ in self.combinations(entities))
+
+
+def _slot_counts(slots: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for slot in slots:
+        counts[slot] = counts.get(slot, 0) + 1
+    return counts
+
+
+def _values(table) -> List[str]:
+    """实体表的全部取值；分组的表（dict）按组展平去重"""
+    if isinstance(table, dict):
+        return list(dict.fromkeys(value for group in table.values() for value in group))
+    return list(table)
+
+
+def _permutations(n: int, k: int) -> int:
+    total = 1
+    for i in range(k):
+        total *= max(n - i, 0)
+    return total
+
+
+def _grouped_permutations(groups: Dict[str, Sequence[str]], k: int) -> int:
+    """k 个互不相同、且同属某一组的取值的排列数（组之间有交集时按容斥计数）"""
+    sets = [set(group) for group in groups.values()]
+    total = 0
+    for r in range(1, len(sets) + 1):
+        for combo in itertools.combinations(sets, r):
+            total += (-1) ** (r + 1) * _permutations(len(set.intersection(*combo)), k)
+    return total
+
+
+class PseoGenerator:
+    """模板 × 实体表的候选生成器"""
+
+    def __init__(self, templates: Sequence[str] = None, entities: Dict[str, Sequence[str]] = None):
+        self.entities = entities or PSEO_ENTITIES
+        self.templates = [PseoTemplate(t) for t in (templates or PSEO_TEMPLATES)]
+        missing = {slot for t in self.templates for slot in t.slots} - set(self.entities)
+        if missing:
+            raise ValueError(f"模板里的槽位没有实体表: {', '.join(sorted(missing))}")
+
+    def size(self) -> int:
+        """候选空间大小"""
+        return sum(t.size(self.entities) for t in self.templates)
+
+    def _labelled(self) -> Iterator[Tuple[str, int, Tuple[Tuple[str, str], ...]]]:
+        """各模板轮流产出 (候选, 模板序号, ((槽位, 取值), ...))（惰性）"""
+        iterators = [(i, t, t.combinations(self.entities)) for i, t in enumerate(self.templates)]
+        while iterators:
+            alive = []
+            for i, template, it in iterators:
+                item = next(it, None)
+                if item is not None:
+                    alive.append((i, template, it))
+                    candidate, values = item
+                    yield candidate, i, tuple(zip(template.slots, values))
+            iterators = alive
+
+    def candidates(self) -> Iterator[str]:
+        """各模板轮流产出候选（惰性）"""
+        return (candidate for candidate, _, _ in self._labelled())
+
+    def _scored(self, min_score: float, scorer) -> Iterator[Tuple[str, float, int, Tuple]]:
+        from enrich_queue import prescore
+        from scorer import KeywordScorer
+        scorer = scorer or KeywordScorer()
+        for candidate, template, slots in self._labelled():
+            score = prescore(scorer, candidate)
+            if score >= min_score:
+                yield candidate, score, template, slots
+
+    def filtered(self, min_score: float = PSEO_MIN_PRESCORE, scorer=None) -> Iterator[Tuple[str, float]]:
+        """只产出本地预评分 ≥ min_score 的 (候选, 预评分)"""
+        return ((candidate, score) for candidate, score, _, _ in self._scored(min_score, scorer))
+
+    def top(self, n: int, min_score: float = PSEO_MIN_PRESCORE, scorer=None,
+            pool: int = PSEO_DIVERSITY_POOL) -> List[Tuple[str, float]]:
+        """
+        预评分最高的 n 个候选
+
+        堆里按 (分数, 候选哈希) 保留 n × pool 个（同分时哈希相当于均匀抽样，不偏向字母序前缀），
+        再按分数从高到低挑：同一分数档里优先挑模板和实体被用得最少的
+        """
+        heap: List[Tuple] = []
+        size = max(n * pool, n)
+        for candidate, score, template, slots in self._scored(min_score, scorer):
+            item = (score, _tiebreak(candidate), candidate, template, slots)
+            if len(heap) < size:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return _spread(sorted(heap, reverse=True), n)
+
+
+def _tiebreak(candidate: str) -> int:
+    """同分候选的稳定伪随机次序"""
+    return int.from_bytes(hashlib.blake2b(candidate.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _spread(ranked: List[Tuple], n: int) -> List[Tuple[str, float]]:
+    """ranked 按分数降序；每个分数档内贪心挑模板 / 实体累计使用次数最少的（空取值不计）"""
+    uses: Counter = Counter()
+
+    def used(item) -> int:
+        _, _, _, template, slots = item
+        return uses[template] + sum(uses[slot] for slot in slots if slot[1])
+
+    picked: List[Tuple[str, float]] = []
+    for score, tier in itertools.groupby(ranked, key=lambda item: item[0]):
+        tier = list(tier)
+        while tier and len(picked) < n:
+            best = min(range(len(tier)), key=lambda i: used(tier[i]))
+            item = tier.pop(best)
+            _, _, candidate, template, slots = item
+            uses[template] += 1
+            uses.update(slot for slot in slots if slot[1])
+            picked.append((candidate, score))
+        if len(picked) >= n:
+            break
+    return picked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pSEO 候选词生成（模板 × 实体表）")
+    parser.add_argument("--count", action="store_true", help="只输出候选空间大小")
+    parser.add_argument("--top", type=int, default=50, help="输出预评分最高的 N 个 (默认50)")
+    parser.add_argument("--min-score", type=float, default=PSEO_MIN_PRESCORE,
+                        help=f"本地预评分下限 (默认{PSEO_MIN_PRESCORE})")
+    args = parser.parse_args()
+
+    generator = PseoGenerator()
+    print(f"📐 {len(generator.templates)} 个模板, 候选空间 {generator.size():,} 个")
+    if args.count:
+        return
+    for i, (candidate, score) in enumerate(generator.top(args.top, args.min_score), 1):
+        print(f"   {i:3d}. {candidate} ({score})")
+
+
+if __name__ == "__main__":
+    main()
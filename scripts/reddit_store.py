@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Reddit 增量采集 + 本地帖子库
+============================
+
+search_reddit_real / reddit_search 以前每次运行都重新请求 search.json，
+只留下计数和 5 个标题，同一批帖子每次都要重新扫一遍痛点词。
+
+现在帖子按 id 存进 SQLite，入库时一次性算好「痛点」「寻求解决方案」标记；
+每个关键词记录一个列表游标（最新帖子的 fullname），之后只用 sort=new&before=<游标>
+拉比游标更新的帖子。关键词级别的 Reddit 特征变成对本地库的索引查询。
+listing 请求走共享响应缓存的校验器：游标没动、也没有新帖时 Reddit 只回 304。
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+from circuit_breaker import check_response, get_breaker
+from config import DATA_DIR
+from events import get_events
+from fetch import ACCEPT_ENCODING, NOT_MODIFIED, conditional_get, get_fetcher
+from pain_analysis import get_pain_analyzer
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://www.reddit.com/search.json"
+HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": ACCEPT_ENCODING}
+PAGE_LIMIT = 100             # 增量拉取每页条数（Reddit 上限）
+BACKFILL_LIMIT = 20          # 首次采集按相关度取的条数（与原 search_reddit_real 一致）
+MAX_PAGES = 3                # 每次增量最多翻页数
+REFRESH_INTERVAL = 6 * 3600  # 同一关键词两次采集的最小间隔（秒）
+TEXT_LIMIT = 2000            # 正文只保存前 N 个字符（标记基于全文计算）
+# 关键词特征只看最新的 N 条帖子：下游阈值（痛点 > 3、提及 > 5 ……）是按单次抓取 20 条定的，
+# 对越积越多的全量帖子计数会让需求分一轮比一轮高
+FEATURE_POSTS = BACKFILL_LIMIT
+
+
+def post_flags(title: str, selftext: str) -> Dict[str, bool]:
+    """帖子级标记：是否含痛点（PAIN_TRIGGERS）、是否在寻求解决方案（SOLUTION_SEEKING_SIGNALS）"""
+    return bits_to_flags(get_pain_analyzer().bits(f"{title} {selftext}"))
+
+
+def bits_to_flags(bits: int) -> Dict[str, bool]:
+    analyzer = get_pain_analyzer()
+    return {
+        'is_pain': analyzer.has(bits, 'critical', 'medium'),
+        'is_seeking': analyzer.has(bits, 'seeking'),
+    }
+
+
+class RedditStore:
+    """Reddit 帖子库 (SQLite)：posts 按 id 去重，keyword_posts 记录关键词命中"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "reddit_store.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                id           TEXT PRIMARY KEY,
+                title        TEXT NOT NULL,
+                selftext     TEXT NOT NULL DEFAULT '',
+                subreddit    TEXT,
+                score        INTEGER NOT NULL DEFAULT 0,
+                num_comments INTEGER NOT NULL DEFAULT 0,
+                created_utc  REAL NOT NULL DEFAULT 0,
+                is_pain      INTEGER NOT NULL DEFAULT 0,
+                is_seeking   INTEGER NOT NULL DEFAULT 0,
+                updated_at   REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS keyword_posts (
+                keyword TEXT NOT NULL,
+                post_id TEXT NOT NULL,
+                PRIMARY KEY (keyword, post_id)
+            );
+            CREATE TABLE IF NOT EXISTS cursors (
+                keyword    TEXT PRIMARY KEY,
+                newest     TEXT,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    # ============ 写入 ============
+
+    def add_posts(self, keyword: str, children: Iterable[Dict]) -> int:
+        """写入 listing 的 children（已存在的帖子只更新分数/评论数），返回新帖子数"""
+        rows, links = [], []
+        now = time.time()
+        posts = [child.get("data", child) for child in children]
+        posts = [data for data in posts if data.get("id")]
+        # 整页一次批量打标记（一个匹配器扫描所有帖子）
+        report = get_pain_analyzer().analyze(
+            f"{data.get('title', '') or ''} {data.get('selftext', '') or ''}" for data in posts)
+        for data, bits in zip(posts, report.bitsets):
+            post_id = data["id"]
+            title = data.get("title", "") or ""
+            selftext = data.get("selftext", "") or ""
+            flags = bits_to_flags(bits)
+            rows.append((post_id, title, selftext[:TEXT_LIMIT], data.get("subreddit"),
+                         data.get("score", 0) or 0, data.get("num_comments", 0) or 0,
+                         data.get("created_utc", 0) or 0,
+                         int(flags['is_pain']), int(flags['is_seeking']), now))
+            links.append((keyword, post_id))
+        if not rows:
+            return 0
+        with self._lock:
+            before = self.conn.execute(
+                "SELECT COUNT(*) FROM keyword_posts WHERE keyword = ?", (keyword,)
+            ).fetchone()[0]
+            self.conn.executemany("""
+                INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET score = excluded.score,
+                    num_comments = excluded.num_comments, updated_at = excluded.updated_at
+            """, rows)
+            self.conn.executemany("INSERT OR IGNORE INTO keyword_posts VALUES (?, ?)", links)
+            after = self.conn.execute(
+                "SELECT COUNT(*) FROM keyword_posts WHERE keyword = ?", (keyword,)
+            ).fetchone()[0]
+            self.conn.commit()
+        return after - before
+
+    def set_cursor(self, keyword: str, newest: Optional[str]):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursors VALUES (?, COALESCE(?, (SELECT newest FROM cursors WHERE keyword = ?)), ?)",
+                (keyword, newest, keyword, time.time())
+            )
+            self.conn.commit()
+
+    # ============ 读取 ============
+
+    def cursor(self, keyword: str) -> Optional[Dict]:
+        """{'newest': fullname, 'fetched_at': ts}，从未采集返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT newest, fetched_at FROM cursors WHERE keyword = ?", (keyword,)
+            ).fetchone()
+        return {'newest': row[0], 'fetched_at': row[1]} if row else None
+
+    def newest_post(self, keyword: str) -> Optional[str]:
+        """关键词已存帖子中最新一条的 fullname（t3_xxx）"""
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT p.id FROM posts p JOIN keyword_posts k ON k.post_id = p.id
+                WHERE k.keyword = ? ORDER BY p.created_utc DESC LIMIT 1
+            """, (keyword,)).fetchone()
+        return f"t3_{row[0]}" if row else None
+
+    def titles(self, keyword: str, limit: int = 10) -> List[str]:
+        """关键词最新的帖子标题"""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT p.title FROM posts p JOIN keyword_posts k ON k.post_id = p.id
+                WHERE k.keyword = ? ORDER BY p.created_utc DESC LIMIT ?
+            """, (keyword, limit)).fetchall()
+        return [title for (title,) in rows]
+
+    def texts(self, batch: int = 5000) -> Iterable[str]:
+        """逐条产出库里所有帖子的 标题 + 正文（分批读取，供 pain_analysis 批量分析）"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT id, title, selftext FROM posts WHERE id > ? ORDER BY id LIMIT ?", (last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for post_id, title, selftext in rows:
+                yield f"{title} {selftext}"
+            last = rows[-1][0]
+
+    def keyword_features(self, keyword: str, since: float = None, limit: int = None) -> Dict:
+        """
+        关键词级 Reddit 特征（与 search_reddit_real 返回结构一致）
+
+        since: 只统计该时间戳（created_utc）之后的帖子
+        limit: 只统计最新的 N 条帖子（默认全部）
+        """
+        recent = """
+            WITH recent AS (
+                SELECT p.title, p.score, p.num_comments, p.is_pain, p.is_seeking
+                FROM posts p JOIN keyword_posts k ON k.post_id = p.id
+                WHERE k.keyword = ? AND p.created_utc >= ?
+                ORDER BY p.created_utc DESC LIMIT ?
+            )
+        """
+        params = (keyword, since or 0, -1 if limit is None else limit)
+        with self._lock:
+            total, pain, seeking = self.conn.execute(recent + """
+                SELECT COUNT(*), COALESCE(SUM(is_pain), 0), COALESCE(SUM(is_seeking), 0) FROM recent
+            """, params).fetchone()
+            top_pain = self.conn.execute(recent + """
+                SELECT title, score, num_comments FROM recent
+                WHERE is_pain = 1 ORDER BY score DESC LIMIT 5
+            """, params).fetchall()
+
+        sentiment = 'neutral'
+        if pain > 3:
+            sentiment = 'negative'  # 大量痛点
+        elif seeking > 2:
+            sentiment = 'seeking'  # 寻求解决方案
+        return {
+            'total_mentions': total,
+            'pain_posts': [{'title': t, 'score': s, 'comments': c} for t, s, c in top_pain],
+            'pain_count': pain,
+            'sentiment': sentiment,
+            'solution_seeking': seeking,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class RedditIngestor:
+    """按关键词增量采集 Reddit 搜索结果写入 RedditStore"""
+
+    def __init__(self, store: RedditStore = None, session=None,
+                 refresh_interval: float = REFRESH_INTERVAL, max_pages: int = MAX_PAGES):
+        self.store = store or RedditStore()
+        self.session = session
+        self.refresh_interval = refresh_interval
+        self.max_pages = max_pages
+        self.requests = 0
+
+    def _get(self, params: Dict) -> Dict:
+        session = self.session or requests
+        if session is None:
+            raise RuntimeError("requests 未安装: pip install requests")
+        started = time.perf_counter()
+        try:
+            response, body = conditional_get(session, get_fetcher().cache, SEARCH_URL, params,
+                                             headers=HEADERS, timeout=15)
+        except Exception:
+            get_events().fetch("reddit", time.perf_counter() - started, ok=False)
+            raise
+        self.requests += 1
+        not_modified = response.status_code == NOT_MODIFIED
+        get_events().fetch("reddit", time.perf_counter() - started, status=response.status_code,
+                           cache="not_modified" if not_modified else "miss", ok=body is not None or not_modified)
+        if not_modified:
+            return {}  # 和上次完全一样：没有新帖子
+        check_response(response)  # 429 / 登录页 / HTML 抛出，交给熔断器判断
+        return json.loads(body).get("data", {})
+
+    def ingest(self, keyword: str, force: bool = False) -> int:
+        """
+        采集一个关键词，返回新入库的帖子数（仍新鲜时不请求，返回 0）
+
+        首次: 按相关度取一批做基础数据，游标设为其中最新的帖子
+        之后: sort=new&before=<游标> 只取更新的帖子，最多翻 max_pages 页
+        Reddit 熔断期间不请求，直接返回 0（特征用库里已有的数据）
+        """
+        cursor = self.store.cursor(keyword)
+        if cursor and not force and time.time() - cursor['fetched_at'] < self.refresh_interval:
+            return 0
+
+        breaker = get_breaker("reddit")
+        if not breaker.allow():
+            return 0
+        try:
+            added = self._fetch(keyword, cursor)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return added
+
+    def _fetch(self, keyword: str, cursor: Optional[Dict]) -> int:
+        if cursor is None:
+            data = self._get({"q": keyword, "sort": "relevance", "limit": BACKFILL_LIMIT})
+            added = self.store.add_posts(keyword, data.get("children", []))
+            self.store.set_cursor(keyword, self.store.newest_post(keyword))
+            return added
+
+        added = 0
+        newest = cursor['newest']
+        for _ in range(self.max_pages):
+            params = {"q": keyword, "sort": "new", "limit": PAGE_LIMIT}
+            if newest:
+                params["before"] = newest
+            data = self._get(params)
+            children = data.get("children", [])
+            added += self.store.add_posts(keyword, children)
+            if not children:
+                break
+            newest = data.get("before") or children[0].get("data", {}).get("name") or newest
+            if len(children) < PAGE_LIMIT:
+                break
+        self.store.set_cursor(keyword, newest)
+        return added
+
+    def features(self, keyword: str, since: float = None) -> Dict:
+        """
+        采集（必要时）后返回关键词特征；网络失败时返回已存数据
+
+        只统计最新的 FEATURE_POSTS 条帖子（与原来单次抓取的规模一致），不随帖子库累积变大
+        """
+        try:
+            self.ingest(keyword)
+        except Exception as e:
+            logger.debug(f"Reddit ingest error for '{keyword}': {e}")
+        return self.store.keyword_features(keyword, since=since, limit=FEATURE_POSTS)
+
+
+_ingestor: Optional[RedditIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_reddit_ingestor() -> RedditIngestor:
+    """进程内共享的 RedditIngestor"""
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = RedditIngestor()
+        return _ingestor
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+增量报告 - 与上次运行对比 + 分析结果缓存
+========================================
+
+generate_report / generate_blue_ocean_report 以前每次都把所有关键词重新分析，
+报告里也看不出和上次运行相比变了什么。
+
+这里给每份报告维护一个 SQLite 缓存：
+- snapshot：上次运行每个关键词的分数 / 决策，用来算本次的差异
+  （新增 BUILD NOW、决策变化、分数变化、新增 / 消失的词）；提交时只写变化 / 新增的行、删掉消失的行
+- memo：按关键词缓存的分析结果（如需求类型 / AI 可行性），规则版本变了自动失效
+
+HTML 直接渲染，不缓存片段；差异只比较分数和决策，不逐行算指纹——
+两者都比逐行 f-string 渲染本身还贵。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+SCORE_EPSILON = 0.05  # 小于这个幅度的分数变化不算变化
+
+
+def fingerprint(*parts) -> str:
+    """任意可 JSON 序列化数据的稳定指纹"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ReportDiff:
+    """本次运行相对上次运行的差异"""
+
+    def __init__(self, first_run: bool):
+        self.first_run = first_run
+        self.added: List[str] = []
+        self.removed: List[str] = []
+        self.new_build_now: List[str] = []
+        self.decision_changes: List[Tuple[str, str, str]] = []          # (关键词, 旧决策, 新决策)
+        self.score_deltas: List[Tuple[str, float, float, float]] = []    # (关键词, 旧分, 新分, 变化)
+        self.changed = set()     # 内容有变化（含新增）的关键词
+        self.unchanged = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changed or self.removed)
+
+    def summary(self) -> str:
+        if self.first_run:
+            return f"首次生成，共 {len(self.added)} 个关键词"
+        return (f"新增 {len(self.added)} / 消失 {len(self.removed)} / 新 BUILD NOW {len(self.new_build_now)} / "
+                f"决策变化 {len(self.decision_changes)} / 分数变化 {len(self.score_deltas)} / 未变 {self.unchanged}")
+
+
+class ReportCache:
+    """单份报告的增量状态（SQLite）"""
+
+    def __init__(self, report: str, path=None):
+        self.report = report
+        self.path = path or Path(DATA_DIR) / "report_cache.db"
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            DROP TABLE IF EXISTS fragments;
+            DROP TABLE IF EXISTS rows;
+            CREATE TABLE IF NOT EXISTS snapshot (
+                report TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                score REAL,
+                decision TEXT,
+                PRIMARY KEY (report, keyword)
+            );
+            CREATE TABLE IF NOT EXISTS memo (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (kind, key)
+            );
+        """)
+        self.conn.commit()
+        self._memo: Dict[Tuple[str, str], Dict[str, object]] = {}
+        self._pending_rows: List[Tuple] = []     # 变化 / 新增的行
+        self._removed_rows: List[str] = []
+        self._pending_memo: List[Tuple] = []
+
+    # ============ 差异 ============
+
+    def previous(self) -> Dict[str, Tuple[float, str]]:
+        """上次运行的 {关键词: (分数, 决策)}"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT keyword, score, decision FROM snapshot WHERE report = ?", (self.report,)
+            ).fetchall()
+        return {kw: (score, decision) for kw, score, decision in rows}
+
+    def diff(self, rows: Iterable[Dict], score_key: str, decision_key: str = "decision",
+             key: str = "keyword") -> ReportDiff:
+        """与上次运行对比；本次的行在 commit() 时成为下次的基准（只写有变化的行）"""
+        previous = self.previous()
+        result = ReportDiff(first_run=not previous)
+        seen = set()
+        self._pending_rows = []
+        for row in rows:
+            keyword = row[key]
+            seen.add(keyword)
+            score = float(row.get(score_key) or 0)
+            decision = str(row.get(decision_key, ""))
+
+            old = previous.get(keyword)
+            if old != (score, decision):
+                self._pending_rows.append((self.report, keyword, score, decision))
+            if old is None:
+                result.added.append(keyword)
+                result.changed.add(keyword)
+                if "BUILD" in decision and not result.first_run:
+                    result.new_build_now.append(keyword)
+                continue
+            old_score, old_decision = old
+            if old == (score, decision):
+                result.unchanged += 1
+                continue
+            result.changed.add(keyword)
+            if old_decision != decision:
+                result.decision_changes.append((keyword, old_decision, decision))
+                if "BUILD" in decision:
+                    result.new_build_now.append(keyword)
+            delta = score - (old_score or 0)
+            if abs(delta) >= SCORE_EPSILON:
+                result.score_deltas.append((keyword, old_score, score, round(delta, 2)))
+        result.removed = self._removed_rows = [kw for kw in previous if kw not in seen]
+        result.score_deltas.sort(key=lambda item: abs(item[3]), reverse=True)
+        return result
+
+    # ============ 分析结果缓存 ============
+
+    def memo(self, kind: str, key: str, version: str, compute: Callable[[], Dict]):
+        """按 (类型, 关键词) 缓存可 JSON 序列化的分析结果，version 变化即失效"""
+        if (kind, version) not in self._memo:
+            with self._lock:
+                self._memo[(kind, version)] = {
+                    k: json.loads(payload) for k, payload in self.conn.execute(
+                        "SELECT key, payload FROM memo WHERE kind = ? AND version = ?", (kind, version))
+                }
+        cache = self._memo[(kind, version)]
+        if key in cache:
+            return cache[key]
+        value = compute()
+        cache[key] = value
+        self._pending_memo.append((kind, key, version, json.dumps(value, ensure_ascii=False)))
+        return value
+
+    # ============ 提交 ============
+
+    def commit(self):
+        """保存本次运行的行快照：只写变化 / 新增的行，删掉消失的行（写入量跟变化量走）"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO snapshot (report, keyword, score, decision) VALUES (?, ?, ?, ?)",
+                self._pending_rows)
+            self.conn.executemany("DELETE FROM snapshot WHERE report = ? AND keyword = ?",
+                                  [(self.report, kw) for kw in self._removed_rows])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO memo (kind, key, version, payload) VALUES (?, ?, ?, ?)",
+                self._pending_memo)
+        logger.info(f"🧩 报告快照: 写入 {len(self._pending_rows)} 行, 删除 {len(self._removed_rows)} 行")
+        self._pending_rows, self._removed_rows, self._pending_memo = [], [], []
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
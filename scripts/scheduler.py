@@ -25,6 +25,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from profit_hunter import ProfitHunterUltimate
+from fetch import get_fetcher
 
 
 def job():
@@ -45,6 +46,7 @@ def job():
         build_now = [r for r in results if r["decision"] == "🔴 BUILD NOW"]
         
         print(f"\n✅ 任务完成！发现 {len(build_now)} 个立即做机会")
+        get_fetcher().purge()
         
         # 可以在这里添加通知逻辑（邮件、Slack 等）
         # notify_new_opportunities(build_now)
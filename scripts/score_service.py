@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Profit Hunter ULTIMATE - 常驻评分服务
+====================================
+
+light_run.py / cron 每次调用都要付一遍解释器启动、pandas / pytrends 导入和规则编译，
+跑完所有缓存一起扔掉。内部工具临时查几个词也要等上几秒。
+
+这里起一个本地 HTTP 服务，进程内常驻：
+- KeywordScorer（编译好的规则引擎、域名索引）和 GPTs 估算
+- SourceStore 里的 Trends / SERP / 深度搜索结果（启动时载入内存，之后每 STORE_REFRESH 秒
+  增量并入调度器 / cron / 工作队列新写入的结果，数据变了的词评分缓存立即失效）
+- 每个关键词的评分结果（SingleFlight：并发的同词请求合并，TTL 内直接复用）
+
+接口（JSON）：
+    POST /score    {"keywords": [...]}                                  批量评分，按分数排序
+    POST /enrich   {"keywords": [...], "sources": ["trends", "serp"],   补全（先查 SourceStore），
+                    "max_age": 21600}                                   结果同时更新评分用的数据
+    GET  /health                                                        运行状态 + 缓存统计 + 熔断状态
+
+Usage:
+    python score_service.py                    # 监听 127.0.0.1:8765
+    python score_service.py --port 9000
+    curl -s localhost:8765/score -d '{"keywords": ["pdf to word converter"]}'
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from circuit_breaker import get_registry
+from config import LOCALE_RESULT_MAX_AGE
+from gpts_analyzer import GPTsAnalyzer
+from scorer import KeywordScorer
+from singleflight import SingleFlight
+from source_store import SourceStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 50_000           # 单次请求最多关键词数
+SCORE_TTL = 3600             # 评分结果缓存（秒）；补全数据变化时该词立即失效
+ENRICH_WORKERS = 4
+ENRICH_SOURCES = ("trends", "serp", "deep")
+STORE_REFRESH = 30           # 每隔 N 秒把 SourceStore 新写入的结果并入评分数据（请求触发）
+STORE_REFRESH_OVERLAP = 5    # 增量读取往回多读几秒：别的进程写入的时间戳可能早于它提交的时刻
+
+
+class ScoreService:
+    """常驻进程里的评分 / 补全状态"""
+
+    def __init__(self, store: SourceStore = None, score_ttl: float = SCORE_TTL):
+        self.store = store or SourceStore()
+        self.gpts = GPTsAnalyzer()
+        self.scorer = KeywordScorer()
+        self.scores = SingleFlight(score_ttl)
+        self.enrichment = SingleFlight()   # 同一 (源, 词) 的并发补全只跑一次
+        self._stages = {}
+        self._watermark = 0.0              # 已并入的最新 fetched_at
+        self._refreshed = 0.0
+        self._refresh_lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {"score": 0, "enrich": 0, "keywords": 0}
+        self.refresh(force=True)
+        logger.info(f"📦 载入补全数据: trends {len(self.scorer.trends)} / serp {len(self.scorer.serp)}"
+                    f" / deep {len(self.scorer.deep)}")
+
+    @staticmethod
+    def _serp(payload: Dict) -> Dict:
+        """SERP 结果统一成评分用的 top_domains 形式（分源调度器存的是 competitors）"""
+        return payload if 'top_domains' in payload else {"top_domains": payload.get("competitors", [])}
+
+    def refresh(self, force: bool = False) -> int:
+        """把 SourceStore 里上次同步之后写入的结果并入评分数据，返回数据有变化的词数"""
+        if not force and time.time() - self._refreshed < STORE_REFRESH:
+            return 0
+        with self._refresh_lock:
+            if not force and time.time() - self._refreshed < STORE_REFRESH:
+                return 0
+            self._refreshed = time.time()
+            since = self._watermark - STORE_REFRESH_OVERLAP
+            changed = set()
+            for source, target in (("trends", self.scorer.trends), ("serp", self.scorer.serp),
+                                   ("deep", self.scorer.deep)):
+                for keyword, (payload, fetched_at) in self.store.changed_since(source, since).items():
+                    self._watermark = max(self._watermark, fetched_at)
+                    payload = self._serp(payload) if source == "serp" else payload
+                    if target.get(keyword) != payload:
+                        target[keyword] = payload
+                        changed.add(keyword)
+            for keyword in changed:
+                self.scores.invalidate(keyword)
+        if changed and not force:
+            logger.info(f"🔄 从结果库并入 {len(changed)} 个关键词的新数据")
+        return len(changed)
+
+    # ============ 评分 ============
+
+    def _score_one(self, keyword: str) -> Dict:
+        if keyword not in self.scorer.gpts:
+            self.scorer.gpts[keyword] = self.gpts.analyze_keyword(keyword)
+        return self.scorer.score([keyword])[0]
+
+    def score(self, keywords: List[str]) -> List[Dict]:
+        """批量评分（已评过且数据未变的词直接复用），按最终分数排序"""
+        self.requests["score"] += 1
+        self.requests["keywords"] += len(keywords)
+        self.refresh()
+        scored = [dict(self.scores.do(kw, lambda kw=kw: self._score_one(kw)))
+                  for kw in dict.fromkeys(keywords)]
+        return self.scorer.get_final_results(scored)
+
+    # ============ 补全 ============
+
+    def _stage(self, source: str):
+        if source not in self._stages:
+            from enrich_queue import build_stages
+            stages = build_stages(**{source: True})
+            self._stages[source] = stages[0][1]
+        return self._stages[source]
+
+    def _enrich_one(self, source: str, keyword: str, max_age: float):
+        cached = self.store.get(source, keyword, max_age=max_age)
+        if cached is not None:
+            return cached
+
+        def fetch():
+            result = self._stage(source)(keyword)
+            if result is not None:
+                self.store.put(source, keyword, result)
+            return result
+        return self.enrichment.do((source, keyword), fetch)
+
+    def enrich(self, keywords: List[str], sources: List[str], max_age: float = LOCALE_RESULT_MAX_AGE) -> Dict:
+        """补全并把结果并入评分数据：{源: {关键词: 结果}}"""
+        self.requests["enrich"] += 1
+        target = {"trends": self.scorer.trends, "serp": self.scorer.serp, "deep": self.scorer.deep}
+        keywords = list(dict.fromkeys(keywords))
+        results = {}
+        for source in sources:
+            with ThreadPoolExecutor(max_workers=ENRICH_WORKERS) as pool:
+                fetched = pool.map(lambda kw: (kw, self._enrich_one(source, kw, max_age)), keywords)
+                results[source] = {kw: result for kw, result in fetched if result is not None}
+            target[source].update(results[source])
+            for keyword in results[source]:
+                self.scores.invalidate(keyword)
+        return results
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started),
+            "requests": self.requests,
+            "score_cache": self.scores.stats,
+            "enrich_cache": self.enrichment.stats,
+            "data": {"trends": len(self.scorer.trends), "serp": len(self.scorer.serp),
+                     "deep": len(self.scorer.deep), "gpts": len(self.scorer.gpts),
+                     "refreshed": round(time.time() - self._refreshed)},
+            "sources": get_registry().snapshot(),
+        }
+
+
+class ServiceError(Exception):
+    """请求参数错误（返回 400）"""
+
+
+def _keywords(body: Dict) -> List[str]:
+    keywords = body.get("keywords")
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        raise ServiceError("keywords 必须是字符串列表")
+    if len(keywords) > MAX_BATCH:
+        raise ServiceError(f"单次最多 {MAX_BATCH} 个关键词")
+    return [k.strip() for k in keywords if k.strip()]
+
+
+def _max_age(body: Dict) -> float:
+    value = body.get("max_age", LOCALE_RESULT_MAX_AGE)
+    try:
+        max_age = float(value) if not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        max_age = None
+    if max_age is None or not max_age >= 0:
+        raise ServiceError("max_age 必须是非负数（秒）")
+    return max_age
+
+
+class ScoreHandler(BaseHTTPRequestHandler):
+    service: ScoreService = None
+
+    def _send(self, status: int, payload: Dict):
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ServiceError("请求体不是合法 JSON")
+        if not isinstance(body, dict):
+            raise ServiceError("请求体必须是 JSON 对象")
+        return body
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, self.service.health())
+        else:
+            self._send(404, {"error": f"未知路径 {self.path}"})
+
+    def do_POST(self):
+        start = time.time()
+        try:
+            body = self._body()
+            if self.path == "/score":
+                results = self.service.score(_keywords(body))
+                payload = {"count": len(results), "results": results}
+            elif self.path == "/enrich":
+                sources = body.get("sources") or ["trends"]
+                unknown = [s for s in sources if s not in ENRICH_SOURCES]
+                if unknown:
+                    raise ServiceError(f"未知数据源: {', '.join(map(str, unknown))}")
+                max_age = _max_age(body)
+                payload = {"results": self.service.enrich(_keywords(body), sources, max_age)}
+            else:
+                self._send(404, {"error": f"未知路径 {self.path}"})
+                return
+        except ServiceError as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception(f"❌ {self.path} 处理失败")
+            self._send(500, {"error": str(e)})
+            return
+        payload["elapsed_ms"] = round((time.time() - start) * 1000, 1)
+        self._send(200, payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, service: ScoreService = None) -> ThreadingHTTPServer:
+    """创建服务（调用方负责 serve_forever / shutdown）"""
+    handler = type("BoundScoreHandler", (ScoreHandler,), {"service": service or ScoreService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profit Hunter ULTIMATE - 常驻评分服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"端口 (默认 {DEFAULT_PORT})")
+    parser.add_argument("--db", type=str, default=None, help="结果库路径 (默认 data/source_store.db)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = serve(args.host, args.port, ScoreService(SourceStore(args.db)))
+    logger.info(f"🚀 评分服务已启动: http://{args.host}:{args.port}  (POST /score /enrich, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n\n⏹️  评分服务已停止')
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
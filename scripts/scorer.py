@@ -12,6 +12,9 @@
 """
 
 from config import *
+from domain_index import GIANT, WEAK, default_index
+from keyword_index import get_keyword_index
+from scoring_engine import get_engine
 from typing import Dict, List, Tuple
 
 
@@ -25,6 +28,9 @@ class KeywordScorer:
         self.serp = serp_data or {}
         self.deep = deep_data or {}
         self.weights = WEIGHTS
+        self.domains = default_index()
+        self.engine = get_engine()
+        self.keyword_index = get_keyword_index()  # 还没建过索引时为 None（不算同族加分）
     
     def score(self, keywords: List[str]) -> List[Dict]:
         """评分所有关键词"""
@@ -54,13 +60,13 @@ class KeywordScorer:
         trend = self._calc_trend(keyword_lower)
         
         # 6. 综合评分
-        final_score = (
-            demand_validation['score'] * self.weights['demand_validation'] +
-            monetization['score'] * self.weights['monetization'] +
-            pain_score['score'] * self.weights['pain_score'] +
-            competition['score'] * self.weights['competition'] +
-            trend['score'] * self.weights['trend']
-        )
+        final_score = self.engine.combine('keyword', {
+            'demand_validation': demand_validation['score'],
+            'monetization': monetization['score'],
+            'pain_score': pain_score['score'],
+            'competition': competition['score'],
+            'trend': trend['score'],
+        })
         
         # 7. 决策判断
         decision = self._make_decision(final_score, pain_score['score'], competition)
@@ -69,7 +75,7 @@ class KeywordScorer:
         pseo = self._assess_pseo_potential(keyword_lower)
         
         # 9. 变现建议
-       变现建议 = self._suggest_monetization(monetization, pain_score)
+        变现建议 = self._suggest_monetization(monetization, pain_score)
         
         return {
             'keyword': keyword,
@@ -115,6 +121,38 @@ class KeywordScorer:
             '变现建议': 变现建议
         }
     
+    def local_signals(self, keyword: str) -> Dict:
+        """只用本地规则的信号（不依赖 Trends/SERP/深度搜索数据），用于补全前的预评分"""
+        keyword_lower = keyword.lower()
+        return {
+            'demand': self._validate_demand(keyword_lower),
+            'monetization': self._assess_monetization(keyword_lower),
+            'pain': self._calc_pain_score(keyword_lower),
+            'pseo': self._assess_pseo_potential(keyword_lower, families=False)
+        }
+    
+    def local_scores(self, keyword: str) -> Dict[str, float]:
+        """local_signals 的快速版：只算四个分数，不拼信号说明（预评分 / 大批量预筛用）"""
+        engine = self.engine
+        keyword_lower = keyword.lower()
+        match = engine.match(keyword_lower)
+        
+        # 与 _validate_demand 的判定一致
+        is_transactional = bool(engine.hits(match, 'demand', 'tool') or engine.hits(match, 'demand', 'solve'))
+        pain_count = engine.hits(match, 'demand', 'critical') * 3 + engine.hits(match, 'demand', 'medium') * 2
+        demand_bonus = 30 if is_transactional else (15 if pain_count > 3 else 0)
+        
+        # 与 _assess_pseo_potential 的长尾加分一致
+        word_count = len(keyword_lower.split())
+        pseo_bonus = 15 if 3 <= word_count <= 5 else (25 if word_count >= 5 else 0)
+        
+        return {
+            'demand': engine.score(match, 'demand', extra=demand_bonus),
+            'monetization': engine.score(match, 'monetization'),
+            'pain': engine.score(match, 'pain'),
+            'pseo': engine.score(match, 'pseo', extra=pseo_bonus)
+        }
+    
     def _validate_demand(self, keyword: str) -> Dict:
         """
         5问法验证需求真伪
@@ -124,32 +162,20 @@ class KeywordScorer:
         Q4: 是否有付费意愿?
         Q5: 竞争是否激烈?
         """
+        engine = self.engine
+        match = engine.match(keyword)
         signals = []
-        is_transactional = False
         is_valid = False
         
         # Q1: Transactional 意图检测
-        for signal in TRANSACTIONAL_SIGNALS['tool']:
-            if signal in keyword:
-                signals.append(f"工具信号: {signal}")
-                is_transactional = True
-        
-        for signal in TRANSACTIONAL_SIGNALS['solve']:
-            if signal in keyword:
-                signals.append(f"解决信号: {signal}")
-                is_transactional = True
+        signals += [f"工具信号: {s}" for s in engine.matched(match, 'demand', 'tool')]
+        signals += [f"解决信号: {s}" for s in engine.matched(match, 'demand', 'solve')]
+        is_transactional = bool(signals)
         
         # Q2-Q4: 痛点检测 (有痛点 = 有需求)
-        pain_count = 0
-        for trigger in PAIN_TRIGGERS['critical']:
-            if trigger in keyword:
-                signals.append(f"痛点: {trigger}")
-                pain_count += 3
-        
-        for trigger in PAIN_TRIGGERS['medium']:
-            if trigger in keyword:
-                signals.append(f"中痛点: {trigger}")
-                pain_count += 2
+        signals += [f"痛点: {t}" for t in engine.matched(match, 'demand', 'critical')]
+        signals += [f"中痛点: {t}" for t in engine.matched(match, 'demand', 'medium')]
+        pain_count = engine.hits(match, 'demand', 'critical') * 3 + engine.hits(match, 'demand', 'medium') * 2
         
         # Q3: 如果有痛苦信号，且是工具需求 = 强 Transactional
         if is_transactional and pain_count > 0:
@@ -162,24 +188,18 @@ class KeywordScorer:
             is_valid = True
             signals.append("⚠️ 纯痛点表达，可能是 Info 意图")
         
-        # Q5: 如果只是 Info 信号，降低权重
-        info_count = 0
-        for signal in INFO_SIGNALS:
-            if signal in keyword:
-                info_count += 1
-                signals.append(f"INFO信号: {signal}")
+        # Q5: 如果只是 Info 信号，降低权重（规则分值在 SCORING_MODELS['demand']）
+        signals += [f"INFO信号: {s}" for s in engine.matched(match, 'demand', 'info')]
         
         # 计算需求验证分数
-        base_score = 50
+        bonus = 0
         if is_transactional and is_valid:
-            base_score += 30
+            bonus = 30
         elif is_valid:
-            base_score += 15
-        base_score += pain_count
-        base_score -= info_count * 5  # INFO信号降低分数
+            bonus = 15
         
         return {
-            'score': min(100, max(0, base_score)),
+            'score': engine.score(match, 'demand', extra=bonus),
             'is_valid': is_valid,
             'intent_type': 'transactional' if is_transactional else 'info',
             'signals': signals[:5]  # 只保留前5个信号
@@ -187,77 +207,44 @@ class KeywordScorer:
     
     def _assess_monetization(self, keyword: str) -> Dict:
         """商业价值判断 - 止痛药 vs 维生素"""
-        score = 50  # 基础分
-        signals = []
-        is_b2b = False
-        is_transactional = False
-        
-        # B2B 信号 = 高客单价
-        for signal in TRANSACTIONAL_SIGNALS['b2b']:
-            if signal in keyword:
-                signals.append(f"B2B: {signal}")
-                is_b2b = True
-                score += 20
-        
-        # Transactional 信号 = 有付费可能
-        for signal in TRANSACTIONAL_SIGNALS['tool']:
-            if signal in keyword:
-                signals.append(f"工具需求: {signal}")
-                is_transactional = True
-                score += 15
-        
-        # 解决类信号 = 止痛药
-        for signal in TRANSACTIONAL_SIGNALS['solve']:
-            if signal in keyword:
-                signals.append(f"解决方案: {signal}")
-                score += 10
-        
-        # 免费信号 = 低客单价但高流量
-        if 'free' in keyword:
-            signals.append("免费需求")
-            score += 5  # 免费 = 低客单但高转化
+        engine = self.engine
+        match = engine.match(keyword)
+        
+        # B2B 信号 = 高客单价；Transactional 信号 = 有付费可能；解决类信号 = 止痛药
+        signals = [f"B2B: {s}" for s in engine.matched(match, 'monetization', 'b2b')]
+        signals += [f"工具需求: {s}" for s in engine.matched(match, 'monetization', 'tool')]
+        signals += [f"解决方案: {s}" for s in engine.matched(match, 'monetization', 'solve')]
         
-        # online 信号 = 便捷需求
-        if 'online' in keyword:
+        # 免费信号 = 低客单价但高流量；online 信号 = 便捷需求
+        if engine.hits(match, 'monetization', 'free'):
+            signals.append("免费需求")
+        if engine.hits(match, 'monetization', 'online'):
             signals.append("在线需求")
-            score += 5
         
         return {
-            'score': min(100, score),
-            'is_b2b': is_b2b,
-            'is_transactional': is_transactional,
+            'score': engine.score(match, 'monetization'),
+            'is_b2b': engine.hits(match, 'monetization', 'b2b') > 0,
+            'is_transactional': engine.hits(match, 'monetization', 'tool') > 0,
             'signals': signals[:4]
         }
     
     def _calc_pain_score(self, keyword: str) -> Dict:
         """痛点深度评分 - 痛苦越深越容易收钱"""
-        score = 50  # 基础分
-        keywords = []
-        level = 'low'
+        engine = self.engine
+        match = engine.match(keyword)
         
-        # 强烈痛点
-        for trigger in PAIN_TRIGGERS['critical']:
-            if trigger in keyword:
-                keywords.append(trigger)
-                score += 20
-                level = 'critical'
-        
-        # 中度痛点
-        for trigger in PAIN_TRIGGERS['medium']:
-            if trigger in keyword:
-                keywords.append(trigger)
-                score += 10
-                if level != 'critical':
-                    level = 'medium'
-        
-        # 修复类
-        for trigger in PAIN_TRIGGERS['fix']:
-            if trigger in keyword:
-                keywords.append(trigger)
-                score += 5
+        # 强烈痛点 / 中度痛点 / 修复类
+        keywords = (engine.matched(match, 'pain', 'critical')
+                    + engine.matched(match, 'pain', 'medium')
+                    + engine.matched(match, 'pain', 'fix'))
+        level = 'low'
+        if engine.hits(match, 'pain', 'critical'):
+            level = 'critical'
+        elif engine.hits(match, 'pain', 'medium'):
+            level = 'medium'
         
         return {
-            'score': min(100, score),
+            'score': engine.score(match, 'pain'),
             'level': level,
             'keywords': keywords[:3]
         }
@@ -275,9 +262,10 @@ class KeywordScorer:
             top_domains = serp.get('top_domains', [])
             competitors = top_domains
             
-            # 巨头检测
-            has_giant = any(g in d for d in top_domains for g in GIANTS)
-            has_weak = any(w in d for d in top_domains for w in WEAK_COMPETITORS)
+            # 巨头 / 弱竞争者检测
+            summary = self.domains.summarize(top_domains)
+            has_giant = summary.get(GIANT, 0) > 0
+            has_weak = summary.get(WEAK, 0) > 0
             
             if has_giant:
                 score = 30
@@ -329,35 +317,44 @@ class KeywordScorer:
             'ratio': ratio
         }
     
-    def _assess_pseo_potential(self, keyword: str) -> Dict:
-        """pSEO 潜力评估 - 能否裂变出1000个页面"""
-        score = 50
-        patterns = []
+    def _assess_pseo_potential(self, keyword: str, families: bool = True) -> Dict:
+        """pSEO 潜力评估 - 能否裂变出1000个页面（families=True 时按语料里的同模板兄弟词数加分）"""
+        engine = self.engine
+        match = engine.match(keyword)
         potential = 'low'
         
         # 检测 pSEO 模式
-        for base, variants in PSEO_PATTERNS:
-            if base in keyword:
-                patterns.append(f"{base} + {variants}")
-                score += 15
+        variants = dict(PSEO_PATTERNS)
+        patterns = [f"{base} + {variants[base]}" for base in engine.matched(match, 'pseo', 'pattern')]
         
         # 长尾词潜力
+        bonus = 0
         word_count = len(keyword.split())
         if 3 <= word_count <= 5:
-            score += 15
+            bonus = 15
             potential = 'medium'
         elif word_count >= 5:
-            score += 25
+            bonus = 25
             potential = 'high'
         
         # convert X to Y 模式 = 强 pSEO
-        if ' to ' in keyword or ' from ' in keyword:
-            score += 20
+        if engine.hits(match, 'pseo', 'x_to_y'):
             patterns.append("X to Y 转换模式")
             potential = 'high'
         
+        # 语料里已有的同模板兄弟词 = 实际能裂变的页面
+        if families and self.keyword_index is not None:
+            template, siblings = self.keyword_index.family_size(keyword)
+            for min_siblings, family_bonus, family_potential in PSEO_FAMILY_TIERS:
+                if siblings >= min_siblings:
+                    bonus += family_bonus
+                    if potential != 'high':
+                        potential = family_potential
+                    patterns.insert(0, f"同族 {siblings} 个兄弟词: {template}")
+                    break
+        
         return {
-            'score': min(100, score),
+            'score': engine.score(match, 'pseo', extra=bonus),
             'potential': potential,
             'patterns': patterns[:3]
         }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+统一评分引擎 - 声明式规则编译成一个求值器
+========================================
+
+KeywordScorer、profit_hunter_v3.calculate_super_score、blue_ocean_hunter.calculate_need_score、
+ProfitHunterUltimate.step4/step5 以前各有一套手写循环和词表。现在规则和权重统一声明在
+config.SCORING_MODELS / SCORE_WEIGHTS，这里启动时编译一次：
+
+- 所有模型的信号词合进一个匹配器（PhraseMatcher），每个关键词只扫描一遍，
+  一次匹配结果可以给所有模型复用
+- 规则展开成扁平数组（分值 / 计分方式 / 所属模型），短语 id → 规则 id 预先建好
+- 支持单个关键词求值和批量求值（批量时相同文本只匹配一次）
+
+匹配语义与原来的 `signal in keyword_lower` 完全一致，分数不变。
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from config import SCORE_WEIGHTS, SCORING_MODELS
+from phrase_matcher import PhraseMatcher
+
+MAX_CACHE = 50_000
+
+
+class Match:
+    """一个文本的匹配结果：命中的短语 id + 每条规则的命中次数"""
+
+    __slots__ = ("text", "phrase_ids", "rule_hits")
+
+    def __init__(self, text: str, phrase_ids, rule_hits: Dict[int, int]):
+        self.text = text
+        self.phrase_ids = phrase_ids
+        self.rule_hits = rule_hits
+
+
+class ScoringEngine:
+    """编译后的评分规则集"""
+
+    def __init__(self, models: Dict[str, Dict] = None, weights: Dict[str, Sequence] = None):
+        models = SCORING_MODELS if models is None else models
+        weights = SCORE_WEIGHTS if weights is None else weights
+
+        # 模型级数组
+        self.model_names: List[str] = []
+        self._model_rules: List[range] = []
+        self._model_base: List[float] = []
+        self._model_min: List[Optional[float]] = []
+        self._model_max: List[Optional[float]] = []
+        self._model_tier: List[bool] = []
+        # 规则级扁平数组
+        self.rule_names: List[str] = []
+        self._rule_weight: List[float] = []
+        self._rule_each: List[bool] = []
+        self._rule_order: List[Dict[int, int]] = []   # 规则内 短语 id → 在原词表中的位置
+        self._rule_index: Dict[Tuple[str, str], int] = {}
+
+        phrase_rules: List[Tuple[str, int]] = []
+        for name, spec in models.items():
+            start = len(self.rule_names)
+            for rule_name, phrases, weight, how in spec["rules"]:
+                rule_id = len(self.rule_names)
+                self.rule_names.append(rule_name)
+                self._rule_weight.append(weight)
+                self._rule_each.append(how == "each")
+                self._rule_order.append({})
+                self._rule_index[(name, rule_name)] = rule_id
+                phrase_rules.extend((phrase, rule_id) for phrase in phrases)
+            self.model_names.append(name)
+            self._model_rules.append(range(start, len(self.rule_names)))
+            self._model_base.append(spec.get("base", 0))
+            self._model_min.append(spec.get("min"))
+            self._model_max.append(spec.get("max"))
+            self._model_tier.append(spec.get("mode") == "tier")
+        self._model_index = {name: i for i, name in enumerate(self.model_names)}
+
+        # 一个匹配器覆盖所有模型；同一短语出现在多条规则（或同一词表重复出现）都会计入
+        self.matcher = PhraseMatcher(phrase for phrase, _ in phrase_rules)
+        self._phrase_rules: List[List[int]] = [[] for _ in self.matcher.phrases]
+        for position, (phrase, rule_id) in enumerate(phrase_rules):
+            pid = self.matcher.phrase_id(phrase)
+            self._phrase_rules[pid].append(rule_id)
+            self._rule_order[rule_id].setdefault(pid, position)
+
+        # 维度加权：名称 → (特征名列表, 权重列表)
+        self._combine = {
+            name: ([key for key, _ in pairs], [w for _, w in pairs])
+            for name, pairs in weights.items()
+        }
+        self._cache: Dict[str, Match] = {}
+
+    # ============ 匹配 ============
+
+    def match(self, text: Union[str, Match]) -> Match:
+        """匹配一次（不区分大小写），结果可以给所有模型复用"""
+        if isinstance(text, Match):
+            return text
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+        phrase_ids = self.matcher.find(text.lower())
+        rule_hits: Dict[int, int] = {}
+        for pid in phrase_ids:
+            for rule_id in self._phrase_rules[pid]:
+                rule_hits[rule_id] = rule_hits.get(rule_id, 0) + 1
+        result = Match(text, phrase_ids, rule_hits)
+        if len(self._cache) >= MAX_CACHE:
+            self._cache.clear()
+        self._cache[text] = result
+        return result
+
+    def hits(self, text: Union[str, Match], model: str, rule: str) -> int:
+        """某条规则命中的信号词数"""
+        return self.match(text).rule_hits.get(self._rule_index[(model, rule)], 0)
+
+    def matched(self, text: Union[str, Match], model: str, rule: str) -> List[str]:
+        """某条规则命中的信号词（按词表原顺序）"""
+        order = self._rule_order[self._rule_index[(model, rule)]]
+        pids = [pid for pid in self.match(text).phrase_ids if pid in order]
+        return [self.matcher.phrases[pid] for pid in sorted(pids, key=order.get)]
+
+    def fired(self, text: Union[str, Match], model: str) -> List[str]:
+        """模型中有命中的规则名（按声明顺序）"""
+        rule_hits = self.match(text).rule_hits
+        return [self.rule_names[r] for r in self._model_rules[self._model_index[model]] if r in rule_hits]
+
+    # ============ 求值 ============
+
+    def score(self, text: Union[str, Match], model: str, extra: float = 0):
+        """单个文本在某个模型下的得分；extra 在截断前加入（用于代码里的条件加分）"""
+        m = self._model_index[model]
+        rule_hits = self.match(text).rule_hits
+        if self._model_tier[m]:
+            value = self._model_base[m]
+            for rule_id in self._model_rules[m]:
+                if rule_id in rule_hits:
+                    value = self._rule_weight[rule_id]
+                    break
+        else:
+            value = self._model_base[m]
+            for rule_id in self._model_rules[m]:
+                count = rule_hits.get(rule_id, 0)
+                if count:
+                    value += self._rule_weight[rule_id] * (count if self._rule_each[rule_id] else 1)
+        value += extra
+        if self._model_max[m] is not None:
+            value = min(self._model_max[m], value)
+        if self._model_min[m] is not None:
+            value = max(self._model_min[m], value)
+        return value
+
+    def scores(self, text: Union[str, Match], models: Iterable[str] = None) -> Dict[str, float]:
+        """一次匹配，多个模型一起求值"""
+        match = self.match(text)
+        return {model: self.score(match, model) for model in (models or self.model_names)}
+
+    def score_batch(self, texts: Iterable[str], model: str) -> List[float]:
+        """批量求值（重复文本只匹配一次）"""
+        memo: Dict[str, float] = {}
+        results = []
+        for text in texts:
+            if text not in memo:
+                memo[text] = self.score(text, model)
+            results.append(memo[text])
+        return results
+
+    def combine(self, name: str, features: Dict[str, float]) -> float:
+        """按 SCORE_WEIGHTS[name] 对各维度得分加权求和"""
+        keys, weights = self._combine[name]
+        total = 0
+        for key, weight in zip(keys, weights):
+            total += features[key] * weight
+        return total
+
+    def combine_batch(self, name: str, rows: Iterable[Dict[str, float]]) -> List[float]:
+        keys, weights = self._combine[name]
+        results = []
+        for features in rows:
+            total = 0
+            for key, weight in zip(keys, weights):
+                total += features[key] * weight
+            results.append(total)
+        return results
+
+
+_engine: Optional[ScoringEngine] = None
+
+
+def get_engine() -> ScoringEngine:
+    """进程内共享的评分引擎（按 config 编译一次）"""
+    global _engine
+    if _engine is None:
+        _engine = ScoringEngine()
+    return _engine
@@ -3,6 +3,13 @@
 SERP 竞争分析模块 - 降维打击检测 - V3 简化版
 """
 
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from domain_index import GIANT, WEAK, DomainIndex
+
 
 class SERPAnalyzer:
     """SERP 竞争分析器 - V3 简化版"""
@@ -19,6 +26,7 @@ class SERPAnalyzer:
             "canva.com", "figma.com", "notion.so",
             "amazon.com", "apple.com", "facebook.com"
         ]
+        self.domains = DomainIndex({WEAK: self.weak_competitors, GIANT: self.giants})
     
     def analyze(self, keywords):
         """分析 SERP 竞争度 - V3 简化版"""
@@ -103,8 +111,8 @@ class SERPAnalyzer:
     
     def is_weak_competitor(self, domain):
         """检测是否是弱竞争者"""
-        return any(wc in domain.lower() for wc in self.weak_competitors)
+        return self.domains.classify(domain) == WEAK
     
     def is_giant(self, domain):
         """检测是否是大厂"""
-        return any(g in domain.lower() for g in self.giants)
+        return self.domains.classify(domain) == GIANT
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+SERP 流式解析器 - 只提取自然结果（URL + 排名）
+==============================================
+
+以前对整页 HTML 做 re.findall(r'https?://([^/]+)')，会把静态资源、跟踪域名全部当成竞争对手，
+去重还是 O(n²) 的列表查找。这里边下载边解析：
+- 只认「链接里包含 <h3> 标题」的结果（自然结果的结构；广告 /aclk、站内导航都没有 h3）
+- 兼容无 JS 版的 /url?q=<目标> 跳转链接
+- 找够 top N 条立即停止读取并关闭连接，剩下的响应体不再下载
+"""
+
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Google 自身的非结果链接（快照、翻译、账号等）
+EXCLUDED_HOSTS = {
+    "webcache.googleusercontent.com", "translate.google.com",
+    "accounts.google.com", "policies.google.com",
+}
+
+CHUNK_SIZE = 16 * 1024
+
+
+def result_url(href: Optional[str]) -> Optional[str]:
+    """把结果链接还原成目标 URL；不是外部结果链接时返回 None"""
+    if not href:
+        return None
+    if href.startswith("/url?"):
+        query = parse_qs(urlparse(href).query)
+        target = query.get("q") or query.get("url")
+        href = target[0] if target else None
+        if not href:
+            return None
+    if not href.startswith(("http://", "https://")):
+        return None
+    host = urlparse(href).hostname or ""
+    if not host or host in EXCLUDED_HOSTS:
+        return None
+    return href
+
+
+def result_domain(url: str) -> str:
+    """结果 URL 的主机名（去掉 www.）"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class SerpResultParser(HTMLParser):
+    """增量 SERP 解析器：feed() 分块喂入，done 为 True 后即可停止"""
+
+    def __init__(self, top_n: int = 10):
+        super().__init__(convert_charrefs=True)
+        self.top_n = top_n
+        self.results: List[Dict] = []
+        self._seen = set()
+        self._anchor_url = None
+        self._anchor_has_title = False
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) >= self.top_n
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "a":
+            self._anchor_url = result_url(dict(attrs).get("href"))
+            self._anchor_has_title = False
+        elif tag == "h3" and self._anchor_url:
+            self._anchor_has_title = True
+
+    def handle_endtag(self, tag):
+        if tag != "a" or not self._anchor_url:
+            return
+        url, has_title = self._anchor_url, self._anchor_has_title
+        self._anchor_url = None
+        if has_title and url not in self._seen and not self.done:
+            self._seen.add(url)
+            self.results.append({
+                "position": len(self.results) + 1,
+                "url": url,
+                "domain": result_domain(url),
+            })
+
+
+def parse_serp(chunks: Iterable[str], top_n: int = 10) -> List[Dict]:
+    """解析文本块序列，找够 top_n 条就停止消费"""
+    parser = SerpResultParser(top_n)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.results
+
+
+def iter_text(response, chunk_size: int = CHUNK_SIZE) -> Iterable[str]:
+    """把 requests 的流式响应增量解码成文本块"""
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    for raw in response.iter_content(chunk_size=chunk_size):
+        text = decoder.decode(raw)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def fetch_organic_results(session, url: str, top_n: int = 10, **kwargs) -> List[Dict]:
+    """
+    流式请求 SERP 并解析自然结果
+
+    session: requests 模块或 requests.Session；kwargs 透传（headers / timeout 等）
+    """
+    response = session.get(url, stream=True, **kwargs)
+    try:
+        response.raise_for_status()
+        return parse_serp(iter_text(response), top_n)
+    finally:
+        response.close()  # 提前结束时不再下载剩余响应体
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+请求合并 + TTL 缓存
+===================
+
+同一个 key 的并发调用只真正执行一次，其余调用等待同一个结果；
+结果在 ttl 秒内直接复用。用于 Trends 等有配额的数据源。
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """同 key 请求合并（in-flight 去重）+ TTL 记忆化"""
+
+    def __init__(self, ttl: float = 0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._cache: Dict[Hashable, Tuple[float, object]] = {}
+        self.stats = {"calls": 0, "hits": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], object], ttl: float = None):
+        """执行 fn（或复用缓存 / 等待正在进行的同 key 调用）；ttl=0 表示只合并不缓存"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.time():
+                self.stats["hits"] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if ttl > 0:
+                with self._lock:
+                    self._cache[key] = (time.time() + ttl, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def invalidate(self, key: Hashable = None):
+        """清除某个 key（或全部）的缓存"""
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[key]
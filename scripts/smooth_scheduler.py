@@ -2,7 +2,7 @@
 """
 Profit Hunter ULTIMATE V3 - 平滑消耗调度器
 每天 4 次运行：00:00, 06:00, 12:00, 18:00
-每次 1 小时深度分析
+每次 1 小时深度分析（RUN_DEADLINE_MINUTES 截止，慢阶段交出部分结果，不会拖进下一个时间段）
 """
 
 import schedule
@@ -12,6 +12,10 @@ import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 
+sys.path.insert(0, str(Path(__file__).parent))
+from config import EVENTS_FILE
+from events import get_events, open_events
+
 # 配置日志
 log_dir = Path(__file__).parent / 'logs'
 log_dir.mkdir(exist_ok=True)
@@ -27,6 +31,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RUN_DEADLINE_MINUTES = 60  # 每次运行的截止时间
+
 
 class TokenBudget:
     """Token 预算控制 - 平滑消耗"""
@@ -110,10 +116,15 @@ class SmoothRunner:
                 playwright = True
                 deep_search = True  # ✅ 深度社区搜索
                 max = 200
+                budget_requests = None
+                budget_minutes = None
+                deadline = RUN_DEADLINE_MINUTES
                 trends_only = False
                 quiet = False
+                events = str(EVENTS_FILE)  # 进度事件流，python watch_events.py 实时查看
             
             args = Args()
+            open_events(args.events)  # 每次运行轮转事件文件，上次的改名为 .1
             
             # 执行挖掘
             results = run_pipeline(args)
@@ -138,6 +149,8 @@ class SmoothRunner:
             
         except Exception as e:
             logger.error(f'❌ 运行失败: {e}')
+            get_events().error(e)
+            get_events().emit("run_end", ok=False)
             import traceback
             traceback.print_exc()
     
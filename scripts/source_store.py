@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+分源结果存储 - 各数据源（suggest / trends / serp / reddit）的持久化结果
+=====================================================================
+
+每个数据源按自己的节奏刷新，结果按 (source, keyword) 落到同一个 SQLite 文件，
+下游评分直接读取最新结果，不必重新请求网络。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import DATA_DIR
+
+
+class SourceStore:
+    """分源结果存储 (SQLite)"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "source_store.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                source     TEXT NOT NULL,
+                keyword    TEXT NOT NULL,
+                payload    TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (source, keyword)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_fetched ON results (source, fetched_at)")
+        self.conn.commit()
+
+    def put(self, source: str, keyword: str, payload: Dict):
+        """写入（覆盖）一条结果"""
+        data = json.dumps(payload, ensure_ascii=False, default=str)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (source, keyword, data, time.time())
+            )
+            self.conn.commit()
+
+    def get(self, source: str, keyword: str, max_age: float = None) -> Optional[Dict]:
+        """读取一条结果；超过 max_age 秒的视为过期，返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload, fetched_at FROM results WHERE source = ? AND keyword = ?",
+                (source, keyword)
+            ).fetchone()
+        if not row:
+            return None
+        if max_age is not None and time.time() - row[1] > max_age:
+            return None
+        return json.loads(row[0])
+
+    def is_fresh(self, source: str, keyword: str, max_age: float) -> bool:
+        """结果是否仍在有效期内"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT fetched_at FROM results WHERE source = ? AND keyword = ?",
+                (source, keyword)
+            ).fetchone()
+        return bool(row) and time.time() - row[0] <= max_age
+
+    def keywords(self, source: str) -> List[str]:
+        """某个数据源已有结果的关键词"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT keyword FROM results WHERE source = ? ORDER BY keyword",
+                (source,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def fetched_at(self, source: str) -> Dict[str, float]:
+        """某个数据源各关键词最后一次抓取的时间戳: keyword -> fetched_at"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT keyword, fetched_at FROM results WHERE source = ?", (source,)
+            ).fetchall()
+        return dict(rows)
+
+    def changed_since(self, source: str, since: float) -> Dict[str, Tuple[Dict, float]]:
+        """since 之后写入的结果: keyword -> (payload, fetched_at)（常驻进程增量同步用）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT keyword, payload, fetched_at FROM results WHERE source = ? AND fetched_at > ?",
+                (source, since)
+            ).fetchall()
+        return {keyword: (json.loads(payload), fetched_at) for keyword, payload, fetched_at in rows}
+
+    def load(self, source: str, max_age: float = None) -> Dict[str, Dict]:
+        """读取某个数据源的全部结果: keyword -> payload"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT keyword, payload, fetched_at FROM results WHERE source = ?",
+                (source,)
+            ).fetchall()
+        now = time.time()
+        return {
+            keyword: json.loads(payload)
+            for keyword, payload, fetched_at in rows
+            if max_age is None or now - fetched_at <= max_age
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+确定性合成数据 - 压测 / 基准测试用的可复现工作负载
+==================================================
+
+以前唯一不走网络的数据源是各处的 random 模拟（serp_dimensional_analysis、gpts_market_analysis、
+gpts_contrast、serp_competition_check、generate_blue_ocean_report），没有种子，
+每次运行结果都不一样，也没法控制规模。
+
+这里所有随机数都来自 keyword_rng(keyword, salt)：种子 = hash(全局种子, 用途, 关键词)，
+所以同一个关键词无论在第几个、和谁一起生成，结果都一样；规模可以从 1k 到千万级，
+关键词按下标直接算出来（混合进制 + 置换），流式生成、不占内存、可以分片并行。
+
+用法:
+    python3 synthetic.py keywords -n 1000000 > keywords.txt
+    python3 synthetic.py keywords -n 1000000 --start 5000000   # 分片：第 500 万起的 100 万个
+    python3 synthetic.py serp -n 1000 --seed 7       # 其它: suggest / trends / reddit / gpts
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import (GIANTS, PAIN_TRIGGERS, SOLUTION_SEEKING_SIGNALS, SYNTHETIC_SEED,
+                    TOOL_SITES, WEAK_COMPETITORS)
+
+# ============ 词汇表 ============
+
+PREFIXES = [
+    "", "free", "online", "best", "how to", "bulk", "automatic",
+    "ai", "easy", "quick", "custom", "smart", "secure", "instant", "batch", "offline",
+    "how to fix", "struggling with", "cheap", "professional", "open source", "mobile",
+    "no signup", "without login", "alternative to", "better", "manual", "tiny",
+]
+TOPICS = [
+    "pdf", "excel", "word", "image", "video", "audio", "text", "csv", "json", "xml",
+    "invoice", "resume", "budget", "mortgage", "loan", "tax", "salary", "calorie", "bmi",
+    "password", "qr code", "barcode", "email", "url", "link", "sitemap", "keyword",
+    "youtube", "tiktok", "instagram", "twitter", "linkedin", "reddit", "shopify",
+    "amazon", "etsy", "notion", "slack", "zoom", "gmail", "calendar", "meeting",
+    "habit", "workout", "meal", "recipe", "grocery", "travel", "flight", "hotel",
+    "currency", "time zone", "unit", "temperature", "weight", "distance", "speed",
+    "font", "color", "logo", "icon", "favicon", "banner", "thumbnail", "watermark",
+    "background", "subtitle", "transcript", "podcast", "ebook", "epub", "markdown",
+    "html", "css", "regex", "sql", "cron", "uuid", "hash", "base64", "timestamp",
+    "crypto", "stock", "dividend", "retirement", "savings", "rent", "electricity",
+    "screenshot", "gif", "webp", "heic", "svg", "png", "jpg", "mp3", "mp4", "wav",
+    "contract", "nda", "cover letter", "business plan", "pitch deck", "survey",
+    "quiz", "flashcard", "citation", "essay", "grammar", "paraphrase", "summary",
+    "translation", "plant", "garden", "pet", "baby", "wedding", "gift",
+]
+HEADS = [
+    "calculator", "generator", "converter", "checker", "finder", "tracker",
+    "planner", "comparer", "analyzer", "solver", "maker", "editor", "creator",
+    "builder", "formatter", "validator", "parser", "extractor", "downloader",
+    "compressor", "resizer", "merger", "splitter", "remover", "template",
+    "tool", "app", "software", "api", "extension", "plugin", "script",
+    "dashboard", "organizer", "scheduler", "monitor", "estimator", "counter",
+    "viewer", "reader",
+]
+SUFFIXES = [
+    "", "online", "free", "for beginners", "for small business", "for students",
+    "for teachers", "for mac", "for windows", "for iphone", "for android", "in bulk",
+    "with ai", "without watermark", "not working", "error", "alternative",
+    "vs excel", "to pdf", "to csv", "from image", "from video", "api",
+    "open source", "chrome extension", "template", "2025", "for teams",
+    "step by step", "automatically",
+]
+QUALIFIERS = ["", "fast", "simple", "accurate", "private"]
+# 前缀和限定词在关键词里相邻且都可以为空：两边有同一个词时 "fast" + "" 和 "" + "fast" 会拼出同一个关键词
+assert not set(PREFIXES[1:]) & set(QUALIFIERS[1:]), "PREFIXES 和 QUALIFIERS 不能有相同的词"
+
+SUBREDDITS = ["productivity", "smallbusiness", "excel", "webdev", "Entrepreneur",
+              "SaaS", "techsupport", "learnprogramming", "personalfinance", "software"]
+
+EPOCH = datetime(2025, 1, 1)  # 合成时间序列 / 帖子的固定基准时间，保证可复现
+
+
+def _hash_seed(*parts) -> int:
+    digest = hashlib.blake2b(":".join(str(p) for p in parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def keyword_rng(keyword: str, salt: str = "", seed: int = None) -> random.Random:
+    """关键词专属的随机数生成器：同一 (种子, 用途, 关键词) 永远得到同一序列"""
+    return random.Random(_hash_seed(SYNTHETIC_SEED if seed is None else seed, salt, keyword))
+
+
+class SyntheticWorkload:
+    """按种子生成关键词、建议树、Trends 序列、SERP 域名、Reddit 帖子"""
+
+    DIMENSIONS: Sequence[Sequence[str]] = (PREFIXES, TOPICS, HEADS, SUFFIXES, QUALIFIERS)
+
+    def __init__(self, seed: int = None):
+        self.seed = SYNTHETIC_SEED if seed is None else seed
+        self.capacity = math.prod(len(d) for d in self.DIMENSIONS)
+        # 下标置换 i → (i * stride + offset) mod capacity，stride 与 capacity 互质即为双射，
+        # 让前 n 个关键词分散在整个组合空间里
+        rng = random.Random(self.seed)
+        stride = rng.randrange(1, self.capacity)
+        while math.gcd(stride, self.capacity) != 1:
+            stride += 1
+        self._stride = stride
+        self._offset = rng.randrange(self.capacity)
+
+    def rng(self, keyword: str, salt: str) -> random.Random:
+        return keyword_rng(keyword, salt, self.seed)
+
+    # ============ 关键词 ============
+
+    def keyword(self, index: int) -> str:
+        """第 index 个关键词（index < capacity 时互不重复）"""
+        code = (index * self._stride + self._offset) % self.capacity
+        parts = []
+        for words in reversed(self.DIMENSIONS):
+            code, digit = divmod(code, len(words))
+            parts.append(words[digit])
+        qualifier, suffix, head, topic, prefix = parts
+        return " ".join(p for p in (prefix, qualifier, topic, head, suffix) if p)
+
+    def keywords(self, n: int, start: int = 0) -> Iterator[str]:
+        """流式生成 [start, start + n) 的关键词"""
+        if start + n > self.capacity:
+            raise ValueError(f"最多 {self.capacity:,} 个不重复关键词")
+        for index in range(start, start + n):
+            yield self.keyword(index)
+
+    # ============ 建议树 ============
+
+    def suggestions(self, query: str, fanout: int = 8) -> List[str]:
+        """某个查询的自动补全建议（确定性）"""
+        rng = self.rng(query, "suggest")
+        picks = rng.sample(HEADS, min(fanout, len(HEADS)))
+        extras = rng.sample(SUFFIXES[1:], fanout)
+        return [f"{query} {head} {extra}".strip() if i % 2 else f"{query} {head}"
+                for i, (head, extra) in enumerate(zip(picks, extras))][:fanout]
+
+    def suggest_tree(self, seed_word: str, depth: int = 2, fanout: int = 8) -> Dict[str, List[str]]:
+        """从种子词展开的建议树 {查询: [建议]}，与 Alphabet Soup 的展开方式类似"""
+        tree, frontier = {}, [seed_word]
+        for _ in range(depth):
+            nxt = []
+            for query in frontier:
+                children = self.suggestions(query, fanout)
+                tree[query] = children
+                nxt.extend(children[: max(1, fanout // 4)])
+            frontier = nxt
+        return tree
+
+    # ============ Trends ============
+
+    def trends_series(self, keyword: str, days: int = 90, end: datetime = EPOCH) -> List[Tuple[str, float, bool]]:
+        """日粒度兴趣序列 [(ts, value, partial)]，窗口最大值归一化为 100（与 TrendsStore 点格式一致）"""
+        rng = self.rng(keyword, "trends")
+        level = rng.uniform(10, 60)
+        slope = rng.uniform(-0.3, 0.8)
+        weekly = rng.uniform(0, 0.25)
+        spike_day = rng.randrange(days) if rng.random() < 0.2 else None
+        raw = []
+        for d in range(days):
+            value = level + slope * d
+            value *= 1 + weekly * math.sin(2 * math.pi * d / 7)
+            value *= rng.uniform(0.85, 1.15)
+            if spike_day is not None and abs(d - spike_day) <= 2:
+                value *= 2.5 - 0.5 * abs(d - spike_day)
+            raw.append(max(value, 0.0))
+        peak = max(raw) or 1.0
+        start = end - timedelta(days=days - 1)
+        return [((start + timedelta(days=d)).isoformat(timespec="seconds"),
+                 round(v * 100 / peak), d == days - 1)
+                for d, v in enumerate(raw)]
+
+    # ============ SERP ============
+
+    def serp_domains(self, keyword: str, k: int = 10) -> List[str]:
+        """前 k 名自然结果的域名：弱竞争者 / 巨头 / 工具站 / 长尾站点混合"""
+        rng = self.rng(keyword, "serp")
+        giant_bias = rng.random()
+        domains = []
+        for position in range(k):
+            roll = rng.random()
+            if roll < 0.15 + 0.25 * giant_bias * (position < 3):
+                domains.append(rng.choice(GIANTS))
+            elif roll < 0.55:
+                domains.append(rng.choice(WEAK_COMPETITORS))
+            elif roll < 0.7:
+                domains.append(rng.choice(TOOL_SITES))
+            else:
+                domains.append(f"{rng.choice(TOPICS).replace(' ', '')}{rng.choice(HEADS)}{rng.randrange(100)}.com")
+        return domains
+
+    # ============ Reddit ============
+
+    def reddit_posts(self, keyword: str, n: int = 20, end: datetime = EPOCH) -> List[Dict]:
+        """search.json 风格的帖子 children（RedditStore.add_posts 可直接写入）"""
+        rng = self.rng(keyword, "reddit")
+        pains = PAIN_TRIGGERS["critical"] + PAIN_TRIGGERS["medium"]
+        posts = []
+        for i in range(n):
+            post_id = f"{_hash_seed(self.seed, keyword, i):016x}"  # 完整 64 位，千万级帖子也不撞 id
+            kind = rng.random()
+            if kind < 0.3:
+                title = f"{rng.choice(pains).capitalize()} {keyword}"
+            elif kind < 0.5:
+                title = f"{rng.choice(SOLUTION_SEEKING_SIGNALS).capitalize()} {keyword}?"
+            else:
+                title = f"My {keyword} setup ({rng.randrange(2015, 2026)})"
+            posts.append({"kind": "t3", "data": {
+                "id": post_id,
+                "name": f"t3_{post_id}",
+                "title": title,
+                "selftext": "",
+                "subreddit": rng.choice(SUBREDDITS),
+                "score": int(rng.paretovariate(1.2)) - 1,
+                "num_comments": int(rng.expovariate(1 / 12)),
+                "created_utc": (end - timedelta(minutes=rng.randrange(60 * 24 * 365))).timestamp(),
+            }})
+        return posts
+
+    # ============ GPTs ============
+
+    def gpts(self, keyword: str) -> Dict:
+        rng = self.rng(keyword, "gpts")
+        count = rng.randint(0, 100)
+        return {"gpts_count": count, "growth": round(rng.uniform(-20, 60), 2), "ratio": count / 100.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='确定性合成数据生成器')
+    parser.add_argument('kind', choices=['keywords', 'suggest', 'trends', 'serp', 'reddit', 'gpts'])
+    parser.add_argument('-n', type=int, default=1000, help='关键词数量（其它类型为生成多少个关键词的数据）')
+    parser.add_argument('--start', type=int, default=0, help='起始下标（分片生成用）')
+    parser.add_argument('--seed', type=int, default=None, help=f'种子（默认 {SYNTHETIC_SEED}）')
+    parser.add_argument('--out', default=None, help='输出文件（默认 stdout，JSON Lines）')
+    args = parser.parse_args()
+
+    workload = SyntheticWorkload(args.seed)
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    try:
+        for keyword in workload.keywords(args.n, args.start):
+            if args.kind == 'keywords':
+                out.write(keyword + "\n")
+                continue
+            record = {
+                'suggest': lambda: workload.suggest_tree(keyword),
+                'trends': lambda: workload.trends_series(keyword),
+                'serp': lambda: workload.serp_domains(keyword),
+                'reddit': lambda: workload.reddit_posts(keyword),
+                'gpts': lambda: workload.gpts(keyword),
+            }[args.kind]()
+            out.write(json.dumps({'keyword': keyword, args.kind: record}, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
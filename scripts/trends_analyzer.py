@@ -1,90 +1,69 @@
 #!/usr/bin/env python3
 """
 Google Trends 分析模块 V2
-- 支持二级 Related Queries 深挖
+- Related Queries 深挖走 TrendsCrawler：按飙升值优先、全局去重，展开结果存入查询图
+- 兴趣序列存入 TrendsStore，之后只增量抓取缺失的最近一段
+- 所有请求走共享的 TrendsService（统一节流、请求合并、TTL 缓存）
 """
 
-import time
-from pytrends.request import TrendReq
+from trends_crawler import TrendsCrawler
+from trends_service import TrendsService, get_trends_service
+
+TIMEFRAME = 'today 3-m'
+LEVELS = {1: '1st', 2: '2nd', 3: '3rd'}
+
+
+def level_name(depth: int) -> str:
+    return LEVELS.get(depth, f'{depth}th')
 
 
 class TrendsAnalyzer:
     """Google Trends 分析器 V2"""
     
-    def __init__(self):
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+    def __init__(self, service: TrendsService = None, crawler: TrendsCrawler = None):
+        self.trends = service or get_trends_service()
+        self.store = self.trends.store
+        self.crawler = crawler or TrendsCrawler(self.trends, timeframe=TIMEFRAME)
     
-    def analyze(self, keywords):
-        """分析关键词趋势"""
+    def analyze(self, keywords, deadline=None):
+        """分析关键词趋势（deadline 到点后深挖只复用查询图里现成的节点）"""
         results = {}
         
         for keyword in keywords:
             try:
-                # 构建 payload
-                self.pytrends.build_payload(
-                    kw_list=[keyword],
-                    timeframe='today 3-m'
-                )
+                # 增量更新兴趣序列
+                self.trends.update_series(keyword, TIMEFRAME)
                 
-                interest_over_time = self.pytrends.interest_over_time()
-                related_queries = self.pytrends.related_queries()
+                # 飙升查询（展开结果写入查询图，下面的深挖直接复用）
+                children, _ = self.crawler.expand(keyword)
+                rising = [query for query, _ in children[:10]]
                 
-                # 飙升查询
-                rising = []
-                if related_queries and keyword in related_queries:
-                    rising_data = related_queries[keyword].get('rising', [])
-                    if rising_data is not None:
-                        rising = [q['query'] for q in rising_data.head(10).to_dict('records')]
-                
-                # 计算趋势得分
+                # 计算趋势得分（基于存储的序列）
                 score = 50  # 默认50分
-                growth = 0
-                if not interest_over_time.empty:
-                    recent = interest_over_time[keyword].tail(7).mean()
-                    older = interest_over_time[keyword].tail(30).mean() if len(interest_over_time) > 7 else recent
-                    if older > 0:
-                        growth = (recent - older) / older * 100
-                        score = min(100, max(0, 50 + growth))
+                growth = self.store.growth(keyword, TIMEFRAME)
+                if growth:
+                    score = min(100, max(0, 50 + growth))
                 
                 results[keyword] = {
                     'keyword': keyword,
                     'trend_score': score,
                     'growth': growth,
+                    'is_rising': self.store.is_rising(keyword, TIMEFRAME),
                     'rising_queries': rising,
+                    'history': self.store.features(keyword, TIMEFRAME),
                     'level': '1st',  # 一级
                     'status': 'success'
                 }
                 
-                # 🔥 二级深挖：对每个飙升词再查一次
-                deep_rising = []
-                for rq in rising[:5]:  # 只深挖前5个飙升词
-                    try:
-                        self.pytrends.build_payload(
-                            kw_list=[rq],
-                            timeframe='today 3-m'
-                        )
-                        sub_related = self.pytrends.related_queries()
-                        
-                        if rq in sub_related:
-                            sub_rising = sub_related[rq].get('rising', [])
-                            if sub_rising is not None:
-                                for sq in sub_rising.head(5)['query']:
-                                    if sq not in rising:  # 避免重复
-                                        deep_rising.append({
-                                            'query': sq,
-                                            'parent': rq,
-                                            'level': '2nd'
-                                        })
-                        
-                        time.sleep(2)  # 避免限频
-                    except:
-                        pass
+                # 🔥 深挖：从该词出发按飙升值优先爬取查询图（已展开过的节点不再请求）
+                deep = [node for node in self.crawler.crawl([keyword], deadline).values() if node['depth'] >= 2]
+                deep_rising = [{'query': node['query'], 'parent': node['parent'],
+                                'level': level_name(node['depth']), 'value': node['value']} for node in deep]
                 
                 if deep_rising:
                     results[keyword]['deep_rising'] = deep_rising
-                    results[keyword]['level'] = '1st+2nd'
-                
-                time.sleep(1)
+                    deepest = max(node['depth'] for node in deep)
+                    results[keyword]['level'] = '+'.join(level_name(d) for d in range(1, deepest + 1))
                 
             except Exception as e:
                 results[keyword] = {
@@ -100,14 +79,14 @@ class TrendsAnalyzer:
         return results
     
     def get_all_rising(self, trends_data):
-        """获取所有飙升词（一级 + 二级）"""
+        """获取所有飙升词（一级 + 深挖）"""
         all_rising = []
         
         for data in trends_data.values():
             # 一级飙升
             all_rising.extend(data.get('rising_queries', []))
             
-            # 二级深挖
+            # 深挖
             for deep in data.get('deep_rising', []):
                 all_rising.append(deep['query'])
         
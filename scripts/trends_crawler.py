@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Google Trends 飙升查询图爬取 - 全局去重 + 优先级前沿 + 持久化查询图
+==================================================================
+
+TrendsAnalyzer 以前只挖两层：前 5 个飙升词，再各取前 5 个子词。不同父词之间没有去重，
+同一个飙升词会在不同父词下被重复展开，每次运行还要从头请求一遍。
+
+这里把 related queries 当成一张图来爬：
+- 前沿是优先队列：优先级 = 飙升值 × 衰减^深度（Breakout 按 TRENDS_BREAKOUT_VALUE 算），
+  每次先展开最「飙」的节点，请求预算花在最可能出爆款词的分支上
+- 全局去重：一次爬取里每个节点只展开一次；展开结果写入查询图（SQLite），
+  TRENDS_GRAPH_MAX_AGE 内再遇到同一节点直接读图，不再请求
+- 深度 / 每节点跟进数 / 请求数三重预算，可选 RunDeadline 阶段截止时间
+- 多个节点并发展开，请求仍由共享的 TrendsService 统一节流、合并
+
+Usage:
+    python trends_crawler.py "ai writing tool" "pdf converter"
+    python trends_crawler.py "ai writing tool" --depth 4 --requests 20
+"""
+
+import argparse
+import heapq
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import (DATA_DIR, TRENDS_BREAKOUT_VALUE, TRENDS_CRAWL_DEPTH_DECAY, TRENDS_CRAWL_FAN_OUT,
+                    TRENDS_CRAWL_MAX_DEPTH, TRENDS_CRAWL_MAX_REQUESTS, TRENDS_CRAWL_WORKERS,
+                    TRENDS_GRAPH_MAX_AGE)
+from trends_service import TrendsService, get_trends_service
+
+logger = logging.getLogger(__name__)
+
+Edge = Tuple[str, float]  # (子查询, 飙升值)
+
+
+def rising_value(value) -> float:
+    """飙升值统一成数字（"Breakout" / 缺失按 TRENDS_BREAKOUT_VALUE）"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).rstrip('%').replace(',', ''))
+    except ValueError:
+        return float(TRENDS_BREAKOUT_VALUE)
+
+
+class TrendsGraph:
+    """持久化的飙升查询图：节点展开时间 + 父 → 子边 (SQLite)"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "trends_graph.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS nodes (
+                query       TEXT NOT NULL,
+                timeframe   TEXT NOT NULL,
+                expanded_at REAL NOT NULL,
+                PRIMARY KEY (query, timeframe)
+            );
+            CREATE TABLE IF NOT EXISTS edges (
+                parent    TEXT NOT NULL,
+                child     TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                value     REAL NOT NULL,
+                rank      INTEGER NOT NULL,
+                PRIMARY KEY (parent, child, timeframe)
+            );
+            CREATE INDEX IF NOT EXISTS idx_edges_child ON edges (child, timeframe);
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def path_for_geo(geo: str) -> Path:
+        """某个地区的查询图路径（默认地区用 trends_graph.db）"""
+        return Path(DATA_DIR) / f"trends_graph_{geo.lower()}.db"
+
+    def expanded_at(self, query: str, timeframe: str) -> Optional[float]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT expanded_at FROM nodes WHERE query = ? AND timeframe = ?", (query, timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, query: str, timeframe: str, max_age: float = TRENDS_GRAPH_MAX_AGE) -> bool:
+        expanded_at = self.expanded_at(query, timeframe)
+        return expanded_at is not None and time.time() - expanded_at < max_age
+
+    def children(self, query: str, timeframe: str) -> List[Edge]:
+        """按 Trends 返回顺序的子查询"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT child, value FROM edges WHERE parent = ? AND timeframe = ? ORDER BY rank",
+                (query, timeframe)
+            ).fetchall()
+
+    def parents(self, query: str, timeframe: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT parent FROM edges WHERE child = ? AND timeframe = ?", (query, timeframe))]
+
+    def save(self, query: str, timeframe: str, children: List[Edge]):
+        """记录一次展开（替换该节点之前的出边）"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM edges WHERE parent = ? AND timeframe = ?", (query, timeframe))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO edges (parent, child, timeframe, value, rank) VALUES (?, ?, ?, ?, ?)",
+                [(query, child, timeframe, value, rank) for rank, (child, value) in enumerate(children)]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO nodes (query, timeframe, expanded_at) VALUES (?, ?, ?)",
+                (query, timeframe, time.time())
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            nodes = self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+            edges = self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        return {"nodes": nodes, "edges": edges}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class TrendsCrawler:
+    """按飙升值优先、全局去重地展开 related queries 图"""
+
+    def __init__(self, service: TrendsService = None, graph: TrendsGraph = None,
+                 timeframe: str = 'today 3-m', max_depth: int = TRENDS_CRAWL_MAX_DEPTH,
+                 fan_out: int = TRENDS_CRAWL_FAN_OUT, max_requests: int = TRENDS_CRAWL_MAX_REQUESTS,
+                 workers: int = TRENDS_CRAWL_WORKERS, max_age: float = TRENDS_GRAPH_MAX_AGE):
+        self.service = service or get_trends_service()
+        if graph is None:
+            geo = self.service.geo
+            graph = TrendsGraph(TrendsGraph.path_for_geo(geo) if geo else None)
+        self.graph = graph
+        self.timeframe = timeframe
+        self.max_depth = max_depth
+        self.fan_out = fan_out
+        self.max_requests = max_requests
+        self.workers = workers
+        self.max_age = max_age
+        self.stats = {"requests": 0, "reused": 0, "failed": 0}
+
+    def expand(self, query: str) -> Tuple[List[Edge], bool]:
+        """一个节点的子查询 + 是否发起了请求（图里还新鲜就直接读图）"""
+        if self.graph.is_fresh(query, self.timeframe, self.max_age):
+            return self.graph.children(query, self.timeframe), False
+        rising = self.service.rising_queries(query, self.timeframe)
+        children = []
+        if rising is not None:
+            children = [(row['query'], rising_value(row.get('value')))
+                        for row in rising.to_dict('records') if row.get('query')]
+        self.graph.save(query, self.timeframe, children)
+        return children, True
+
+    def _priority(self, value: float, depth: int) -> float:
+        return value * TRENDS_CRAWL_DEPTH_DECAY ** depth
+
+    def crawl(self, roots: Iterable[str], deadline=None, max_requests: int = None) -> Dict[str, Dict]:
+        """
+        从 roots 出发爬取，返回发现的节点 {查询: {query, parent, root, depth, value, priority}}
+
+        根节点总会展开，不占请求预算；预算或截止时间用完后，只继续展开图里现成的节点。
+        同一查询从多个父节点可达时记最浅的那条路径（同深度取优先级高的）
+        """
+        budget = self.max_requests if max_requests is None else max_requests
+        roots = list(dict.fromkeys(roots))
+        frontier: List[Tuple[float, int, str]] = []
+        nodes: Dict[str, Dict] = {}
+        expanded = set()
+        seq = 0
+        for root in roots:
+            nodes[root] = {"query": root, "parent": None, "root": root, "depth": 0,
+                           "value": float("inf"), "priority": float("inf")}
+            heapq.heappush(frontier, (-float("inf"), seq, root))
+            seq += 1
+
+        requests = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while frontier or running:
+                while frontier and len(running) < self.workers:
+                    _, _, query = heapq.heappop(frontier)
+                    if query in expanded:
+                        continue
+                    if nodes[query]["depth"] > 0 and not self.graph.is_fresh(query, self.timeframe, self.max_age):
+                        if requests >= budget or (deadline is not None and deadline.expired()):
+                            continue
+                        requests += 1
+                    expanded.add(query)
+                    running[pool.submit(self.expand, query)] = query
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query = running.pop(future)
+                    try:
+                        children, fetched = future.result()
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        logger.debug(f"Trends 展开失败 {query}: {e}")
+                        continue
+                    self.stats["requests" if fetched else "reused"] += 1
+
+                    node = nodes[query]
+                    depth = node["depth"] + 1
+                    followed = sorted(children, key=lambda edge: edge[1], reverse=True)[:self.fan_out]
+                    for child, value in children:
+                        priority = self._priority(value, depth)
+                        known = nodes.get(child)
+                        if known is None:
+                            nodes[child] = {"query": child, "parent": query, "root": node["root"],
+                                            "depth": depth, "value": value, "priority": priority}
+                        elif known["depth"] > 0 and (depth, -priority) < (known["depth"], -known["priority"]):
+                            known.update(parent=query, root=node["root"], depth=depth,
+                                         value=value, priority=priority)
+                        if (child, value) in followed and child not in expanded and depth < self.max_depth:
+                            heapq.heappush(frontier, (-priority, seq, child))
+                            seq += 1
+
+        return {query: node for query, node in nodes.items() if node["depth"] > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Trends 飙升查询图爬取")
+    parser.add_argument("roots", nargs="+", help="起始关键词")
+    parser.add_argument("--depth", type=int, default=TRENDS_CRAWL_MAX_DEPTH, help=f"最大深度 (默认{TRENDS_CRAWL_MAX_DEPTH})")
+    parser.add_argument("--fan-out", type=int, default=TRENDS_CRAWL_FAN_OUT, help=f"每个节点跟进数 (默认{TRENDS_CRAWL_FAN_OUT})")
+    parser.add_argument("--requests", type=int, default=TRENDS_CRAWL_MAX_REQUESTS,
+                        help=f"请求预算 (默认{TRENDS_CRAWL_MAX_REQUESTS})")
+    parser.add_argument("--timeframe", default="today 3-m")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    crawler = TrendsCrawler(timeframe=args.timeframe, max_depth=args.depth, fan_out=args.fan_out,
+                            max_requests=args.requests)
+    nodes = crawler.crawl(args.roots)
+    print(f"🕸️ 发现 {len(nodes)} 个飙升查询（请求 {crawler.stats['requests']} 次，"
+          f"复用 {crawler.stats['reused']} 个节点，失败 {crawler.stats['failed']} 次）")
+    for node in sorted(nodes.values(), key=lambda n: n["priority"], reverse=True):
+        print(f"   {'  ' * (node['depth'] - 1)}{node['query']}  (+{node['value']:.0f}, 来自 {node['parent']})")
+    print(f"📊 查询图: {crawler.graph.stats()}")
+
+
+if __name__ == "__main__":
+    main()
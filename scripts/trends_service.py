@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+共享 Google Trends 服务
+=======================
+
+TrendsAnalyzer、profit_hunter_v3 / blue_ocean_hunter 的 google_trends_rising、
+ProfitHunterUltimate.step1_google_trends 以前各建各的 TrendReq、各睡各的，
+同一个关键词在一次调度里会被重复请求好几次。
+
+这里统一成一个进程内共享的服务：
+- 一个 TrendReq 会话 + 全局节流（请求间隔 + 随机抖动，遇到 429 自动退避）
+- 同 (类型, keyword, timeframe) 的并发请求合并为一次
+- 结果按 TTL 缓存；兴趣序列写入 TrendsStore 做增量抓取
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict
+
+try:
+    from pytrends.request import TrendReq
+except ImportError:
+    TrendReq = None
+
+from singleflight import SingleFlight
+from trends_store import TrendsStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 6 * 3600       # related_queries / interest 缓存 6 小时
+MIN_INTERVAL = 2.0           # 两次请求之间至少间隔（秒）
+JITTER = 1.0                 # 额外随机间隔上限（秒）
+MAX_BACKOFF = 120.0          # 429 退避上限（秒）
+
+
+class TrendsService:
+    """进程内共享、带节流与请求合并的 Trends 客户端"""
+
+    def __init__(self, hl: str = 'en-US', tz: int = 360, geo: str = '',
+                 min_interval: float = MIN_INTERVAL, jitter: float = JITTER,
+                 ttl: float = DEFAULT_TTL, store: TrendsStore = None):
+        self.hl = hl
+        self.tz = tz
+        self.geo = geo
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.flight = SingleFlight(ttl)
+        self._store = store
+        self._session = None
+        self._payload = None              # 当前会话上的 (keyword, timeframe)
+        self._session_lock = threading.Lock()
+        self._last_request = 0.0
+        self._backoff = 0.0
+        self.requests = 0
+
+    @property
+    def store(self) -> TrendsStore:
+        if self._store is None:
+            # 不同地区的序列不能拼在一起：指定 geo 时按地区单独存一个库
+            self._store = TrendsStore(TrendsStore.path_for_geo(self.geo) if self.geo else None)
+        return self._store
+
+    @property
+    def session(self):
+        if self._session is None:
+            if TrendReq is None:
+                raise RuntimeError("pytrends 未安装: pip install pytrends")
+            self._session = TrendReq(hl=self.hl, tz=self.tz)
+        return self._session
+
+    # ============ 底层请求（串行 + 节流） ============
+
+    def _throttle(self):
+        wait = self._last_request + self.min_interval + self._backoff \
+            + random.uniform(0, self.jitter) - time.time()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _request(self, keyword: str, timeframe: str, method: str):
+        """在共享会话上执行一次请求；同一 payload 连续请求时不重复 build_payload"""
+        with self._session_lock:
+            try:
+                if self._payload != (keyword, timeframe):
+                    self._throttle()
+                    self._payload = None
+                    self.session.build_payload([keyword], timeframe=timeframe, geo=self.geo)
+                    self._payload = (keyword, timeframe)
+                    self.requests += 1
+                self._throttle()
+                result = getattr(self.session, method)()
+                self.requests += 1
+                self._backoff = 0.0
+                return result
+            except Exception as e:
+                if '429' in str(e):
+                    self._backoff = min(max(self._backoff * 2, self.min_interval * 2), MAX_BACKOFF)
+                    logger.warning(f"⚠️ Trends 限频，退避 {self._backoff:.0f} 秒")
+                self._payload = None
+                raise
+            finally:
+                self._last_request = time.time()
+
+    # ============ 对外接口（合并 + 缓存） ============
+
+    def interest_over_time(self, keyword: str, timeframe: str):
+        """兴趣序列 DataFrame"""
+        return self.flight.do(
+            ('interest', keyword, timeframe),
+            lambda: self._request(keyword, timeframe, 'interest_over_time')
+        )
+
+    def related_queries(self, keyword: str, timeframe: str) -> Dict:
+        """该关键词的 related queries: {'top': DataFrame, 'rising': DataFrame}"""
+        def fetch():
+            related = self._request(keyword, timeframe, 'related_queries')
+            return (related or {}).get(keyword) or {}
+        return self.flight.do(('related', keyword, timeframe), fetch)
+
+    def rising_queries(self, keyword: str, timeframe: str):
+        """飙升查询 DataFrame（无数据返回 None）"""
+        rising = self.related_queries(keyword, timeframe).get('rising')
+        if rising is None or getattr(rising, 'empty', True):
+            return None
+        return rising
+
+    def update_series(self, keyword: str, timeframe: str) -> bool:
+        """增量更新 TrendsStore 中的序列，返回是否发生了网络请求（新鲜度由 TrendsStore 判断，这里只合并）"""
+        return self.flight.do(
+            ('series', keyword, timeframe),
+            lambda: self.store.update(
+                keyword, timeframe,
+                lambda window: self._request(keyword, window, 'interest_over_time')
+            ),
+            ttl=0
+        )
+
+    def stats(self) -> Dict:
+        return {'requests': self.requests, **self.flight.stats}
+
+
+_services: Dict[tuple, TrendsService] = {}
+_services_lock = threading.Lock()
+
+
+def get_trends_service(hl: str = 'en-US', tz: int = 360, geo: str = '') -> TrendsService:
+    """获取共享的 TrendsService（同一 hl/tz/geo 在进程内只有一个实例）"""
+    key = (hl, tz, geo)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = TrendsService(hl=hl, tz=tz, geo=geo)
+        return _services[key]
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Google Trends 时间序列存储 - 增量抓取 + 重叠区间缩放拼接
+=========================================================
+
+Trends 的数值是相对值（窗口内最大值 = 100），每次都拉完整 3 个月既浪费配额又丢掉历史。
+这里按 (keyword, timeframe) 保存序列，之后只抓最近缺失的一段（带一段重叠区间），
+用重叠区间的均值比把新数据缩放到已存序列的尺度再拼上去。
+
+增长率 / 飙升判断都基于存储的序列计算，长周期特征不再需要额外请求。
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import DATA_DIR
+
+# 支持增量抓取的时间范围：跨度 / 粒度 / 重叠区间 / 增量窗口格式
+# 其它 timeframe 每次都整段抓取
+TIMEFRAME_SPECS = {
+    "today 1-m": {"span": timedelta(days=30), "step": timedelta(days=1),
+                  "overlap": timedelta(days=7), "fmt": "%Y-%m-%d"},
+    "today 3-m": {"span": timedelta(days=90), "step": timedelta(days=1),
+                  "overlap": timedelta(days=14), "fmt": "%Y-%m-%d"},
+    "now 7-d": {"span": timedelta(days=7), "step": timedelta(hours=1),
+                "overlap": timedelta(hours=24), "fmt": "%Y-%m-%dT%H",
+                # 小时粒度只在 7 天以内的窗口返回
+                "max_window": timedelta(days=7) - timedelta(hours=1)},
+}
+
+# 最近 7 点相对最近 30 点增长超过该百分比即视为飙升
+RISING_GROWTH = 20
+
+Point = Tuple[str, float, bool]  # (时间戳, 数值, 是否为不完整的最新点)
+
+
+def _ts_key(ts) -> str:
+    """统一时间戳格式（兼容 pandas.Timestamp / datetime / 字符串）"""
+    if hasattr(ts, "to_pydatetime"):
+        ts = ts.to_pydatetime()
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return ts.replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def frame_to_points(frame, keyword: str) -> List[Point]:
+    """interest_over_time() 的 DataFrame → [(ts, value, partial)]"""
+    if frame is None or getattr(frame, "empty", True) or keyword not in frame:
+        return []
+    partial = frame["isPartial"] if "isPartial" in frame else None
+    points = []
+    for i, ts in enumerate(frame.index):
+        is_partial = bool(partial.iloc[i]) if partial is not None else False
+        points.append((_ts_key(ts), float(frame[keyword].iloc[i]), is_partial))
+    return points
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+class TrendsStore:
+    """Trends 兴趣序列存储 (SQLite)"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "trends_store.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS points (
+                keyword   TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts        TEXT NOT NULL,
+                value     REAL NOT NULL,
+                partial   INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (keyword, timeframe, ts)
+            );
+            CREATE TABLE IF NOT EXISTS fetches (
+                keyword    TEXT NOT NULL,
+                timeframe  TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                window     TEXT NOT NULL,
+                PRIMARY KEY (keyword, timeframe)
+            );
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def path_for_geo(geo: str) -> Path:
+        """某个地区的序列库路径（默认地区用 trends_store.db）"""
+        return Path(DATA_DIR) / f"trends_store_{geo.lower()}.db"
+
+    # ============ 读取 ============
+
+    def points(self, keyword: str, timeframe: str) -> List[Point]:
+        """完整的已存序列（按时间排序，已缩放到统一尺度）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT ts, value, partial FROM points WHERE keyword = ? AND timeframe = ? ORDER BY ts",
+                (keyword, timeframe)
+            ).fetchall()
+        return [(ts, value, bool(partial)) for ts, value, partial in rows]
+
+    def last_fetched(self, keyword: str, timeframe: str) -> Optional[float]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT fetched_at FROM fetches WHERE keyword = ? AND timeframe = ?",
+                (keyword, timeframe)
+            ).fetchone()
+        return row[0] if row else None
+
+    def series(self, keyword: str, timeframe: str, normalize: bool = True,
+               now: datetime = None) -> List[Tuple[str, float]]:
+        """
+        timeframe 对应窗口内的序列
+
+        normalize=True 时按窗口最大值归一化到 0-100，与 Trends 直接返回的口径一致
+        """
+        points = self.points(keyword, timeframe)
+        spec = TIMEFRAME_SPECS.get(timeframe)
+        if spec and points:
+            now = now or datetime.utcnow()
+            start = _ts_key(now - spec["span"])
+            points = [p for p in points if p[0] >= start]
+        values = [(ts, value) for ts, value, _ in points]
+        if normalize and values:
+            peak = max(v for _, v in values)
+            if peak > 0:
+                values = [(ts, v * 100.0 / peak) for ts, v in values]
+        return values
+
+    def recent_mean(self, keyword: str, timeframe: str, n: int = 7) -> Optional[float]:
+        """最近 n 个点的平均兴趣（归一化口径），无数据返回 None"""
+        values = [v for _, v in self.series(keyword, timeframe)]
+        if not values:
+            return None
+        return _mean(values[-n:])
+
+    def growth(self, keyword: str, timeframe: str, recent: int = 7, baseline: int = 30) -> float:
+        """最近 recent 个点相对最近 baseline 个点的增长率（%）"""
+        values = [v for _, v in self.series(keyword, timeframe, normalize=False)]
+        if not values:
+            return 0.0
+        recent_mean = _mean(values[-recent:])
+        older = _mean(values[-baseline:]) if len(values) > recent else recent_mean
+        if older <= 0:
+            return 0.0
+        return (recent_mean - older) / older * 100
+
+    def is_rising(self, keyword: str, timeframe: str, threshold: float = RISING_GROWTH) -> bool:
+        """是否处于上升期（基于存储序列的 7 vs 30 增长率）"""
+        return self.growth(keyword, timeframe) >= threshold
+
+    def features(self, keyword: str, timeframe: str) -> Dict:
+        """基于全部已存历史的长周期特征（不发请求）"""
+        values = [v for _, v, _ in self.points(keyword, timeframe)]
+        if not values:
+            return {'points': 0}
+        peak = max(values)
+        return {
+            'points': len(values),
+            'growth_7_30': round(self.growth(keyword, timeframe, 7, 30), 2),
+            'growth_30_90': round(self.growth(keyword, timeframe, 30, 90), 2),
+            'latest_vs_peak': round(values[-1] / peak, 3) if peak > 0 else 0.0,
+            'history_from': self.points(keyword, timeframe)[0][0],
+        }
+
+    # ============ 增量抓取 ============
+
+    def delta_timeframe(self, keyword: str, timeframe: str, now: datetime = None) -> Optional[str]:
+        """
+        下一次需要抓取的窗口
+
+        - 返回 timeframe 本身: 没有可拼接的历史，整段抓取
+        - 返回 "开始 结束" 窗口: 只抓缺失的最近一段（含重叠区间）
+        - 返回 None: 数据仍新鲜（距上次抓取不足一个粒度），无需请求
+        """
+        spec = TIMEFRAME_SPECS.get(timeframe)
+        points = self.points(keyword, timeframe)
+        if not spec or not points:
+            return timeframe
+
+        now = now or datetime.utcnow()
+        fetched_at = self.last_fetched(keyword, timeframe)
+        if fetched_at and time.time() - fetched_at < spec["step"].total_seconds():
+            return None
+
+        complete = [p for p in points if not p[2]] or points
+        last = datetime.fromisoformat(complete[-1][0])
+        start = last - spec["overlap"]
+        if now - start >= spec["span"] or now - start > spec.get("max_window", spec["span"]):
+            return timeframe  # 断档太久，重新整段抓取
+        return f"{start.strftime(spec['fmt'])} {now.strftime(spec['fmt'])}"
+
+    def update(self, keyword: str, timeframe: str,
+               fetch_frame: Callable[[str], object], now: datetime = None) -> bool:
+        """
+        增量更新一个关键词的序列
+
+        fetch_frame(window) 负责真正请求 Trends，返回 interest_over_time() 的 DataFrame
+        （或 [(ts, value, partial)] 列表）。返回值表示本次是否发生了网络请求。
+        """
+        window = self.delta_timeframe(keyword, timeframe, now)
+        if window is None:
+            return False
+
+        frame = fetch_frame(window)
+        new_points = frame if isinstance(frame, list) else frame_to_points(frame, keyword)
+        self.merge(keyword, timeframe, new_points, full=(window == timeframe))
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?)",
+                (keyword, timeframe, time.time(), window)
+            )
+            self.conn.commit()
+        return True
+
+    def merge(self, keyword: str, timeframe: str, new_points: List[Point], full: bool = False):
+        """把新抓到的一段缩放到已存尺度后拼接（重叠部分以新数据为准）"""
+        if not new_points:
+            return
+        stored = {ts: value for ts, value, partial in self.points(keyword, timeframe) if not partial}
+        overlap = [(stored[ts], value) for ts, value, partial in new_points
+                   if ts in stored and not partial]
+
+        factor = 1.0
+        if stored and overlap:
+            new_mean = _mean([n for _, n in overlap])
+            if new_mean > 0:
+                factor = _mean([s for s, _ in overlap]) / new_mean
+        elif stored and full:
+            # 整段重抓且没有重叠：旧数据无法对齐，以新数据为准
+            self.clear(keyword, timeframe)
+
+        first_ts = new_points[0][0]
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM points WHERE keyword = ? AND timeframe = ? AND ts >= ?",
+                (keyword, timeframe, first_ts)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)",
+                [(keyword, timeframe, ts, value * factor, int(partial))
+                 for ts, value, partial in new_points]
+            )
+            self.conn.commit()
+
+    def clear(self, keyword: str, timeframe: str):
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM points WHERE keyword = ? AND timeframe = ?", (keyword, timeframe)
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+进度事件实时查看 - tail 事件流，汇总吞吐 / 各阶段 ETA / 错误率
+==============================================================
+
+读 events.EventStream 写出的 JSON Lines（文件跟随，或监听 udp://host:port），
+每隔几秒刷新一屏：
+
+- 阶段：已处理 / 总数、最近 EVENTS_RATE_WINDOW 秒的吞吐、ETA、失败数
+- 数据源：抓取次数、错误率、平均延迟、缓存命中 / 304 比例、最后一次抓取距今
+- 阶段或数据源超过 EVENTS_STALL_SECONDS 没有新事件时标记 ⚠️ 停滞
+
+新的 run 开始时统计清零。
+
+Usage:
+    python watch_events.py                          # 跟随 data/events.jsonl
+    python watch_events.py udp://127.0.0.1:9999     # 监听 UDP
+    python watch_events.py --once                   # 汇总整个文件后退出
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import EVENTS_FILE, EVENTS_RATE_WINDOW, EVENTS_STALL_SECONDS
+
+CLEAR = "\x1b[H\x1b[2J"
+STAGE_WIDTH = 26  # 并行补全队列的阶段名形如 enrich:de-DE:serp+deep
+
+
+def _duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补齐（中文占两格）"""
+    shown = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    fill = " " * max(width - shown, 0)
+    return fill + text if right else text + fill
+
+
+class EventStats:
+    """按阶段 / 数据源累计事件（只保留当前 run）"""
+
+    def __init__(self, window: float = EVENTS_RATE_WINDOW, stall: float = EVENTS_STALL_SECONDS):
+        self.window = window
+        self.stall = stall
+        self.reset(None)
+
+    def reset(self, run: Optional[str]):
+        self.run = run
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.stages: Dict[str, Dict] = {}
+        self.sources: Dict[str, Dict] = {}
+        self.errors: deque = deque(maxlen=5)
+
+    def _stage(self, name: str) -> Dict:
+        if name not in self.stages:
+            self.stages[name] = {"started": None, "ended": None, "total": None, "done": 0,
+                                 "failed": 0, "last": None, "recent": deque()}
+        return self.stages[name]
+
+    def _source(self, name: str) -> Dict:
+        if name not in self.sources:
+            self.sources[name] = {"fetches": 0, "failed": 0, "seconds": 0.0, "network": 0,
+                                  "hit": 0, "not_modified": 0, "last": None}
+        return self.sources[name]
+
+    def add(self, event: Dict):
+        run = event.get("run")
+        if run != self.run and (event.get("event") == "run_start" or self.run is None):
+            self.reset(run)
+        elif run != self.run:
+            return  # 另一个进程 / 旧 run 的事件
+        ts = event.get("ts", time.time())
+        self.last_ts = ts
+        kind = event.get("event")
+        stage = event.get("stage")
+
+        if kind == "run_start":
+            self.started = ts
+        elif kind == "run_end":
+            self.finished = ts
+        elif kind == "stage_start" and stage:
+            self._stage(stage)["started"] = ts
+        elif kind == "stage_end" and stage:
+            self._stage(stage)["ended"] = ts
+        elif kind == "stage_total" and stage:
+            self._stage(stage)["total"] = event.get("total")
+        elif kind == "item" and stage:
+            record = self._stage(stage)
+            record["done"] += 1
+            record["failed"] += 0 if event.get("ok", True) else 1
+            record["last"] = ts
+            record["recent"].append(ts)
+        elif kind == "fetch":
+            record = self._source(event.get("source") or "?")
+            record["fetches"] += 1
+            record["failed"] += 0 if event.get("ok", True) else 1
+            record["last"] = ts
+            if event.get("cache") == "hit":
+                record["hit"] += 1
+            else:
+                record["network"] += 1
+                record["seconds"] += event.get("seconds") or 0.0
+                record["not_modified"] += event.get("cache") == "not_modified"
+        elif kind == "error":
+            self.errors.append((ts, stage, event.get("source"), event.get("message", "")))
+
+    def rate(self, stage: Dict, now: float) -> float:
+        """最近 window 秒每秒处理数"""
+        recent = stage["recent"]
+        while recent and recent[0] < now - self.window:
+            recent.popleft()
+        if not recent:
+            return 0.0
+        span = min(self.window, now - (stage["started"] or recent[0]))
+        return len(recent) / max(span, 1.0)
+
+    def render(self, now: float = None) -> List[str]:
+        now = time.time() if now is None else now
+        if self.run is None:
+            return ["⏳ 还没有事件"]
+        status = "✅ 已结束" if self.finished else "🏃 运行中"
+        elapsed = (self.finished or now) - (self.started or now)
+        lines = [f"📡 run {self.run}  {status}  已运行 {_duration(elapsed)}  "
+                 f"最后事件 {_duration(now - self.last_ts)} 前", ""]
+
+        lines.append(_pad("阶段", STAGE_WIDTH) + _pad("进度", 16, True) + _pad("吞吐/分", 10, True)
+                     + _pad("ETA", 10, True) + _pad("失败", 10, True) + "  状态")
+        for name, stage in self.stages.items():
+            total = stage["total"]
+            progress = f"{stage['done']}/{total}" if total else str(stage["done"])
+            running = stage["started"] is not None and stage["ended"] is None and not self.finished
+            rate = self.rate(stage, now) if running else 0.0
+            eta = None
+            if running and total and rate > 0:
+                eta = max(total - stage["done"], 0) / rate
+            if stage["ended"] is not None:
+                state = f"完成 {_duration(stage['ended'] - stage['started'])}" if stage["started"] else "完成"
+            elif running:
+                idle = now - (stage["last"] or stage["started"])
+                state = f"⚠️ 停滞 {_duration(idle)}" if idle > self.stall else "进行中"
+            else:
+                state = "-"
+            failed = f"{stage['failed']}" + (f" ({stage['failed'] / stage['done']:.0%})" if stage["done"] else "")
+            lines.append(f"{_pad(name, STAGE_WIDTH)}{progress:>16}{rate * 60:>10.1f}{_duration(eta):>10}{failed:>10}  {state}")
+
+        if self.sources:
+            lines.append("")
+            lines.append(_pad("数据源", 28) + _pad("抓取", 8, True) + _pad("错误率", 8, True)
+                         + _pad("平均延迟", 10, True) + _pad("缓存命中", 10, True) + _pad("304", 6, True) + "  最后抓取")
+            for name, source in sorted(self.sources.items(), key=lambda item: -item[1]["fetches"]):
+                fetches = source["fetches"]
+                latency = source["seconds"] / source["network"] if source["network"] else 0.0
+                idle = now - source["last"]
+                last = _duration(idle) + (" ⚠️ 停滞" if idle > self.stall and not self.finished else "")
+                lines.append(f"{name[:27]:<28}{fetches:>8}{source['failed'] / fetches:>8.0%}"
+                             f"{latency:>9.2f}s{source['hit'] / fetches:>10.0%}{source['not_modified']:>6}  {last} 前")
+
+        if self.errors:
+            lines.append("")
+            lines.append("❌ 最近错误:")
+            for ts, stage, source, message in self.errors:
+                where = "/".join(part for part in (stage, source) if part)
+                lines.append(f"   {_duration(now - ts)} 前 [{where}] {message[:100]}")
+        return lines
+
+
+def _rotated(path: Path, f) -> bool:
+    """文件被截断，或被轮转成另一个文件（新运行开始）"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    return stat.st_ino != os.fstat(f.fileno()).st_ino or stat.st_size < f.tell()
+
+
+def follow_file(path: Path, from_start: bool, poll: float = 0.5) -> Iterator[Optional[Dict]]:
+    """跟随文件逐行产出事件；没有新行时产出 None（文件被截断 / 轮转后从头读）"""
+    while not path.exists():
+        yield None
+        time.sleep(poll)
+    f = open(path, encoding="utf-8")
+    if not from_start:
+        f.seek(0, 2)
+    buffer = ""
+    while True:
+        line = f.readline()
+        if line:
+            buffer += line
+            if not buffer.endswith("\n"):
+                continue  # 写了一半的行
+            try:
+                yield json.loads(buffer)
+            except ValueError:
+                pass
+            buffer = ""
+            continue
+        if _rotated(path, f):
+            f.close()
+            f = open(path, encoding="utf-8")
+        yield None
+        time.sleep(poll)
+
+
+def listen_udp(host: str, port: int, poll: float = 0.5) -> Iterator[Optional[Dict]]:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    sock.settimeout(poll)
+    while True:
+        try:
+            data, _ = sock.recvfrom(65536)
+        except socket.timeout:
+            yield None
+            continue
+        try:
+            yield json.loads(data.decode("utf-8"))
+        except ValueError:
+            continue
+
+
+def read_all(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行进度事件实时查看")
+    parser.add_argument("source", nargs="?", default=str(EVENTS_FILE), help="事件文件或 udp://host:port")
+    parser.add_argument("--interval", type=float, default=2.0, help="刷新间隔（秒）")
+    parser.add_argument("--from-start", action="store_true", help="从文件开头读（默认只看新事件）")
+    parser.add_argument("--once", action="store_true", help="汇总整个文件后退出")
+    parser.add_argument("--window", type=float, default=EVENTS_RATE_WINDOW, help="吞吐计算窗口（秒）")
+    parser.add_argument("--stall", type=float, default=EVENTS_STALL_SECONDS, help="停滞告警阈值（秒）")
+    args = parser.parse_args()
+
+    stats = EventStats(window=args.window, stall=args.stall)
+    url = urlparse(args.source)
+    if args.once:
+        last = None
+        for event in read_all(Path(args.source)):
+            stats.add(event)
+            last = event.get("ts", last)
+        print("\n".join(stats.render(now=last)))
+        return
+
+    events = (listen_udp(url.hostname or "127.0.0.1", url.port) if url.scheme == "udp"
+              else follow_file(Path(args.source), args.from_start))
+    next_render = 0.0
+    try:
+        for event in events:
+            if event is not None:
+                stats.add(event)
+            if time.time() >= next_render:
+                sys.stdout.write(CLEAR + "\n".join(stats.render()) + "\n")
+                sys.stdout.flush()
+                next_render = time.time() + args.interval
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+分布式工作队列 - 多节点挖词 / 补全
+==================================
+
+单进程跑 run_pipeline 受限于一个 IP 的限频和一台机器。这里把种子词和关键词变成队列任务：
+
+    harvest 队列: 一个种子词 → Alphabet Soup 挖词 → 每个新关键词投递一个 enrich 任务
+    enrich  队列: 一个关键词 → Trends / SERP / 深度搜索补全（按本地预评分优先）
+
+任意台机器上的 Worker 拉取任务执行，Coordinator 投递种子词并把所有结果合并评分。
+
+Broker 是可插拔的：内置 SQLite 实现（单机多进程 / 测试用，靠租约处理 Worker 崩溃）。
+SQLite 用 WAL 模式，不能放在 NFS / SMB 等网络文件系统上，所以只支持同一台机器；
+多台机器需要用 register_broker("redis", RedisBroker) 注册网络后端后通过 URL 打开。
+
+用法:
+    python3 work_queue.py submit --trends --deep-search        # 投递种子词
+    python3 work_queue.py worker --queues harvest enrich       # 每个节点启动若干个
+    python3 work_queue.py status
+    python3 work_queue.py merge                                # 合并结果并评分
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import *
+
+logger = logging.getLogger(__name__)
+
+HARVEST = "harvest"
+ENRICH = "enrich"
+
+DEFAULT_BROKER_URL = f"sqlite:///{Path(DATA_DIR) / 'work_queue.db'}"
+DEFAULT_LEASE = 600        # 任务租约（秒），Worker 崩溃后超时的任务会被重新领取
+MAX_ATTEMPTS = 3
+
+
+class Task:
+    """队列中的一个任务"""
+
+    def __init__(self, id, queue: str, key: str, payload: Dict, attempts: int = 0, worker: str = None):
+        self.id = id
+        self.queue = queue
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+        self.worker = worker  # 领取它的 Worker，ack / nack 只对仍由它持有的任务生效
+
+    def __repr__(self):
+        return f"Task({self.queue}:{self.key}, attempts={self.attempts})"
+
+
+class Broker:
+    """队列后端接口"""
+
+    def put(self, queue: str, items: Iterable[Tuple[str, Dict, float]], requeue_before: float = None) -> int:
+        """
+        投递 [(key, payload, priority)]，同队列同 key 只保留一个，返回新增 + 重新排队的数量
+
+        已结束（done / failed）且在 requeue_before 之前结束的同 key 任务重置为待处理；
+        None 表示不重置（同一批次里重复挖到的词不会被补全第二次）
+        """
+        raise NotImplementedError
+
+    def claim(self, queue: str, worker: str, lease: float = DEFAULT_LEASE) -> Optional[Task]:
+        """领取优先级最高的待处理任务（含租约过期的任务），没有则返回 None"""
+        raise NotImplementedError
+
+    def ack(self, task: Task, result: Dict) -> bool:
+        """任务完成并保存结果；租约已过期、任务被别的 Worker 重领时返回 False（结果丢弃）"""
+        raise NotImplementedError
+
+    def nack(self, task: Task, error: str) -> bool:
+        """任务失败：未超过重试次数则放回队列；同 ack，只对仍由自己持有的任务生效"""
+        raise NotImplementedError
+
+    def results(self, queue: str) -> Iterator[Tuple[str, Dict, Dict]]:
+        """已完成任务 (key, payload, result)"""
+        raise NotImplementedError
+
+    def counts(self, queue: str) -> Dict[str, int]:
+        """各状态任务数 {'pending': n, 'running': n, 'done': n, 'failed': n}"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBroker(Broker):
+    """SQLite 队列：单机多进程共享一个本地文件（WAL 不支持网络文件系统），领取任务用 BEGIN IMMEDIATE 保证互斥"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(DATA_DIR) / "work_queue.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), timeout=30,
+                                    check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue       TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                payload     TEXT NOT NULL,
+                priority    REAL NOT NULL DEFAULT 0,
+                status      TEXT NOT NULL DEFAULT 'pending',
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                worker      TEXT,
+                lease_until REAL,
+                result      TEXT,
+                error       TEXT,
+                updated_at  REAL NOT NULL,
+                UNIQUE (queue, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (queue, status, priority);
+        """)
+
+    def put(self, queue, items, requeue_before=None):
+        now = time.time()
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            # 以前的运行留下的 done / failed 行重新排队，否则第二天再投同样的种子词什么也不会做
+            self.conn.executemany(
+                """INSERT INTO tasks (queue, key, payload, priority, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (queue, key) DO UPDATE SET
+                       payload = excluded.payload, priority = excluded.priority, status = 'pending',
+                       attempts = 0, worker = NULL, lease_until = NULL, result = NULL, error = NULL,
+                       updated_at = excluded.updated_at
+                   WHERE tasks.status IN ('done', 'failed') AND tasks.updated_at < ?""",
+                [(queue, key, json.dumps(payload, ensure_ascii=False), priority, now,
+                  -1 if requeue_before is None else requeue_before)
+                 for key, payload, priority in items]
+            )
+            self.conn.execute("COMMIT")
+            return self.conn.total_changes - before
+
+    def claim(self, queue, worker, lease=DEFAULT_LEASE):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 租约过期且已领取满 MAX_ATTEMPTS 次的任务（多半每次都把 Worker 搞崩）不再重领
+                self.conn.execute(
+                    """UPDATE tasks SET status = 'failed', error = '租约多次过期（Worker 崩溃？）',
+                       lease_until = NULL, updated_at = ?
+                       WHERE queue = ? AND status = 'running' AND lease_until < ? AND attempts >= ?""",
+                    (now, queue, now, MAX_ATTEMPTS)
+                )
+                row = self.conn.execute(
+                    """SELECT id, key, payload, attempts FROM tasks
+                       WHERE queue = ? AND (status = 'pending' OR (status = 'running' AND lease_until < ?))
+                       ORDER BY priority DESC, id LIMIT 1""",
+                    (queue, now)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                task_id, key, payload, attempts = row
+                self.conn.execute(
+                    """UPDATE tasks SET status = 'running', worker = ?, lease_until = ?,
+                       attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                    (worker, now + lease, now, task_id)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return Task(task_id, queue, key, json.loads(payload), attempts + 1, worker)
+
+    def ack(self, task, result):
+        with self._lock:
+            cursor = self.conn.execute(
+                """UPDATE tasks SET status = 'done', result = ?, error = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                (json.dumps(result, ensure_ascii=False, default=str), time.time(), task.id, task.worker)
+            )
+        return cursor.rowcount > 0
+
+    def nack(self, task, error):
+        status = 'failed' if task.attempts >= MAX_ATTEMPTS else 'pending'
+        with self._lock:
+            cursor = self.conn.execute(
+                """UPDATE tasks SET status = ?, error = ?, lease_until = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                (status, error[:500], time.time(), task.id, task.worker)
+            )
+        return cursor.rowcount > 0
+
+    def results(self, queue):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, payload, result FROM tasks WHERE queue = ? AND status = 'done' ORDER BY id",
+                (queue,)
+            ).fetchall()
+        for key, payload, result in rows:
+            yield key, json.loads(payload), json.loads(result)
+
+    def counts(self, queue):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE queue = ? GROUP BY status", (queue,)
+            ).fetchall()
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# ============ Broker 注册 ============
+
+def _sqlite_path(url: str) -> Optional[str]:
+    """sqlite:///相对路径 或 sqlite:////绝对路径（与 SQLAlchemy 一致）"""
+    return url.split("://", 1)[1][1:] or None
+
+
+BROKERS: Dict[str, Callable[[str], Broker]] = {
+    "sqlite": lambda url: SQLiteBroker(_sqlite_path(url)),
+}
+
+
+def register_broker(scheme: str, factory: Callable[[str], Broker]):
+    """注册新的队列后端，factory(url) 返回 Broker 实例"""
+    BROKERS[scheme] = factory
+
+
+def open_broker(url: str = None) -> Broker:
+    """按 URL 打开队列，如 sqlite:////data/work_queue.db"""
+    url = url or os.environ.get("PROFIT_HUNTER_BROKER") or DEFAULT_BROKER_URL
+    scheme = urlparse(url).scheme
+    if scheme not in BROKERS:
+        raise ValueError(f"未知的队列后端: {scheme} (已注册: {', '.join(BROKERS)})")
+    return BROKERS[scheme](url)
+
+
+# ============ Worker ============
+
+class Worker:
+    """从队列领取 harvest / enrich 任务并执行"""
+
+    def __init__(self, broker: Broker, worker_id: str = None, lease: float = DEFAULT_LEASE):
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self._harvester = None
+        self._scorer = None
+        self._stages = {}
+        self.processed = 0
+
+    def _prescore(self, keyword: str) -> float:
+        from enrich_queue import EnrichmentQueue
+        from scorer import KeywordScorer
+        if self._scorer is None:
+            self._scorer = EnrichmentQueue([], KeywordScorer())
+        return self._scorer.prescore(keyword)
+
+    def handle_harvest(self, payload: Dict) -> Dict:
+        """挖一个种子词，新关键词按预评分投递到 enrich 队列"""
+        if self._harvester is None:
+            from alphabet_soup import GoogleSuggestHarvester
+            self._harvester = GoogleSuggestHarvester()
+        keywords = list(self._harvester.harvest([payload['seed']], max_per_word=payload.get('max', 50)))
+        stages = payload.get('stages') or []
+        if stages:
+            # 本批次之前补全过的词重新补全；本批次里别的种子词已经补全过的不重复
+            added = self.broker.put(ENRICH, [
+                (kw, {'keyword': kw, 'stages': stages}, self._prescore(kw)) for kw in keywords
+            ], requeue_before=payload.get('batch'))
+            logger.info(f"   🌱 {payload['seed']}: {len(keywords)} 个关键词, 新投递 {added} 个补全任务")
+        return {'keywords': keywords}
+
+    def handle_enrich(self, payload: Dict) -> Dict:
+        """对一个关键词执行补全阶段，返回 {阶段: 结果}"""
+        from enrich_queue import build_stages
+        names = tuple(payload.get('stages') or ())
+        if names not in self._stages:
+            self._stages[names] = build_stages(
+                trends='trends' in names, serp='serp' in names, deep='deep' in names
+            )
+        result = {}
+        for name, fetch, _ in self._stages[names]:
+            value = fetch(payload['keyword'])
+            if value is not None:
+                result[name] = value
+        return result
+
+    def run_task(self, task: Task):
+        handler = {HARVEST: self.handle_harvest, ENRICH: self.handle_enrich}[task.queue]
+        try:
+            result = handler(task.payload)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.worker_id}] {task} 失败: {e}")
+            if not self.broker.nack(task, str(e)):
+                logger.warning(f"⚠️ [{self.worker_id}] {task} 租约已过期，已被重新领取，失败不记录")
+        else:
+            if self.broker.ack(task, result):
+                self.processed += 1
+            else:
+                logger.warning(f"⚠️ [{self.worker_id}] {task} 租约已过期，已被重新领取，结果丢弃")
+
+    def run(self, queues: List[str] = (HARVEST, ENRICH), max_tasks: int = None,
+            idle_exit: bool = True, poll: float = 5.0):
+        """
+        循环领取任务：按 queues 顺序优先（先挖词再补全）
+
+        idle_exit=True 时所有队列都没有可领取的任务就退出，否则每 poll 秒轮询一次
+        """
+        logger.info(f"👷 Worker {self.worker_id} 启动: {', '.join(queues)}")
+        while max_tasks is None or self.processed < max_tasks:
+            task = next((t for t in (self.broker.claim(q, self.worker_id, self.lease) for q in queues) if t), None)
+            if task is None:
+                if idle_exit:
+                    break
+                time.sleep(poll)
+                continue
+            self.run_task(task)
+        logger.info(f"👷 Worker {self.worker_id} 结束: 完成 {self.processed} 个任务")
+        return self.processed
+
+
+# ============ Coordinator ============
+
+class Coordinator:
+    """投递种子词，等待队列清空，合并所有结果并评分"""
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+
+    def submit(self, seeds: Iterable[str], max_per_word: int = 50, stages: List[str] = ()) -> int:
+        """投递种子词：以前运行过的同名种子词（及其挖出的补全任务）重新排队"""
+        batch = time.time()
+        added = self.broker.put(HARVEST, [
+            (seed, {'seed': seed, 'max': max_per_word, 'stages': list(stages), 'batch': batch}, 0)
+            for seed in seeds
+        ], requeue_before=batch)
+        logger.info(f"📤 投递 {added} 个种子词 (补全阶段: {', '.join(stages) or '无'})")
+        return added
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        return {queue: self.broker.counts(queue) for queue in (HARVEST, ENRICH)}
+
+    def drained(self) -> bool:
+        return all(c['pending'] == 0 and c['running'] == 0 for c in self.status().values())
+
+    def wait(self, poll: float = 10.0, timeout: float = None) -> bool:
+        """等待所有任务完成，超时返回 False"""
+        deadline = time.time() + timeout if timeout else None
+        while not self.drained():
+            if deadline and time.time() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def merge(self) -> Tuple[List[str], Dict[str, Dict[str, Dict]]]:
+        """合并结果: (全部关键词, {阶段: {keyword: 结果}})"""
+        keywords = {}
+        for _, _, result in self.broker.results(HARVEST):
+            keywords.update(dict.fromkeys(result.get('keywords', [])))
+        enriched = {"trends": {}, "serp": {}, "deep": {}}
+        for keyword, _, result in self.broker.results(ENRICH):
+            for stage, value in result.items():
+                enriched.setdefault(stage, {})[keyword] = value
+        return list(keywords), enriched
+
+    def score(self) -> List[Dict]:
+        """合并结果 → GPTs 对比 → 综合评分，保存 ultimate_final_results.csv"""
+        from data_utils import save_csv
+        from gpts_analyzer import GPTsAnalyzer
+        from scorer import KeywordScorer
+
+        keywords, enriched = self.merge()
+        logger.info(f"🧮 合并 {len(keywords)} 个关键词, "
+                    + ", ".join(f"{k} {len(v)}" for k, v in enriched.items()))
+        gpts_results = GPTsAnalyzer().analyze(keywords)
+        scorer = KeywordScorer(enriched["trends"], gpts_results, enriched["serp"], enriched["deep"])
+        final_results = scorer.get_final_results(scorer.score(keywords))
+        save_csv(final_results, "ultimate_final_results.csv")
+        logger.info(f"✅ 评分完成: {len(final_results)} 个关键词")
+        return final_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profit Hunter 分布式工作队列')
+    parser.add_argument('--broker', default=None, help=f'队列 URL (默认 {DEFAULT_BROKER_URL})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('submit', help='投递种子词')
+    p.add_argument('seeds', nargs='*', help='种子词（默认读取 words.md）')
+    p.add_argument('--max', type=int, default=50, help='每个种子词最大建议数')
+    p.add_argument('--trends', action='store_true', help='补全 Google Trends')
+    p.add_argument('--playwright', action='store_true', help='补全 SERP 竞争分析')
+    p.add_argument('--deep-search', action='store_true', help='补全深度社区搜索')
+
+    p = sub.add_parser('worker', help='启动 Worker')
+    p.add_argument('--queues', nargs='+', default=[HARVEST, ENRICH], choices=[HARVEST, ENRICH])
+    p.add_argument('--id', default=None, help='Worker 标识（默认 主机名-pid）')
+    p.add_argument('--max-tasks', type=int, default=None, help='最多处理任务数')
+    p.add_argument('--forever', action='store_true', help='队列空时继续轮询而不是退出')
+    p.add_argument('--lease', type=float, default=DEFAULT_LEASE, help='任务租约（秒）')
+
+    sub.add_parser('status', help='查看队列状态')
+
+    p = sub.add_parser('merge', help='合并结果并评分')
+    p.add_argument('--wait', action='store_true', help='先等待队列清空')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    broker = open_broker(args.broker)
+    coordinator = Coordinator(broker)
+    try:
+        if args.command == 'submit':
+            from data_utils import load_keywords
+            stages = [name for name, on in (('trends', args.trends), ('serp', args.playwright),
+                                            ('deep', args.deep_search)) if on]
+            coordinator.submit(args.seeds or load_keywords(), args.max, stages)
+        elif args.command == 'worker':
+            Worker(broker, args.id, args.lease).run(args.queues, args.max_tasks, idle_exit=not args.forever)
+        elif args.command == 'status':
+            for queue, counts in coordinator.status().items():
+                print(f"{queue:8s} " + "  ".join(f"{k}={v}" for k, v in counts.items()))
+        elif args.command == 'merge':
+            if args.wait:
+                coordinator.wait()
+            coordinator.score()
+    finally:
+        broker.close()
+
+
+if __name__ == "__main__":
+    main()